@@ -0,0 +1,119 @@
+"""Initial schema and index strategy for the ideas table
+
+Also adopts databases created before Alembic (by app/db/init.sql): the table
+is left in place, missing columns are added and indexes are created if absent.
+
+Indexes follow the actual query shapes:
+- list_ideas: equality on one of niche/difficulty/idea_type, ordered by
+  (created_at DESC, id DESC) for keyset pagination
+- get_matching_ideas: niche IN, idea_type IN, difficulty IN
+- skill overlap: skills/tech_stack && ARRAY[...] (GIN)
+- semantic retrieval: HNSW on embedding; ingestion: content_hash lookup
+
+Revision ID: 0001
+Revises:
+Create Date: 2024-03-01
+"""
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from pgvector.sqlalchemy import Vector
+
+from app.config import get_settings
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+EMBEDDING_DIM = get_settings().embedding_dim
+
+# Single-column indexes from init.sql, superseded by the composites below
+LEGACY_INDEXES = ["idx_ideas_niche", "idx_ideas_difficulty", "idx_ideas_type", "idx_ideas_created"]
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+
+    # Offline (--sql) mode cannot inspect, so it always emits the fresh schema
+    if context.is_offline_mode() or not sa.inspect(op.get_bind()).has_table("ideas"):
+        op.create_table(
+            "ideas",
+            sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True,
+                      server_default=sa.text("gen_random_uuid()")),
+            # Core
+            sa.Column("title", sa.String(255), nullable=False),
+            sa.Column("summary", sa.Text(), nullable=False),
+            sa.Column("description", sa.Text()),
+            # Classification
+            sa.Column("idea_type", sa.String(50)),
+            sa.Column("business_model", sa.String(50)),
+            sa.Column("monetization", sa.Text()),
+            # Requirements
+            sa.Column("skills", postgresql.ARRAY(sa.String())),
+            sa.Column("tech_stack", postgresql.ARRAY(sa.String())),
+            sa.Column("difficulty", sa.String(20)),
+            sa.Column("time_to_mvp", sa.String(50)),
+            sa.Column("startup_cost", sa.String(50)),
+            # Market
+            sa.Column("target_audience", sa.Text()),
+            sa.Column("niche", sa.String(100)),
+            sa.Column("competition", sa.String(20)),
+            # Details
+            sa.Column("key_features", postgresql.ARRAY(sa.String())),
+            sa.Column("success_factors", postgresql.ARRAY(sa.String())),
+            sa.Column("challenges", postgresql.ARRAY(sa.String())),
+            # Source
+            sa.Column("source_video_id", sa.String(50)),
+            sa.Column("source_channel", sa.String(255)),
+            sa.Column("confidence", sa.Float()),
+            # Retrieval
+            sa.Column("embedding", Vector(EMBEDDING_DIM)),
+            sa.Column("content_hash", sa.String(64)),
+            # Timestamps
+            sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        )
+    else:
+        # Pre-Alembic database: bring columns up to date
+        op.execute(f"ALTER TABLE ideas ADD COLUMN IF NOT EXISTS embedding vector({EMBEDDING_DIM})")
+        op.execute("ALTER TABLE ideas ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)")
+        op.execute("UPDATE ideas SET created_at = NOW() WHERE created_at IS NULL")
+        op.execute("UPDATE ideas SET updated_at = created_at WHERE updated_at IS NULL")
+        op.alter_column("ideas", "created_at", nullable=False)
+        op.alter_column("ideas", "updated_at", nullable=False)
+
+    # list_ideas: one equality filter + keyset order
+    op.create_index("idx_ideas_created_id", "ideas",
+                    [sa.text("created_at DESC"), sa.text("id DESC")], if_not_exists=True)
+    op.create_index("idx_ideas_niche_created", "ideas",
+                    ["niche", sa.text("created_at DESC"), sa.text("id DESC")], if_not_exists=True)
+    op.create_index("idx_ideas_difficulty_created", "ideas",
+                    ["difficulty", sa.text("created_at DESC"), sa.text("id DESC")], if_not_exists=True)
+    op.create_index("idx_ideas_type_created", "ideas",
+                    ["idea_type", sa.text("created_at DESC"), sa.text("id DESC")], if_not_exists=True)
+
+    # get_matching_ideas: niche IN + idea_type IN + difficulty IN
+    op.create_index("idx_ideas_niche_type_difficulty", "ideas",
+                    ["niche", "idea_type", "difficulty"], if_not_exists=True)
+
+    # Array overlap (&&) and containment (@>) on skills/tech stack
+    op.create_index("idx_ideas_skills", "ideas", ["skills"],
+                    postgresql_using="gin", if_not_exists=True)
+    op.create_index("idx_ideas_tech_stack", "ideas", ["tech_stack"],
+                    postgresql_using="gin", if_not_exists=True)
+
+    # Ingestion and semantic retrieval
+    op.create_index("ix_ideas_content_hash", "ideas", ["content_hash"], if_not_exists=True)
+    op.create_index("idx_ideas_embedding", "ideas", ["embedding"],
+                    postgresql_using="hnsw",
+                    postgresql_with={"m": 16, "ef_construction": 64},
+                    postgresql_ops={"embedding": "vector_cosine_ops"},
+                    if_not_exists=True)
+
+    for name in LEGACY_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def downgrade():
+    op.drop_table("ideas")
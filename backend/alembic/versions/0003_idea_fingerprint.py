@@ -0,0 +1,90 @@
+"""Content fingerprint natural key for idempotent ingestion
+
+Adds ideas.fingerprint, removes existing duplicates (keeping the oldest copy)
+and makes the fingerprint unique so ingestion can upsert with ON CONFLICT.
+The fingerprint and dedup are frozen copies of app.models.idea and
+app.services.dedup as of this revision, so the migration does not import
+the app. Offline (--sql) mode cannot run the Python dedup; run
+`python -m app.services.dedup` before applying the emitted SQL.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2024-03-08
+"""
+import hashlib
+import re
+
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+BATCH_SIZE = 1000
+
+ideas = sa.table(
+    "ideas",
+    sa.column("id"),
+    sa.column("created_at"),
+    sa.column("title"),
+    sa.column("summary"),
+    sa.column("source_video_id"),
+    sa.column("fingerprint"),
+)
+
+
+def content_fingerprint(title, summary, source_video_id=None) -> str:
+    normalized = [" ".join(WORD_PATTERN.findall((text or "").lower())) for text in (title, summary)]
+    payload = "\n".join([*normalized, source_video_id or ""])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def dedup_ideas(conn):
+    """Fingerprint every row and delete duplicates, keeping the oldest copy."""
+    kept, duplicates, fingerprints = set(), [], {}
+    cursor = None
+    while True:
+        query = sa.select(
+            ideas.c.id, ideas.c.created_at, ideas.c.title, ideas.c.summary, ideas.c.source_video_id
+        )
+        if cursor is not None:
+            query = query.where(sa.tuple_(ideas.c.created_at, ideas.c.id) > sa.tuple_(*cursor))
+        rows = conn.execute(query.order_by(ideas.c.created_at, ideas.c.id).limit(BATCH_SIZE)).all()
+        if not rows:
+            break
+        for row in rows:
+            fingerprint = content_fingerprint(row.title, row.summary, row.source_video_id)
+            if fingerprint in kept:
+                duplicates.append(row.id)
+            else:
+                kept.add(fingerprint)
+                fingerprints[row.id] = fingerprint
+        cursor = (rows[-1].created_at, rows[-1].id)
+
+    for i in range(0, len(duplicates), BATCH_SIZE):
+        conn.execute(ideas.delete().where(ideas.c.id.in_(duplicates[i:i + BATCH_SIZE])))
+    if fingerprints:
+        # The column was just added, so every value is new and none can collide
+        conn.execute(
+            ideas.update()
+            .where(ideas.c.id == sa.bindparam("row_id"))
+            .values(fingerprint=sa.bindparam("new_fingerprint")),
+            [{"row_id": idea_id, "new_fingerprint": value} for idea_id, value in fingerprints.items()],
+        )
+
+
+def upgrade():
+    op.add_column("ideas", sa.Column("fingerprint", sa.String(64)))
+
+    if not context.is_offline_mode():
+        dedup_ideas(op.get_bind())
+
+    op.create_index("ux_ideas_fingerprint", "ideas", ["fingerprint"], unique=True)
+
+
+def downgrade():
+    op.drop_index("ux_ideas_fingerprint", table_name="ideas")
+    op.drop_column("ideas", "fingerprint")
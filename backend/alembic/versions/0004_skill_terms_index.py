@@ -0,0 +1,42 @@
+"""Case-insensitive skill overlap index
+
+Adds idea_skill_terms(skills, tech_stack), the distinct lowercased terms of
+an idea's skills and tech stack (record_skill_terms in the catalog
+snapshot), and a GIN index over it. rank_by_skill_overlap prefilters with
+`idea_skill_terms(skills, tech_stack) && ARRAY[...]` on this index and only
+scores the rows it returns. The expression has to match the index exactly
+for the planner to use it, so queries call the function with the same
+arguments.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2024-03-15
+"""
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # IMMUTABLE so it can be indexed; it only reads its arguments
+    op.execute("""
+CREATE OR REPLACE FUNCTION idea_skill_terms(skills text[], tech_stack text[])
+RETURNS text[]
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$
+    SELECT coalesce(array_agg(DISTINCT lower(term)), '{}')
+    FROM unnest(coalesce(skills, '{}') || coalesce(tech_stack, '{}')) AS term
+$$
+""")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_ideas_skill_terms ON ideas "
+        "USING gin (idea_skill_terms(skills, tech_stack))"
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS idx_ideas_skill_terms")
+    op.execute("DROP FUNCTION IF EXISTS idea_skill_terms(text[], text[])")
@@ -0,0 +1,38 @@
+"""Drop indexes no live query uses
+
+tests/test_query_plans.py EXPLAINs the application's catalog queries:
+- idx_ideas_skills, idx_ideas_tech_stack: skill ranking matches
+  case-insensitively through idx_ideas_skill_terms (0004); nothing queries
+  the raw arrays with && or @>
+- idx_ideas_difficulty_created, idx_ideas_type_created: difficulty and type
+  have a handful of values, so a filtered list page is found sooner by
+  walking idx_ideas_created_id
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2024-03-15
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for name in ("idx_ideas_skills", "idx_ideas_tech_stack",
+                 "idx_ideas_difficulty_created", "idx_ideas_type_created"):
+        op.drop_index(name, table_name="ideas", if_exists=True)
+
+
+def downgrade():
+    op.create_index("idx_ideas_difficulty_created", "ideas",
+                    ["difficulty", sa.text("created_at DESC"), sa.text("id DESC")], if_not_exists=True)
+    op.create_index("idx_ideas_type_created", "ideas",
+                    ["idea_type", sa.text("created_at DESC"), sa.text("id DESC")], if_not_exists=True)
+    op.create_index("idx_ideas_skills", "ideas", ["skills"],
+                    postgresql_using="gin", if_not_exists=True)
+    op.create_index("idx_ideas_tech_stack", "ideas", ["tech_stack"],
+                    postgresql_using="gin", if_not_exists=True)
@@ -1,15 +1,96 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+import json
 
-from app.database import get_db
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+
+from app.config import get_settings
 from app.schemas.profile import UserProfile
-from app.schemas.generation import GenerationRequest, GenerationResponse
-from app.services.generation import generate_ideas
+from app.schemas.generation import GenerationJob, GenerationRequest, GenerationResponse
+from app.services.generation import generate_ideas, generation_flights, get_generation_stats
+from app.services.generation_cache import generation_cache
+from app.services.generation_jobs import JobQueueFull, generation_jobs
+from app.services.streaming import stream_generation
 
 router = APIRouter()
+settings = get_settings()
 
 
 @router.post("", response_model=GenerationResponse)
-async def generate(request: GenerationRequest, db: Session = Depends(get_db)):
-    result = await generate_ideas(request.profile, request.num_ideas, db)
+async def generate(request: GenerationRequest):
+    # No request-scoped session: coalesced generations open their own
+    result = await generate_ideas(
+        request.profile,
+        request.num_ideas,
+        use_cache=request.use_cache,
+        refresh=request.refresh,
+    )
     return result
+
+
+@router.post("/stream")
+async def generate_stream(request: GenerationRequest):
+    """Stream ideas as Server-Sent Events: one `idea` event per validated idea,
+    `rejected` for ideas that fail validation, and a final `profile_summary`."""
+
+    async def events():
+        async for event, data in stream_generation(
+            request.profile,
+            request.num_ideas,
+            use_cache=request.use_cache,
+            refresh=request.refresh,
+        ):
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Disable proxy buffering so each event reaches the client immediately
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/jobs", response_model=GenerationJob, status_code=status.HTTP_202_ACCEPTED)
+async def submit_generation_job(request: GenerationRequest, http_request: Request, response: Response):
+    """Queue a generation and return its job id at once; fetch the result from GET /jobs/{job_id}.
+
+    An identical request with a queued or running job gets that job back.
+    Async so submit() runs on the event loop that owns the job queue.
+    """
+    try:
+        job, deduplicated = generation_jobs.submit(request)
+    except JobQueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many queued generations. Try again shortly.",
+            headers={"Retry-After": "5"},
+        )
+    response.headers["Location"] = http_request.app.url_path_for("get_generation_job", job_id=job.id)
+    return job.to_schema(deduplicated)
+
+
+@router.get("/jobs/{job_id}", response_model=GenerationJob)
+async def get_generation_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, description="Seconds to wait for the job to finish (long-poll)"),
+):
+    """Job status, with the result once it is done."""
+    job = generation_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found or expired"
+        )
+    await generation_jobs.wait(job, min(wait, settings.generation_job_max_wait))
+    return job.to_schema()
+
+
+@router.get("/cache/stats")
+def cache_stats():
+    """Generation cache hit/miss and request coalescing counters."""
+    return {**generation_cache.get_stats(), "coalescing": generation_flights.get_stats()}
+
+
+@router.get("/stats")
+def generation_stats():
+    """Validation outcomes: attempts per request and rejection rate of LLM ideas."""
+    return {**get_generation_stats(), "jobs": generation_jobs.get_stats()}
@@ -1,28 +1,199 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+import base64
+import json
+from datetime import datetime
+from fastapi import APIRouter, BackgroundTasks, Body, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
-from typing import Optional
+from typing import Literal, Optional
 from uuid import UUID
 
-from app.database import get_db
+from app.config import get_settings
+from app.database import get_db, get_read_db
 from app.models.idea import Idea
-from app.schemas.idea import IdeaCreate, IdeaResponse, IdeaList
+from app.schemas.idea import IdeaCreate, IdeaResponse, IdeaList, SUMMARY_FIELDS
 from app.logging_config import get_logger
+from app.services.catalog import CountCache, catalog_version
+from app.services.catalog_snapshot import IdeaRecord, catalog_snapshot
+from app.services.generation_cache import generation_cache
+from app.services.dedup import fingerprint_of, upsert_ideas
+from app.services.importer import import_ideas
+from app.services.ingestion import backfill_embeddings, backfill_state, embed_ideas
+
+try:
+    import orjson  # In requirements; json is the fallback for bare dev installs
+except ImportError:
+    orjson = None
 
 router = APIRouter()
 logger = get_logger(__name__)
+settings = get_settings()
+
+count_cache = CountCache(ttl=settings.count_cache_ttl)
+
+
+def mark_catalog_changed(
+    background_tasks: BackgroundTasks,
+    upserted: list[IdeaRecord] = (),
+    deleted: list[UUID] = (),
+):
+    """Invalidate caches derived from the catalog after a committed write."""
+    catalog_version.bump()
+    catalog_snapshot.apply(upserted, deleted)
+    background_tasks.add_task(generation_cache.invalidate_shared)
+
+
+def queue_embeddings(background_tasks: BackgroundTasks, records: list[IdeaRecord]):
+    """Embed written rows after the response, when semantic retrieval reads the vectors.
+
+    In filter mode nothing reads them; POST /embeddings/backfill embeds the
+    rows left without one before switching to semantic retrieval.
+    """
+    if settings.retrieval_mode == "semantic":
+        background_tasks.add_task(embed_ideas, [record.id for record in records])
+
+
+def encode_cursor(idea: Idea) -> str:
+    """Opaque keyset cursor for the position after `idea`."""
+    payload = json.dumps({"c": idea.created_at.isoformat(), "i": str(idea.id)})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(payload["c"]), UUID(payload["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def catalog_etag(*parts: str) -> str:
+    """Strong ETag for a catalog read at the current catalog version."""
+    return '"' + ".".join([catalog_version.tag(settings.catalog_etag_window), *parts]) + '"'
+
+
+def row_version(idea: Idea) -> str:
+    return idea.updated_at.strftime("%Y%m%d%H%M%S%f")
+
+
+def if_none_match(request: Request) -> list[str]:
+    """Entity tags from If-None-Match. nginx gzip weakens ETags, so W/ is ignored."""
+    header = request.headers.get("if-none-match", "")
+    return [tag.strip().removeprefix("W/") for tag in header.split(",") if tag.strip()]
+
+
+def cache_headers(etag: str) -> dict:
+    """Browsers revalidate every time; nginx may reuse the body for catalog_cache_max_age."""
+    return {"ETag": etag, "Cache-Control": f"public, max-age=0, s-maxage={settings.catalog_cache_max_age}"}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag))
+
+
+def catalog_not_modified(request: Request) -> str:
+    """Current catalog ETag; a request already holding it gets a 304.
+
+    Declared before get_read_db, so the 304 is sent before a session is
+    opened (which connects to the replica when one is configured).
+    """
+    etag = catalog_etag()
+    if etag in if_none_match(request):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag))
+    return etag
+
+
+def idea_etag(idea: Idea) -> str:
+    """ETag of one idea: catalog version, idea id and row version."""
+    return catalog_etag(str(idea.id), row_version(idea))
+
+
+def idea_not_modified(idea_id: UUID, request: Request) -> list[str]:
+    """If-None-Match tags of an idea read; this idea's tag from the current catalog version gets a 304.
+
+    Declared before get_read_db, like catalog_not_modified.
+    """
+    tags = if_none_match(request)
+    prefix = catalog_etag(str(idea_id))[:-1] + "."
+    for tag in tags:
+        # The rest is the row version the client saw; unchanged while the catalog is
+        if tag.startswith(prefix) and tag[len(prefix):-1].isdigit() and tag.endswith('"'):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(tag))
+    return tags
+
+
+def projected_fields(view: str, fields: Optional[str]) -> Optional[list[str]]:
+    """Fields to select for a lean listing (id first), or None for full rows."""
+    if fields:
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = sorted(set(names) - set(IdeaResponse.model_fields))
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}"
+            )
+    elif view == "summary":
+        names = list(SUMMARY_FIELDS)
+    else:
+        return None
+    return ["id", *dict.fromkeys(name for name in names if name != "id")]
+
+
+def dumps_json(payload) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, default=str, separators=(",", ":")).encode()
+
+
+def lean_response(names: list[str], rows, **page) -> Response:
+    """IdeaList-shaped JSON straight from projected rows (created_at, *names)."""
+    body = {"ideas": [dict(zip(names, row[1:])) for row in rows], **page}
+    return Response(dumps_json(body), media_type="application/json")
+
+
+def estimate_count(db: Session, query) -> int:
+    """Planner row estimate for a query (no scan)."""
+    compiled = query.statement.compile(
+        dialect=db.get_bind().dialect, compile_kwargs={"render_postcompile": True}
+    )
+    plan = db.connection().exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled.string}", compiled.params
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
 
 
 @router.get("", response_model=IdeaList)
 def list_ideas(
-    skip: int = Query(0, ge=0, description="Number of records to skip"),
+    response: Response,
+    skip: int = Query(0, ge=0, description="Number of records to skip (ignored with cursor)"),
     limit: int = Query(50, ge=1, le=100, description="Max records to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    count: Literal["exact", "estimate"] = Query("exact", description="How to compute total"),
     niche: Optional[str] = None,
     difficulty: Optional[str] = None,
     idea_type: Optional[str] = None,
-    db: Session = Depends(get_db),
+    view: Literal["full", "summary"] = Query("full", description="summary: card fields only, no long text"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (id is always included)"),
+    # Read before querying: a write during the query leaves an older tag, so clients refetch
+    etag: str = Depends(catalog_not_modified),
+    db: Session = Depends(get_read_db),
 ):
-    """List ideas with optional filters."""
+    """List ideas with optional filters, newest first.
+
+    Use `cursor` (keyset pagination) instead of `skip` for deep pages: every
+    cursor page costs the same as the first one. With `view=summary` or
+    `fields`, only those columns are selected and rows are encoded to JSON
+    directly, without building ORM objects or response models.
+
+    Pages carry an ETag for the catalog version; a matching If-None-Match
+    gets a 304 without opening a database session.
+    """
+    names = projected_fields(view, fields)
     try:
         query = db.query(Idea)
 
@@ -33,39 +204,130 @@ def list_ideas(
         if idea_type:
             query = query.filter(Idea.idea_type == idea_type)
 
-        total = query.count()
-        ideas = query.offset(skip).limit(limit).all()
+        # Totals are cached per filter combination until the catalog changes
+        count_key = (niche, difficulty, idea_type, count)
+        total = count_cache.get(count_key)
+        if total is None:
+            version = catalog_version.value
+            total = estimate_count(db, query) if count == "estimate" else query.count()
+            count_cache.set(count_key, total, version)
+
+        # Stable order; (created_at, id) is unique so keyset pages never overlap
+        page = query.order_by(Idea.created_at.desc(), Idea.id.desc())
+        if cursor:
+            created_at, idea_id = decode_cursor(cursor)
+            page = page.filter(tuple_(Idea.created_at, Idea.id) < tuple_(created_at, idea_id))
+        elif skip:
+            page = page.offset(skip)
+
+        if names is not None:
+            # created_at is selected for the cursor only
+            page = page.with_entities(Idea.created_at, *(getattr(Idea, name) for name in names))
+
+        # One extra row tells us whether there is a next page
+        ideas = page.limit(limit + 1).all()
+        next_cursor = encode_cursor(ideas[limit - 1]) if len(ideas) > limit else None
+        ideas = ideas[:limit]
+
+        logger.info("Listed %d ideas (total: %d)", len(ideas), total)
+        if names is not None:
+            lean = lean_response(
+                names, ideas, total=total, total_is_estimate=count == "estimate", next_cursor=next_cursor
+            )
+            lean.headers.update(cache_headers(etag))
+            return lean
+        response.headers.update(cache_headers(etag))
+        return IdeaList(
+            ideas=ideas,
+            total=total,
+            total_is_estimate=count == "estimate",
+            next_cursor=next_cursor,
+        )
 
-        logger.info(f"Listed {len(ideas)} ideas (total: {total})")
-        return IdeaList(ideas=ideas, total=total)
-    
     except SQLAlchemyError as e:
-        logger.error(f"Database error listing ideas: {str(e)}")
+        logger.error("Database error listing ideas: %s", e)
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Database error"
         )
 
 
+@router.post("/embeddings/backfill", status_code=status.HTTP_202_ACCEPTED)
+async def start_embedding_backfill(
+    background_tasks: BackgroundTasks,
+    start_after: Optional[UUID] = Query(None, description="Resume after this idea id"),
+):
+    """Embed all ideas that have no vector yet, in the background."""
+    if backfill_state["running"]:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Embedding backfill already running"
+        )
+
+    backfill_state["running"] = True
+    background_tasks.add_task(backfill_embeddings, start_after)
+    logger.info("Started embedding backfill after %s", start_after)
+    return {"started": True, "start_after": start_after}
+
+
+@router.get("/embeddings/backfill")
+def get_embedding_backfill():
+    """Progress of the current or last embedding backfill."""
+    return {
+        "running": backfill_state["running"],
+        "cursor": backfill_state["cursor"],
+        **backfill_state["stats"].to_dict(),
+    }
+
+
+@router.get("/catalog/snapshot")
+def get_catalog_snapshot():
+    """Load state, hit counters and memory usage of the in-memory catalog."""
+    return catalog_snapshot.get_stats()
+
+
+@router.post("/catalog/snapshot/reload")
+async def reload_catalog_snapshot():
+    """Reload the in-memory catalog from the database now."""
+    await catalog_snapshot.load()
+    return catalog_snapshot.get_stats()
+
+
 @router.get("/{idea_id}", response_model=IdeaResponse)
-def get_idea(idea_id: UUID, db: Session = Depends(get_db)):
-    """Get single idea by ID."""
+def get_idea(
+    idea_id: UUID,
+    response: Response,
+    tags: list[str] = Depends(idea_not_modified),
+    db: Session = Depends(get_read_db),
+):
+    """Get single idea by ID.
+
+    The ETag is the catalog version, the idea id and the row version
+    (updated_at). If nothing in the catalog changed since the client got this
+    idea's tag, the 304 needs no database session; otherwise the row is read
+    and a tag with the same id and row version still gets a 304.
+    """
     try:
         idea = db.query(Idea).filter(Idea.id == idea_id).first()
         if not idea:
-            logger.warning(f"Idea not found: {idea_id}")
+            logger.warning("Idea not found: %s", idea_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Idea {idea_id} not found"
             )
         
-        logger.info(f"Retrieved idea: {idea_id}")
+        etag = idea_etag(idea)
+        if any(tag.endswith(f'.{idea.id}.{row_version(idea)}"') for tag in tags):
+            return not_modified(etag)
+
+        logger.info("Retrieved idea: %s", idea_id)
+        response.headers.update(cache_headers(etag))
         return idea
     
     except HTTPException:
         raise
     except SQLAlchemyError as e:
-        logger.error(f"Database error getting idea {idea_id}: {str(e)}")
+        logger.error("Database error getting idea %s: %s", idea_id, e)
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Database error"
@@ -73,26 +335,44 @@ def get_idea(idea_id: UUID, db: Session = Depends(get_db)):
 
 
 @router.post("", response_model=IdeaResponse, status_code=status.HTTP_201_CREATED)
-def create_idea(idea: IdeaCreate, db: Session = Depends(get_db)):
-    """Create new idea."""
+def create_idea(
+    idea: IdeaCreate,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+):
+    """Create new idea, or update the stored copy with the same fingerprint.
+
+    Responds 201 when inserted and 200 when an existing idea was updated or
+    unchanged; the X-Ingest-Result header says which. With semantic retrieval,
+    embeddings are computed after the response.
+    """
     try:
-        db_idea = Idea(**idea.model_dump())
-        db.add(db_idea)
+        result = upsert_ideas(db, [idea])
         db.commit()
-        db.refresh(db_idea)
-        
-        logger.info(f"Created idea: {db_idea.id} - {db_idea.title}")
+
+        if result.records:
+            mark_catalog_changed(background_tasks, upserted=result.records)
+            queue_embeddings(background_tasks, result.records)
+
+        outcome = next(name for name, count in result.counts().items() if count)
+        response.headers["X-Ingest-Result"] = outcome
+        if outcome != "inserted":
+            response.status_code = status.HTTP_200_OK
+
+        db_idea = db.query(Idea).filter(Idea.fingerprint == fingerprint_of(idea)).one()
+        logger.info("Upserted idea (%s): %s - %s", outcome, db_idea.id, db_idea.title)
         return db_idea
     
     except IntegrityError as e:
-        logger.error(f"Integrity error creating idea: {str(e)}")
+        logger.error("Integrity error creating idea: %s", e)
         db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Idea already exists or invalid data"
         )
     except SQLAlchemyError as e:
-        logger.error(f"Database error creating idea: {str(e)}")
+        logger.error("Database error creating idea: %s", e)
         db.rollback()
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -102,10 +382,17 @@ def create_idea(idea: IdeaCreate, db: Session = Depends(get_db)):
 
 @router.post("/bulk", response_model=dict, status_code=status.HTTP_201_CREATED)
 def bulk_create_ideas(
-    ideas: list[IdeaCreate] = Query(..., max_length=100),
+    background_tasks: BackgroundTasks,
+    ideas: list[IdeaCreate] = Body(..., max_length=100),
     db: Session = Depends(get_db)
 ):
-    """Bulk create ideas. Max 100 at a time."""
+    """Bulk upsert ideas. Max 100 at a time.
+
+    With semantic retrieval, embeddings are batched after the response.
+
+    Ideas matching a stored fingerprint update that row if anything changed
+    and are skipped otherwise.
+    """
     if len(ideas) == 0:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -119,22 +406,28 @@ def bulk_create_ideas(
         )
     
     try:
-        db_ideas = [Idea(**idea.model_dump()) for idea in ideas]
-        db.add_all(db_ideas)
+        result = upsert_ideas(db, ideas)
         db.commit()
-        
-        logger.info(f"Bulk created {len(db_ideas)} ideas")
-        return {"created": len(db_ideas)}
+
+        if result.records:
+            mark_catalog_changed(background_tasks, upserted=result.records)
+            queue_embeddings(background_tasks, result.records)
+
+        logger.info(
+            "Bulk upserted %d ideas: %d inserted, %d updated, %d skipped",
+            len(ideas), result.inserted, result.updated, result.skipped,
+        )
+        return {"created": result.inserted, **result.counts()}
     
     except IntegrityError as e:
-        logger.error(f"Integrity error in bulk create: {str(e)}")
+        logger.error("Integrity error in bulk create: %s", e)
         db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Duplicate or invalid ideas in batch"
         )
     except SQLAlchemyError as e:
-        logger.error(f"Database error in bulk create: {str(e)}")
+        logger.error("Database error in bulk create: %s", e)
         db.rollback()
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -142,13 +435,48 @@ def bulk_create_ideas(
         )
 
 
+@router.post("/import")
+async def import_ideas_stream(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    format: Optional[Literal["ndjson", "csv"]] = Query(
+        None, description="Body format; defaults from Content-Type"
+    ),
+    batch_size: Optional[int] = Query(None, ge=1, le=10000, description="Rows per COPY batch"),
+):
+    """Import a streamed NDJSON or CSV body of any size.
+
+    Rows are validated as they arrive, written with COPY in batches and
+    upserted on their content fingerprint. Each batch commits on its own; the
+    response reports inserted, updated and skipped rows and errors per batch. CSV needs a header row; array cells are JSON arrays or
+    "|"-separated values. Embeddings are backfilled after the response.
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "csv" if "csv" in content_type else "ndjson"
+
+    report = await import_ideas(
+        request.stream(), format, batch_size or settings.import_batch_size
+    )
+
+    if report.inserted or report.updated:
+        background_tasks.add_task(generation_cache.invalidate_shared)
+        if not backfill_state["running"]:
+            backfill_state["running"] = True
+            background_tasks.add_task(backfill_embeddings)
+
+    return report.to_dict()
+
+
 @router.delete("/{idea_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_idea(idea_id: UUID, db: Session = Depends(get_db)):
+def delete_idea(
+    idea_id: UUID, background_tasks: BackgroundTasks, db: Session = Depends(get_db)
+):
     """Delete idea by ID."""
     try:
         idea = db.query(Idea).filter(Idea.id == idea_id).first()
         if not idea:
-            logger.warning(f"Idea not found for deletion: {idea_id}")
+            logger.warning("Idea not found for deletion: %s", idea_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Idea {idea_id} not found"
@@ -156,14 +484,15 @@ def delete_idea(idea_id: UUID, db: Session = Depends(get_db)):
         
         db.delete(idea)
         db.commit()
+        mark_catalog_changed(background_tasks, deleted=[idea_id])
         
-        logger.info(f"Deleted idea: {idea_id}")
+        logger.info("Deleted idea: %s", idea_id)
         return None
     
     except HTTPException:
         raise
     except SQLAlchemyError as e:
-        logger.error(f"Database error deleting idea {idea_id}: {str(e)}")
+        logger.error("Database error deleting idea %s: %s", idea_id, e)
         db.rollback()
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -1,45 +1,249 @@
+"""
+Engines and sessions, one connection pool per workload so a big import
+cannot take the connections catalog browsing and generation need:
+
+- writes (sync) and ingestion (async): the primary, for every write
+- catalog (sync) and generation (async): reads, on the replica when
+  settings.database_replica_url is set
+
+Endpoints pick the route through their session dependency: get_db for
+writes, get_read_db for catalog reads. Services open generation reads with
+generation_session(). Reads use the primary-side catalog and generation
+pools while the replica is unreachable and for a few seconds after this
+process writes, so clients see their own changes. A read session on the
+replica connects when it is opened, so a replica that fails to connect
+(within settings.database_replica_connect_timeout) sends that same session
+to the primary.
+"""
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
 from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.config import get_settings
 from app.logging_config import get_logger
+from app.metrics import db_read_routes, db_replica_failures, pool_collector, timed_pool_class
+from app.services.catalog import catalog_version
 
 settings = get_settings()
 logger = get_logger(__name__)
 
-# Connection pooling settings for production
-engine = create_engine(
-    settings.database_url,
-    pool_size=5,  # Max connections in pool
-    max_overflow=10,  # Max overflow connections
-    pool_pre_ping=True,  # Check connection health before using
-    pool_recycle=3600,  # Recycle connections after 1 hour
-    echo=False,  # Don't log SQL (use SQLAlchemy logger instead)
-)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
+def sync_database_url(url: str) -> str:
+    """Return the URL with the psycopg2 (blocking) driver."""
+    return url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+def async_database_url(url: str) -> str:
+    """Return the URL with the asyncpg driver."""
+    if url.startswith("postgresql+asyncpg://"):
+        return url
+    return url.replace("postgresql://", "postgresql+asyncpg://", 1)
 
 
-@event.listens_for(engine, "connect")
 def receive_connect(dbapi_conn, connection_record):
     """Log database connections."""
     logger.info("Database connection established")
 
 
-@event.listens_for(engine, "close")
 def receive_close(dbapi_conn, connection_record):
     """Log database disconnections."""
     logger.info("Database connection closed")
 
 
+engines = []
+
+
+def workload_engine(
+    url: str, workload: str, name: str, is_async: bool = False, connect_timeout: Optional[int] = None
+):
+    """Engine with its own pool, sized by the workload's db_<workload>_* settings."""
+    pool_class = AsyncAdaptedQueuePool if is_async else QueuePool
+    connect_args = {}
+    if connect_timeout:
+        # pool_timeout only bounds waits for the pool; this bounds the TCP connect
+        connect_args = {"timeout": connect_timeout} if is_async else {"connect_timeout": connect_timeout}
+    engine = (create_async_engine if is_async else create_engine)(
+        async_database_url(url) if is_async else sync_database_url(url),
+        poolclass=timed_pool_class(pool_class, name),  # Checkout wait metrics
+        pool_size=getattr(settings, f"db_{workload}_pool_size"),
+        max_overflow=getattr(settings, f"db_{workload}_max_overflow"),
+        pool_timeout=getattr(settings, f"db_{workload}_pool_timeout"),
+        pool_pre_ping=True,  # Check connection health before using
+        pool_recycle=3600,  # Recycle connections after 1 hour
+        echo=False,  # Don't log SQL (use SQLAlchemy logger instead)
+        connect_args=connect_args,
+    )
+    sync_engine = engine.sync_engine if is_async else engine
+    event.listen(sync_engine, "connect", receive_connect)
+    event.listen(sync_engine, "close", receive_close)
+    pool_collector.add(name, engine)
+    engines.append(engine)
+    return engine
+
+
+# Primary: writes from the API (sync) and imports / embedding writes (async)
+engine = workload_engine(settings.database_url, "writes", "writes")
+async_engine = workload_engine(settings.database_url, "ingestion", "ingestion", is_async=True)
+
+# Reads on the primary: the only read pools without a replica, the fallback with one
+catalog_engine = workload_engine(settings.database_url, "catalog", "catalog")
+generation_engine = workload_engine(settings.database_url, "generation", "generation", is_async=True)
+
+# Reads on the replica (pools open no connections until used)
+replica_catalog_engine = replica_generation_engine = None
+if settings.database_replica_url:
+    replica_catalog_engine = workload_engine(
+        settings.database_replica_url, "catalog", "catalog_replica",
+        connect_timeout=settings.database_replica_connect_timeout,
+    )
+    replica_generation_engine = workload_engine(
+        settings.database_replica_url, "generation", "generation_replica", is_async=True,
+        connect_timeout=settings.database_replica_connect_timeout,
+    )
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+# Bound per session by the replica router
+ReadSession = sessionmaker(autocommit=False, autoflush=False)
+AsyncReadSession = async_sessionmaker(class_=AsyncSession, autoflush=False, expire_on_commit=False)
+Base = declarative_base()
+
+
+class ReplicaRouter:
+    """Chooses the replica or the primary for each read session."""
+
+    def __init__(self, configured: bool, max_lag: float, retry_seconds: float):
+        self.configured = configured
+        self.max_lag = max_lag
+        self.retry_seconds = retry_seconds
+        self.down_until = 0.0
+
+    def is_down(self) -> bool:
+        return time.monotonic() < self.down_until
+
+    def use_replica(self) -> bool:
+        return (
+            self.configured
+            and not self.is_down()
+            # Read-your-writes: the replica may not have this process's last write yet
+            and not catalog_version.changed_within(self.max_lag)
+        )
+
+    def mark_down(self, error: BaseException):
+        """Send reads to the primary for retry_seconds after a replica connection error."""
+        if not self.is_down():
+            logger.warning(
+                "Replica unavailable, reading from the primary for %.0fs: %s", self.retry_seconds, error
+            )
+        self.down_until = time.monotonic() + self.retry_seconds
+        db_replica_failures.inc()
+
+    def bind(self, workload: str, primary, replica):
+        target = "replica" if self.use_replica() else "primary"
+        db_read_routes.labels(workload, target).inc()
+        return replica if target == "replica" else primary
+
+
+replica_router = ReplicaRouter(
+    configured=bool(settings.database_replica_url),
+    max_lag=settings.database_replica_max_lag,
+    retry_seconds=settings.database_replica_retry_seconds,
+)
+
+
+def read_session():
+    """Session for catalog reads (replica when available)."""
+    db = ReadSession(bind=replica_router.bind("catalog", catalog_engine, replica_catalog_engine))
+    if db.bind is replica_catalog_engine:
+        try:
+            db.connection()
+        except Exception:
+            db.close()
+            if not replica_router.is_down():  # Not a connection failure (e.g. pool timeout)
+                raise
+            return ReadSession(bind=catalog_engine)
+    return db
+
+
+@asynccontextmanager
+async def generation_session():
+    """Async session for generation reads: retrieval, fallback ideas, snapshot loads."""
+    db = AsyncReadSession(
+        bind=replica_router.bind("generation", generation_engine, replica_generation_engine)
+    )
+    try:
+        if db.bind is replica_generation_engine:
+            try:
+                await db.connection()
+            except Exception:
+                await db.close()
+                if not replica_router.is_down():
+                    raise
+                db = AsyncReadSession(bind=generation_engine)
+        yield db
+    finally:
+        await db.close()
+
+
+def connect_replica(dialect, conn_rec, cargs, cparams):
+    """Connect to the replica; a failure takes it out of rotation."""
+    try:
+        return dialect.connect(*cargs, **cparams)
+    except Exception as e:
+        replica_router.mark_down(e)
+        raise
+
+
+def receive_replica_error(context):
+    """A dropped replica connection takes the replica out of rotation."""
+    # Pre-ping failures are stale pooled connections; the pool reconnects
+    if context.is_disconnect and not context.is_pre_ping:
+        replica_router.mark_down(context.original_exception)
+
+
+for replica in (replica_catalog_engine, replica_generation_engine):
+    if replica is not None:
+        replica = getattr(replica, "sync_engine", replica)
+        event.listen(replica, "do_connect", connect_replica)
+        event.listen(replica, "handle_error", receive_replica_error)
+
+
+async def dispose_engines():
+    """Close every pool (on shutdown)."""
+    for engine_ in engines:
+        if isinstance(engine_, AsyncEngine):
+            await engine_.dispose()
+        else:
+            engine_.dispose()
+
+
 def get_db():
-    """Dependency for database sessions with error handling."""
+    """Dependency for database sessions with error handling. Writes: always the primary."""
     db = SessionLocal()
     try:
         yield db
     except SQLAlchemyError as e:
-        logger.error(f"Database error: {str(e)}")
+        logger.error("Database error: %s", e)
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def get_read_db():
+    """Dependency for read-only catalog endpoints: replica when available."""
+    db = read_session()
+    try:
+        yield db
+    except SQLAlchemyError as e:
+        logger.error("Database error: %s", e)
         db.rollback()
         raise
     finally:
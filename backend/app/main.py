@@ -1,14 +1,20 @@
-from fastapi import FastAPI, Request, status
+from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.exc import SQLAlchemyError
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+import asyncio
 import time
 
 from app.api import ideas, generate
 from app.config import get_settings
-from app.logging_config import setup_logging, get_logger
-from app.database import engine
+from app.logging_config import get_logger, sample_request_log, setup_logging, stop_logging
+from app.database import dispose_engines, engine
+from app.metrics import observe_request
+from app.tracing import MemoryExporter, current_trace_id, get_tracer
+from app.services.catalog_snapshot import catalog_snapshot, reload_periodically
+from app.services.generation_jobs import generation_jobs
 
 # Setup logging on startup
 setup_logging()
@@ -36,27 +42,55 @@ app.add_middleware(
 # Request logging middleware
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    """Log all requests with timing."""
+    """Log requests with timing and record their latency metric.
+
+    Each request runs in a root trace span (continuing an incoming
+    `traceparent`), so its log lines carry the trace id; the id is returned
+    in the X-Trace-Id header. Successful requests are logged at
+    settings.log_request_sample_rate; errors and slow requests always.
+    """
     start_time = time.time()
-    
-    logger.info(f"Request: {request.method} {request.url.path}")
-    
-    try:
-        response = await call_next(request)
-        process_time = time.time() - start_time
-        logger.info(f"Completed: {request.method} {request.url.path} - {response.status_code} - {process_time:.3f}s")
-        return response
-    except Exception as e:
-        process_time = time.time() - start_time
-        logger.error(f"Error: {request.method} {request.url.path} - {str(e)} - {process_time:.3f}s")
-        raise
+    attributes = {"http.method": request.method, "http.target": request.url.path}
+
+    with get_tracer().start_as_current_span(
+        "http.request", attributes, traceparent=request.headers.get("traceparent")
+    ) as span:
+        logger.debug("Request: %s %s", request.method, request.url.path)
+
+        try:
+            response = await call_next(request)
+            process_time = time.time() - start_time
+            if sample_request_log(response.status_code, process_time):
+                logger.info(
+                    "Completed: %s %s - %d - %.3fs",
+                    request.method, request.url.path, response.status_code, process_time,
+                    extra={
+                        "method": request.method,
+                        "path": request.url.path,
+                        "status": response.status_code,
+                        "duration_ms": round(process_time * 1000, 1),
+                    },
+                )
+            observe_request(request.method, request.scope, response.status_code, process_time)
+            route = request.scope.get("route")
+            span.set_attribute("http.route", route.path if route is not None else "unmatched")
+            span.set_attribute("http.status_code", response.status_code)
+            trace_id = current_trace_id()
+            if trace_id:
+                response.headers["X-Trace-Id"] = trace_id
+            return response
+        except Exception as e:
+            process_time = time.time() - start_time
+            observe_request(request.method, request.scope, 500, process_time)
+            logger.error("Error: %s %s - %s - %.3fs", request.method, request.url.path, e, process_time)
+            raise
 
 
 # Global exception handlers
 @app.exception_handler(SQLAlchemyError)
 async def database_exception_handler(request: Request, exc: SQLAlchemyError):
     """Handle database errors."""
-    logger.error(f"Database error on {request.url.path}: {str(exc)}")
+    logger.error("Database error on %s: %s", request.url.path, exc)
     return JSONResponse(
         status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
         content={"detail": "Database error. Try again later."}
@@ -66,7 +100,7 @@ async def database_exception_handler(request: Request, exc: SQLAlchemyError):
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     """Handle validation errors."""
-    logger.warning(f"Validation error on {request.url.path}: {exc.errors()}")
+    logger.warning("Validation error on %s: %s", request.url.path, exc.errors())
     return JSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         content={"detail": exc.errors()}
@@ -76,7 +110,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
     """Catch-all for unexpected errors."""
-    logger.error(f"Unexpected error on {request.url.path}: {str(exc)}", exc_info=True)
+    logger.error("Unexpected error on %s: %s", request.url.path, exc, exc_info=True)
     return JSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={"detail": "Internal server error"}
@@ -86,16 +120,34 @@ async def general_exception_handler(request: Request, exc: Exception):
 # Startup/shutdown events
 @app.on_event("startup")
 async def startup_event():
-    """Log startup."""
-    logger.info(f"Starting Binko.ai API - Environment: {settings.environment}")
-    logger.info(f"CORS origins: {origins}")
+    """Log startup, load the catalog snapshot and start the generation job workers."""
+    logger.info("Starting Binko.ai API - Environment: %s", settings.environment)
+    logger.info("CORS origins: %s", origins)
+
+    if settings.catalog_source == "snapshot":
+        try:
+            await catalog_snapshot.load()
+        except Exception as e:
+            # Retrieval falls back to SQL until a reload succeeds
+            logger.error("Catalog snapshot load failed: %s", e)
+        if settings.catalog_snapshot_reload_seconds > 0:
+            app.state.snapshot_reloader = asyncio.create_task(
+                reload_periodically(settings.catalog_snapshot_reload_seconds)
+            )
+
+    generation_jobs.start()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown."""
     logger.info("Shutting down Binko.ai API")
-    engine.dispose()
+    await generation_jobs.stop()
+    reloader = getattr(app.state, "snapshot_reloader", None)
+    if reloader is not None:
+        reloader.cancel()
+    await dispose_engines()
+    stop_logging()
 
 
 # Routes
@@ -109,6 +161,34 @@ def root():
     return {"status": "ok", "service": "binko.ai", "version": "1.0.0"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint (not proxied by nginx)."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+def memory_exporter() -> MemoryExporter:
+    exporter = get_tracer().exporter
+    if not isinstance(exporter, MemoryExporter):
+        raise HTTPException(status_code=404, detail="Traces are kept only with tracing_exporter=memory")
+    return exporter
+
+
+@app.get("/traces", include_in_schema=False)
+def recent_traces(limit: int = 20):
+    """Most recent traces in the in-memory exporter (not proxied by nginx)."""
+    return memory_exporter().recent_traces(limit)
+
+
+@app.get("/traces/{trace_id}", include_in_schema=False)
+def get_trace(trace_id: str):
+    """All kept spans of one trace, in start order."""
+    spans = memory_exporter().get_trace(trace_id)
+    if not spans:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return spans
+
+
 @app.get("/health")
 def health_check():
     """Health check endpoint for monitoring."""
@@ -124,7 +204,7 @@ def health_check():
             "environment": settings.environment
         }
     except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
+        logger.error("Health check failed: %s", e)
         return JSONResponse(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             content={
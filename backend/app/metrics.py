@@ -0,0 +1,217 @@
+"""
+Prometheus metrics for HTTP requests, database pools and LLM calls.
+
+Metrics are module-level singletons in the default registry and are served
+by GET /metrics. Labels are kept to small fixed sets (route templates, error
+class names, reason codes) so series counts stay bounded, and every update
+is a lock-protected increment, cheap enough to leave on under load.
+"""
+import asyncio
+import time
+from typing import Optional
+
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram, disable_created_metrics
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+# No *_created series: they double the scrape size and dashboards do not use them
+disable_created_metrics()
+
+LLM_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+
+# HTTP
+http_request_duration = Histogram(
+    "binko_http_request_duration_seconds",
+    "Time to response start, by route template and status",
+    ["method", "route", "status"],
+)
+
+# LLM calls
+llm_request_duration = Histogram(
+    "binko_llm_request_duration_seconds",
+    "OpenAI call latency",
+    ["operation", "outcome"],
+    buckets=LLM_BUCKETS,
+)
+llm_errors = Counter(
+    "binko_llm_errors_total", "Failed OpenAI calls by exception class", ["operation", "error"]
+)
+llm_retries = Counter(
+    "binko_llm_retries_total", "OpenAI calls made after the first attempt", ["operation"]
+)
+llm_tokens = Counter(
+    "binko_llm_tokens_total", "Tokens reported by OpenAI usage", ["operation", "kind"]
+)
+
+# OpenAI limiters (see services/llm_limiter), labelled "chat" or "embeddings"
+limiter_queue_depth = Gauge("binko_llm_limiter_queue_depth", "Calls waiting for an OpenAI slot", ["limiter"])
+limiter_in_flight = Gauge("binko_llm_limiter_in_flight", "OpenAI calls holding a slot", ["limiter"])
+limiter_wait = Histogram(
+    "binko_llm_limiter_wait_seconds",
+    "Time admitted calls waited for a slot",
+    ["limiter"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60),
+)
+limiter_rejections = Counter(
+    "binko_llm_limiter_rejections_total", "Calls refused by the limiter", ["limiter", "reason"]
+)
+limiter_cooldowns = Counter(
+    "binko_llm_limiter_cooldowns_total",
+    "Pauses after OpenAI rate limit responses or exhausted quota headers",
+    ["limiter"],
+)
+
+# Generation jobs (see services/generation_jobs)
+generation_job_queue_depth = Gauge("binko_generation_job_queue_depth", "Generation jobs waiting for a worker")
+generation_jobs_running = Gauge("binko_generation_jobs_running", "Generation jobs being run by a worker")
+generation_job_wait = Histogram(
+    "binko_generation_job_wait_seconds",
+    "Time generation jobs waited for a worker",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300),
+)
+generation_job_outcomes = Counter(
+    "binko_generation_jobs_total", "Generation job submissions and results", ["outcome"]
+)
+
+# Generation outcomes
+validation_rejections = Counter(
+    "binko_validation_rejections_total", "Generated ideas rejected, by reason", ["reason"]
+)
+fallback_activations = Counter(
+    "binko_fallback_activations_total", "Generations topped up with fallback ideas", ["path"]
+)
+
+# Logging
+log_records_dropped = Counter(
+    "binko_log_records_dropped_total", "Log records dropped because the writer queue was full"
+)
+
+# Database pools
+pool_checkouts = Counter(
+    "binko_db_pool_checkouts_total", "Connections checked out of the pool", ["pool"]
+)
+pool_wait = Histogram(
+    "binko_db_pool_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ["pool"],
+    buckets=POOL_WAIT_BUCKETS,
+)
+pool_timeouts = Counter(
+    "binko_db_pool_timeouts_total", "Checkouts that gave up after pool_timeout", ["pool"]
+)
+db_read_routes = Counter(
+    "binko_db_read_routes_total", "Read sessions by workload and database", ["workload", "target"]
+)
+db_replica_failures = Counter(
+    "binko_db_replica_failures_total", "Replica connection errors that moved reads to the primary"
+)
+
+
+def observe_request(method: str, scope: dict, status: int, seconds: float):
+    """Record one HTTP request. Unmatched paths share one series."""
+    route = scope.get("route")
+    path = route.path if route is not None else "unmatched"
+    http_request_duration.labels(method, path, str(status)).observe(seconds)
+
+
+class LLMCall:
+    """Times one OpenAI call: `with LLMCall("generate") as call: ...`.
+
+    An exception leaving the block is counted under its class name; a
+    cancelled call (a fan-out straggler, a stream whose client left) is only timed. Calls that
+    cannot be wrapped in a block (streams) call finish() themselves.
+    """
+
+    __slots__ = ("operation", "start")
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.start = time.perf_counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish(exc)
+        return False
+
+    def finish(self, error: Optional[BaseException] = None):
+        if error is None:
+            outcome = "ok"
+        elif isinstance(error, (asyncio.CancelledError, GeneratorExit)):
+            outcome = "cancelled"
+        else:
+            outcome = "error"
+            llm_errors.labels(self.operation, type(error).__name__).inc()
+        llm_request_duration.labels(self.operation, outcome).observe(time.perf_counter() - self.start)
+
+    def usage(self, usage):
+        """Count tokens from a response's `usage` (may be None)."""
+        if usage is not None:
+            llm_tokens.labels(self.operation, "prompt").inc(usage.prompt_tokens or 0)
+            # Embedding responses report prompt tokens only
+            completion = getattr(usage, "completion_tokens", None)
+            if completion:
+                llm_tokens.labels(self.operation, "completion").inc(completion)
+
+
+def timed_pool_class(base: type, name: str) -> type:
+    """Subclass of a QueuePool class that records checkout counts and wait time.
+
+    Pass as `poolclass` to create_engine; `recreate()` (engine.dispose) keeps
+    the subclass, so the label survives pool resets.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = base._do_get(self)
+        except PoolTimeoutError:
+            pool_timeouts.labels(name).inc()
+            raise
+        finally:
+            pool_wait.labels(name).observe(time.perf_counter() - start)
+        pool_checkouts.labels(name).inc()
+        return connection
+
+    return type(f"Timed{base.__name__}", (base,), {"_do_get": _do_get})
+
+
+class PoolCollector:
+    """Pool occupancy read from the engines at scrape time."""
+
+    def __init__(self):
+        self.engines = {}
+
+    def add(self, name: str, engine):
+        self.engines[name] = engine
+
+    def collect(self):
+        size = GaugeMetricFamily("binko_db_pool_size", "Configured pool size", labels=["pool"])
+        checked_out = GaugeMetricFamily(
+            "binko_db_pool_checked_out", "Connections currently in use", labels=["pool"]
+        )
+        idle = GaugeMetricFamily("binko_db_pool_idle", "Open connections waiting in the pool", labels=["pool"])
+        overflow = GaugeMetricFamily(
+            "binko_db_pool_overflow", "Connections open beyond pool_size", labels=["pool"]
+        )
+        saturation = GaugeMetricFamily(
+            "binko_db_pool_saturation",
+            "Connections in use over pool_size + max_overflow (1 = checkouts wait)",
+            labels=["pool"],
+        )
+        for name, engine in self.engines.items():
+            pool = engine.pool
+            size.add_metric([name], pool.size())
+            checked_out.add_metric([name], pool.checkedout())
+            idle.add_metric([name], pool.checkedin())
+            # QueuePool counts overflow from -pool_size until the pool is full
+            overflow.add_metric([name], max(pool.overflow(), 0))
+            capacity = pool.size() + max(pool._max_overflow, 0)
+            saturation.add_metric([name], pool.checkedout() / capacity if capacity else 0.0)
+        yield from (size, checked_out, idle, overflow, saturation)
+
+
+pool_collector = PoolCollector()
+REGISTRY.register(pool_collector)
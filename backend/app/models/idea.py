@@ -1,8 +1,32 @@
-from sqlalchemy import Column, String, Text, Float, ARRAY
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Text, Float, Index, DateTime, func
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from pgvector.sqlalchemy import Vector
+import hashlib
+import re
 import uuid
+from app.config import get_settings
 from app.database import Base
 
+settings = get_settings()
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def content_fingerprint(title: str, summary: str, source_video_id=None) -> str:
+    """Natural key of an idea: normalized title and summary plus its source video.
+
+    Case, punctuation and whitespace differences do not change the fingerprint,
+    so re-extracted copies of the same idea collide.
+    """
+    normalized = [" ".join(WORD_PATTERN.findall((text or "").lower())) for text in (title, summary)]
+    payload = "\n".join([*normalized, source_video_id or ""])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def fingerprint_default(context) -> str:
+    params = context.get_current_parameters()
+    return content_fingerprint(params["title"], params["summary"], params.get("source_video_id"))
+
 
 class Idea(Base):
     __tablename__ = "ideas"
@@ -40,3 +64,32 @@ class Idea(Base):
     source_video_id = Column(String(50))
     source_channel = Column(String(255))
     confidence = Column(Float)
+
+    # Timestamps
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+    updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
+
+    # Retrieval
+    embedding = Column(Vector(settings.embedding_dim))  # Unit-length, cosine distance
+    content_hash = Column(String(64))  # sha256 of embedded text + embedder
+
+    # Dedup: upserts conflict on this (see app/services/dedup.py)
+    fingerprint = Column(String(64), default=fingerprint_default)
+
+    # Kept in sync with alembic/versions; tests/test_query_plans.py checks each is used
+    __table_args__ = (
+        Index("idx_ideas_created_id", created_at.desc(), id.desc()),
+        Index("idx_ideas_niche_created", niche, created_at.desc(), id.desc()),
+        Index("idx_ideas_niche_type_difficulty", niche, idea_type, difficulty),
+        Index("idx_ideas_skill_terms", func.idea_skill_terms(skills, tech_stack), postgresql_using="gin"),
+        Index("ix_ideas_content_hash", content_hash),
+        Index("ux_ideas_fingerprint", fingerprint, unique=True),
+        # Approximate nearest-neighbour index for semantic retrieval
+        Index(
+            "idx_ideas_embedding",
+            embedding,
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        ),
+    )
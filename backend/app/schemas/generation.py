@@ -1,3 +1,4 @@
+from datetime import datetime
 from pydantic import BaseModel
 from typing import Optional
 from uuid import UUID
@@ -6,6 +7,8 @@ from uuid import UUID
 class GenerationRequest(BaseModel):
     profile: "UserProfile"
     num_ideas: int = 3
+    use_cache: bool = True  # False: neither read nor store a cached result
+    refresh: bool = False  # True: skip the cached result and replace it
 
     class Config:
         from_attributes = True
@@ -25,5 +28,16 @@ class GenerationResponse(BaseModel):
     profile_summary: str
 
 
+class GenerationJob(BaseModel):
+    job_id: str
+    status: str  # queued | running | done | failed
+    deduplicated: bool = False  # True: an identical queued or running job was returned
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[GenerationResponse] = None
+    error: Optional[str] = None
+
+
 from app.schemas.profile import UserProfile
 GenerationRequest.model_rebuild()
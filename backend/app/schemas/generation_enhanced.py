@@ -9,6 +9,8 @@ from uuid import UUID
 class GenerationRequest(BaseModel):
     profile: "UserProfile"
     num_ideas: int = Field(default=3, ge=1, le=10, description="Number of ideas to generate")
+    use_cache: bool = Field(default=True, description="Read and store cached results")
+    refresh: bool = Field(default=False, description="Skip the cached result and replace it")
 
     class Config:
         from_attributes = True
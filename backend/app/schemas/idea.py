@@ -2,6 +2,13 @@ from pydantic import BaseModel
 from typing import Optional
 from uuid import UUID
 
+# Fields of GET /api/ideas?view=summary: everything a list card shows, without
+# the long text and array columns (description, monetization, key_features, ...)
+SUMMARY_FIELDS = (
+    "id", "title", "summary", "idea_type", "business_model", "difficulty",
+    "time_to_mvp", "startup_cost", "niche", "competition", "skills", "tech_stack",
+)
+
 
 class IdeaCreate(BaseModel):
     title: str
@@ -36,3 +43,5 @@ class IdeaResponse(IdeaCreate):
 class IdeaList(BaseModel):
     ideas: list[IdeaResponse]
     total: int
+    total_is_estimate: bool = False
+    next_cursor: Optional[str] = None  # Pass as ?cursor= for the next page; None on the last page
@@ -0,0 +1,70 @@
+"""
+Catalog-wide state shared by caches of idea data.
+"""
+import secrets
+import threading
+import time
+from typing import Optional
+
+
+class CatalogVersion:
+    """Monotonic counter bumped on every write to the ideas table."""
+
+    def __init__(self):
+        self.value = 0
+        self.changed_at = float("-inf")  # time.monotonic() of the last bump
+        self.epoch = secrets.token_hex(4)  # Tells this process's versions from other processes'
+        self._lock = threading.Lock()
+
+    def tag(self, window: int) -> str:
+        """ETag prefix for catalog reads: process, version and `window`-second time slot.
+
+        Writes this process did not make (other workers, psql) do not bump the
+        version; the time slot bounds how long such tags keep matching.
+        """
+        return f"{self.epoch}.{self.value}.{int(time.time() // window):x}"
+
+    def bump(self) -> int:
+        # Sync endpoints run in the threadpool, so increments need the lock
+        with self._lock:
+            self.value += 1
+            self.changed_at = time.monotonic()
+            return self.value
+
+    def changed_within(self, seconds: float) -> bool:
+        """Whether this process wrote to the catalog in the last `seconds`."""
+        return time.monotonic() - self.changed_at < seconds
+
+
+catalog_version = CatalogVersion()
+
+
+class CountCache:
+    """Row counts per filter combination, valid for one catalog version.
+
+    The TTL bounds staleness from writes made by other worker processes,
+    which do not bump this process's catalog version.
+    """
+
+    def __init__(self, ttl: int, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: dict[tuple, tuple[int, float, int]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> Optional[int]:
+        entry = self.entries.get(key)
+        if entry is not None:
+            version, expires_at, total = entry
+            if version == catalog_version.value and expires_at > time.monotonic():
+                self.hits += 1
+                return total
+        self.misses += 1
+        return None
+
+    def set(self, key: tuple, total: int, version: int):
+        """Store a count computed at `version` (read before running the query)."""
+        if len(self.entries) >= self.max_entries:
+            self.entries.clear()
+        self.entries[key] = (version, time.monotonic() + self.ttl, total)
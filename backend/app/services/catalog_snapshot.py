@@ -0,0 +1,364 @@
+"""
+In-memory snapshot of the idea catalog for retrieval without a DB round trip.
+
+Only the columns used by retrieval, prompts and fallbacks are kept, as
+slotted records with interned classification strings. Inverted indexes map
+niche, type, difficulty and skill to record positions; for lookups they are
+turned into bitsets (Python ints, one bit per position), so filtering and
+skill-overlap ranking are a handful of whole-catalog AND/OR operations. The
+snapshot is loaded at startup, updated in place by this process's writes,
+and fully reloaded on a timer to pick up writes made by other workers.
+
+Lookups and writes only run on the event loop that loaded the snapshot
+(writes from worker threads are handed to it), so they need no lock. A
+reload builds the new records and indexes in a worker thread and swaps
+them in with no await in between.
+"""
+import asyncio
+import sys
+import time
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import select
+
+from app.config import get_settings
+from app.database import generation_session
+from app.logging_config import get_logger
+from app.models.idea import Idea
+from app.schemas.profile import UserProfile
+from app.services.catalog import catalog_version
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+INDEXED_FIELDS = ("niche", "idea_type", "difficulty")
+EMPTY = frozenset()
+
+
+def bitset(positions) -> int:
+    """Int with bit `p` set for every position p."""
+    if not positions:
+        return 0
+    buffer = bytearray(max(positions) // 8 + 1)
+    for position in positions:
+        buffer[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def take_newest(bits: int, selected: list[int], limit: int):
+    """Append set positions of `bits` to `selected`, highest (newest) first."""
+    while bits and len(selected) < limit:
+        position = bits.bit_length() - 1
+        selected.append(position)
+        bits ^= 1 << position
+
+
+def intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value is not None else None
+
+
+class IdeaRecord:
+    """Read-only subset of an Idea row; duck-types as Idea for prompts and fallbacks."""
+
+    __slots__ = (
+        "id", "title", "summary", "idea_type", "business_model",
+        "skills", "tech_stack", "difficulty", "niche", "updated_at",
+    )
+
+    def __init__(self, id, title, summary, idea_type, business_model,
+                 skills, tech_stack, difficulty, niche, updated_at=None):
+        self.id = id
+        self.title = title
+        self.summary = summary
+        self.idea_type = intern(idea_type)
+        self.business_model = intern(business_model)
+        self.skills = tuple(intern(skill) for skill in skills or ())
+        self.tech_stack = tuple(intern(tech) for tech in tech_stack or ())
+        self.difficulty = intern(difficulty)
+        self.niche = intern(niche)
+        self.updated_at = updated_at  # Row version, keys cached prompt fragments
+
+    @classmethod
+    def from_idea(cls, idea) -> "IdeaRecord":
+        """Record from an ORM row (or any object with the same attributes)."""
+        return cls(*(getattr(idea, field) for field in cls.__slots__))
+
+
+SNAPSHOT_COLUMNS = [getattr(Idea, field) for field in IdeaRecord.__slots__]
+LOAD_CHUNK_ROWS = 1000  # Rows fetched per await while loading
+
+
+def on_loop(loop: asyncio.AbstractEventLoop) -> bool:
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
+
+
+def record_skill_terms(record) -> set[str]:
+    """Lowercased skills and tech stack of an idea, the terms ranking matches on."""
+    return {term.lower() for term in (*(record.skills or ()), *(record.tech_stack or ()))}
+
+
+def profile_skill_terms(profile: UserProfile) -> set[str]:
+    """Lowercased technical skills; validate_skill_match checks ideas against these."""
+    return {skill.strip().lower() for skill in profile.technical_skills if skill.strip()}
+
+
+def allowed_difficulties(profile: UserProfile) -> Optional[list[str]]:
+    """Difficulties a profile may see, or None for no restriction.
+
+    Same as apply_profile_filters; like SQL `IN`, a NULL difficulty never matches.
+    """
+    if profile.experience_level == "beginner":
+        return ["beginner"]
+    if profile.experience_level == "intermediate":
+        return ["beginner", "intermediate"]
+    return None
+
+
+class CatalogSnapshot:
+    """Records in load order plus inverted indexes over their positions."""
+
+    def __init__(self):
+        self.records: list[Optional[IdeaRecord]] = []  # None marks a deleted slot
+        self.positions: dict[UUID, int] = {}
+        # field -> value -> positions. "skill": lowercased skill/tech term,
+        # "size": number of distinct skill terms (ranking tie-break)
+        self.indexes: dict[str, dict] = {field: {} for field in (*INDEXED_FIELDS, "skill", "size")}
+        self.bitsets: dict[tuple, int] = {}  # Built on demand, dropped on every write
+        self.loaded = False
+        self.version = None  # catalog_version.value the snapshot reflects
+        self.loaded_at = None
+        self.load_seconds = 0.0
+        self.loading = False
+        self.pending: list[tuple[list[IdeaRecord], list[UUID]]] = []  # Writes seen during a load
+        self.stats = {"lookups": 0, "upserts": 0, "deletes": 0, "reloads": 0}
+        self.memory: dict = {}  # memory_report() as of the last load
+        self.loop: Optional[asyncio.AbstractEventLoop] = None  # Owner of the snapshot's state
+
+    @property
+    def usable(self) -> bool:
+        return self.loaded and settings.catalog_source == "snapshot"
+
+    @classmethod
+    def build(cls, rows) -> "CatalogSnapshot":
+        """Records and indexes for SNAPSHOT_COLUMNS rows (run in a worker thread)."""
+        fresh = cls()
+        for row in rows:
+            fresh._insert(IdeaRecord(*row))
+        fresh.memory = fresh.memory_report()
+        return fresh
+
+    async def load(self):
+        """Replace the snapshot with the current table contents."""
+        self.loop = asyncio.get_running_loop()
+        self.loading = True
+        self.pending = []
+        start = time.perf_counter()
+
+        try:
+            rows = []
+            async with generation_session() as db:
+                result = await db.stream(select(*SNAPSHOT_COLUMNS).order_by(Idea.created_at, Idea.id))
+                async for chunk in result.partitions(LOAD_CHUNK_ROWS):
+                    rows.extend(chunk)
+            fresh = await asyncio.to_thread(CatalogSnapshot.build, rows)
+        except Exception:
+            self.loading = False
+            self.pending = []
+            raise
+
+        # No await from here on: lookups and writes see the old or the new snapshot
+        self.records = fresh.records
+        self.positions = fresh.positions
+        self.indexes = fresh.indexes
+        self.bitsets = {}
+        self.memory = fresh.memory
+        # Writes committed while the query ran may be missing from its result
+        for upserted, deleted in self.pending:
+            self._apply(upserted, deleted)
+        self.pending = []
+        self.loading = False
+        self.loaded = True
+        self.version = catalog_version.value
+        self.loaded_at = time.time()
+        self.load_seconds = time.perf_counter() - start
+        self.stats["reloads"] += 1
+
+        logger.info("Catalog snapshot loaded: %d ideas in %.3fs", len(rows), self.load_seconds)
+
+    def apply(self, upserted: list[IdeaRecord] = (), deleted: list[UUID] = ()):
+        """Apply this process's committed writes. Call after catalog_version.bump(), from any thread."""
+        write = (list(upserted), list(deleted))
+        if self.loop is not None and not self.loop.is_closed() and not on_loop(self.loop):
+            self.loop.call_soon_threadsafe(self._write, *write)
+        else:
+            self._write(*write)
+
+    def _write(self, upserted: list[IdeaRecord], deleted: list[UUID]):
+        if self.loading:
+            self.pending.append((upserted, deleted))
+        if self.loaded:
+            self._apply(upserted, deleted)
+            self.version = catalog_version.value
+
+    def match(self, profile: UserProfile, limit: int) -> list[IdeaRecord]:
+        """Top `limit` ideas passing the same filters as apply_profile_filters.
+
+        Ideas are ranked by how many of the profile's technical skills appear
+        in their skills/tech stack (ties: fewer skills overall, then newest),
+        mirroring the 50% overlap check generated ideas must pass. If fewer than
+        `limit` ideas overlap, the rest are the newest unranked matches.
+        """
+        filters = [
+            ("difficulty", allowed_difficulties(profile)),
+            ("niche", profile.preferred_niches or None),
+            ("idea_type", profile.preferred_types or None),
+        ]
+        skills = sorted(profile_skill_terms(profile))
+
+        self.stats["lookups"] += 1
+        mask = self._bitset(("live",))
+        for field, values in filters:
+            if values is not None:
+                allowed = 0
+                for value in values:
+                    allowed |= self._bitset((field, value))
+                mask &= allowed
+
+        selected = []
+        if skills and mask:
+            # at_least[j]: ideas matching at least j profile skills (bit-sliced counting)
+            at_least = [mask] + [0] * len(skills)
+            for skill in skills:
+                bits = self._bitset(("skill", skill))
+                for j in range(len(skills), 0, -1):
+                    at_least[j] |= at_least[j - 1] & bits
+            at_least.append(0)
+
+            sizes = sorted(self.indexes["size"])
+            for j in range(len(skills), 0, -1):
+                exact = at_least[j] & ~at_least[j + 1]
+                for size in sizes:
+                    if not exact or len(selected) >= limit:
+                        break
+                    take_newest(exact & self._bitset(("size", size)), selected, limit)
+                    exact &= ~self._bitset(("size", size))
+            mask &= ~at_least[1]
+
+        take_newest(mask, selected, limit)
+        return [self.records[position] for position in selected]
+
+    def _bitset(self, key: tuple) -> int:
+        bits = self.bitsets.get(key)
+        if bits is None:
+            if key == ("live",):
+                bits = bitset(self.positions.values())
+            else:
+                field, value = key
+                bits = bitset(self.indexes[field].get(value, EMPTY))
+            self.bitsets[key] = bits
+        return bits
+
+    def _apply(self, upserted, deleted):
+        self.bitsets = {}
+        for record in upserted:
+            position = self.positions.get(record.id)
+            if position is not None:
+                self._unindex(position)
+                self.records[position] = record
+                self._index(position)
+            else:
+                self._insert(record)
+            self.stats["upserts"] += 1
+
+        for idea_id in deleted:
+            position = self.positions.pop(idea_id, None)
+            if position is not None:
+                self._unindex(position)
+                self.records[position] = None
+                self.stats["deletes"] += 1
+
+    def _insert(self, record: IdeaRecord):
+        self.positions[record.id] = len(self.records)
+        self.records.append(record)
+        self._index(len(self.records) - 1)
+
+    def _index_keys(self, record: IdeaRecord) -> list[tuple]:
+        keys = [(field, getattr(record, field)) for field in INDEXED_FIELDS]
+        terms = record_skill_terms(record)
+        keys += [("skill", sys.intern(term)) for term in terms]
+        keys.append(("size", len(terms)))
+        return [(field, value) for field, value in keys if value is not None]
+
+    def _index(self, position: int):
+        for field, value in self._index_keys(self.records[position]):
+            self.indexes[field].setdefault(value, set()).add(position)
+
+    def _unindex(self, position: int):
+        for field, value in self._index_keys(self.records[position]):
+            self.indexes[field][value].discard(position)
+
+    def memory_report(self) -> dict:
+        """Approximate memory held by records and indexes (shared strings counted once)."""
+        seen = set()
+
+        def size(obj) -> int:
+            if obj is None or id(obj) in seen:
+                return 0
+            seen.add(id(obj))
+            total = sys.getsizeof(obj)
+            if isinstance(obj, (tuple, list, set)):
+                total += sum(size(item) for item in obj)
+            return total
+
+        record_bytes = sys.getsizeof(self.records) + sys.getsizeof(self.positions)
+        for record in self.records:
+            if record is None:
+                continue
+            record_bytes += sys.getsizeof(record)
+            record_bytes += sum(size(getattr(record, field)) for field in IdeaRecord.__slots__)
+
+        index_bytes = 0
+        for index in self.indexes.values():
+            index_bytes += sys.getsizeof(index)
+            index_bytes += sum(size(key) + size(positions) for key, positions in index.items())
+        bitset_bytes = sum(sys.getsizeof(bits) for bits in self.bitsets.values())
+
+        live = len(self.positions)
+        return {
+            "records": live,
+            "deleted_slots": len(self.records) - live,
+            "record_bytes": record_bytes,
+            "index_bytes": index_bytes,
+            "bitset_bytes": bitset_bytes,  # Lookup cache, rebuilt after writes
+            "total_bytes": record_bytes + index_bytes + bitset_bytes,
+            "bytes_per_record": round((record_bytes + index_bytes + bitset_bytes) / live, 1) if live else 0.0,
+        }
+
+    def get_stats(self) -> dict:
+        return {
+            "source": settings.catalog_source,
+            "loaded": self.loaded,
+            "version": self.version,
+            "catalog_version": catalog_version.value,
+            "loaded_at": self.loaded_at,
+            "load_seconds": round(self.load_seconds, 3),
+            **self.stats,
+            "memory": self.memory,  # As of the last load
+        }
+
+
+catalog_snapshot = CatalogSnapshot()
+
+
+async def reload_periodically(interval: int):
+    """Reload the snapshot every `interval` seconds (picks up other workers' writes)."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await catalog_snapshot.load()
+        except Exception as e:
+            logger.error("Catalog snapshot reload failed, keeping previous snapshot: %s", e)
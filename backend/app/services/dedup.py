@@ -0,0 +1,160 @@
+"""
+Idempotent ingestion: content-fingerprint upserts and the dedup job.
+
+Every write path (single, bulk, streaming import) goes through
+INSERT ... ON CONFLICT (fingerprint). A re-imported idea updates the existing
+row only when some field changed, otherwise it is skipped, so re-running the
+extraction pipeline no longer adds duplicates.
+
+Run the dedup job for rows written before fingerprints existed (migration
+0003 runs a frozen copy of it once), or after changing the normalization:
+    python -m app.services.dedup
+"""
+from dataclasses import dataclass, field
+
+from sqlalchemy import bindparam, func, literal_column, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.logging_config import get_logger
+from app.models.idea import Idea, content_fingerprint
+from app.schemas.idea import IdeaCreate
+from app.services.catalog_snapshot import SNAPSHOT_COLUMNS, IdeaRecord
+
+logger = get_logger(__name__)
+
+UPSERT_COLUMNS = list(IdeaCreate.model_fields)
+
+
+@dataclass
+class UpsertResult:
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0  # Identical to a stored row, or repeated within the same batch
+    records: list[IdeaRecord] = field(default_factory=list)  # Inserted and updated rows
+
+    def add(self, other: "UpsertResult"):
+        self.inserted += other.inserted
+        self.updated += other.updated
+        self.skipped += other.skipped
+        self.records.extend(other.records)
+
+    def counts(self) -> dict:
+        return {"inserted": self.inserted, "updated": self.updated, "skipped": self.skipped}
+
+
+def fingerprint_of(idea: IdeaCreate) -> str:
+    return content_fingerprint(idea.title, idea.summary, idea.source_video_id)
+
+
+def unique_by_fingerprint(ideas: list[IdeaCreate]) -> dict[str, IdeaCreate]:
+    """Last occurrence wins; ON CONFLICT cannot touch one row twice in a statement."""
+    return {fingerprint_of(idea): idea for idea in ideas}
+
+
+def upsert_statement(stmt):
+    """Add the conflict clause and RETURNING to an `insert(Idea)` statement.
+
+    Conflicting rows are updated only if a field differs (so unchanged rows are
+    not rewritten), and their vectors are cleared for re-embedding. RETURNING
+    yields the snapshot columns plus `inserted` (xmax = 0 for new rows);
+    skipped rows return nothing.
+    """
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Idea.fingerprint],
+        set_={
+            **{name: excluded[name] for name in UPSERT_COLUMNS},
+            "embedding": None,
+            "content_hash": None,
+            "updated_at": func.now(),
+        },
+        where=tuple_(*(getattr(Idea, name) for name in UPSERT_COLUMNS)).is_distinct_from(
+            tuple_(*(excluded[name] for name in UPSERT_COLUMNS))
+        ),
+    )
+    return stmt.returning(*SNAPSHOT_COLUMNS, literal_column("(xmax = 0)").label("inserted"))
+
+
+def collect_result(rows, total: int) -> UpsertResult:
+    """Counts and snapshot records from upsert_statement's RETURNING rows."""
+    result = UpsertResult()
+    for row in rows:
+        if row.inserted:
+            result.inserted += 1
+        else:
+            result.updated += 1
+        result.records.append(IdeaRecord(*row[:-1]))
+    result.skipped = total - result.inserted - result.updated
+    return result
+
+
+def upsert_ideas(db: Session, ideas: list[IdeaCreate]) -> UpsertResult:
+    """Upsert ideas in one statement. The caller commits."""
+    unique = unique_by_fingerprint(ideas)
+    stmt = insert(Idea).values([
+        {**idea.model_dump(), "fingerprint": fingerprint}
+        for fingerprint, idea in unique.items()
+    ])
+    return collect_result(db.execute(upsert_statement(stmt)).all(), len(ideas))
+
+
+def dedup_ideas(conn, batch_size: int = 1000) -> dict:
+    """Fingerprint every row and delete duplicates, keeping the oldest copy.
+
+    Rows are read in (created_at, id) order, so the first row seen for a
+    fingerprint is the one kept. Existing fingerprints are recomputed too, in
+    case the normalization changed since they were written.
+    """
+    kept: set[str] = set()
+    duplicates, changed = [], {}
+    scanned = 0
+
+    cursor = None
+    while True:
+        query = select(Idea.id, Idea.created_at, Idea.title, Idea.summary,
+                       Idea.source_video_id, Idea.fingerprint)
+        if cursor is not None:
+            query = query.where(tuple_(Idea.created_at, Idea.id) > cursor)
+        rows = conn.execute(query.order_by(Idea.created_at, Idea.id).limit(batch_size)).all()
+        if not rows:
+            break
+
+        for row in rows:
+            fingerprint = content_fingerprint(row.title, row.summary, row.source_video_id)
+            if fingerprint in kept:
+                duplicates.append(row.id)
+            else:
+                kept.add(fingerprint)
+                if fingerprint != row.fingerprint:
+                    changed[row.id] = fingerprint
+        scanned += len(rows)
+        cursor = (rows[-1].created_at, rows[-1].id)
+
+    for i in range(0, len(duplicates), batch_size):
+        conn.execute(Idea.__table__.delete().where(Idea.id.in_(duplicates[i:i + batch_size])))
+
+    # Clear first so a new value never collides with another row's stale one
+    ids = list(changed)
+    for i in range(0, len(ids), batch_size):
+        conn.execute(update(Idea.__table__).where(Idea.id.in_(ids[i:i + batch_size])).values(fingerprint=None))
+    if changed:
+        conn.execute(
+            update(Idea.__table__)
+            .where(Idea.__table__.c.id == bindparam("row_id"))
+            .values(fingerprint=bindparam("new_fingerprint")),
+            [{"row_id": idea_id, "new_fingerprint": value} for idea_id, value in changed.items()],
+        )
+
+    report = {"scanned": scanned, "fingerprinted": len(changed), "duplicates_removed": len(duplicates)}
+    logger.info("Dedup: %s", report)
+    return report
+
+
+if __name__ == "__main__":
+    from app.database import engine
+    from app.logging_config import setup_logging
+
+    setup_logging()
+    with engine.begin() as conn:
+        print(dedup_ideas(conn))
@@ -0,0 +1,124 @@
+"""
+Pluggable text embedders for semantic idea retrieval.
+
+The "local" embedder is deterministic and offline (feature hashing), so
+retrieval can be exercised without an API key. The "openai" embedder calls
+the embeddings API with the same output dimension.
+"""
+import hashlib
+import math
+import re
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Optional
+
+from openai import AsyncOpenAI
+
+from app.config import get_settings
+from app.metrics import LLMCall
+from app.services.llm_limiter import embedding_limiter
+from app.schemas.profile import UserProfile
+
+settings = get_settings()
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+
+class Embedder(ABC):
+    """Base embedder. Subclasses return one unit-length vector per text."""
+
+    dim: int
+    key: str  # Identifies the vector space; part of every content hash
+
+    @abstractmethod
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        ...
+
+
+class HashingEmbedder(Embedder):
+    """Deterministic bag-of-words embedder using signed feature hashing."""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.key = f"hashing-{dim}"
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        return [self.embed_one(text) for text in texts]
+
+    def embed_one(self, text: str) -> list[float]:
+        vector = [0.0] * self.dim
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        # Unigrams plus bigrams so "machine learning" differs from "machine" + "learning"
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[bucket] += sign
+
+        norm = math.sqrt(sum(v * v for v in vector))
+        if norm == 0:
+            return vector
+        return [v / norm for v in vector]
+
+
+class OpenAIEmbedder(Embedder):
+    """Embedder backed by the OpenAI embeddings API."""
+
+    def __init__(self, dim: int, model: str, client: Optional[AsyncOpenAI] = None):
+        self.dim = dim
+        self.model = model
+        self.key = f"{model}-{dim}"
+        self.client = client or AsyncOpenAI(
+            api_key=settings.openai_api_key, base_url=settings.openai_base_url or None
+        )
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        estimate = sum(len(text) for text in texts) // 4 + 1
+        async with embedding_limiter.slot(estimate) as slot:
+            with LLMCall("embeddings") as call:
+                response = await self.client.embeddings.create(
+                    model=self.model, input=texts, dimensions=self.dim
+                )
+            call.usage(response.usage)
+            slot.used(response.usage.prompt_tokens)
+        return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+
+
+@lru_cache
+def get_embedder() -> Embedder:
+    """Return the embedder selected by settings.embedding_provider."""
+    if settings.embedding_provider == "openai":
+        return OpenAIEmbedder(settings.embedding_dim, settings.embedding_model)
+    return HashingEmbedder(settings.embedding_dim)
+
+
+def profile_embedding_text(profile: UserProfile) -> str:
+    """Text used to embed a user profile for retrieval."""
+    parts = [
+        " ".join(profile.technical_skills),
+        " ".join(profile.non_technical_skills),
+        " ".join(profile.preferred_niches),
+        profile.interests or "",
+        profile.background or "",
+    ]
+    return "\n".join(part for part in parts if part)
+
+
+def content_hash(embedder: Embedder, text: str) -> str:
+    """Hash of the embedded text and vector space, used to reuse stored vectors."""
+    return hashlib.sha256(f"{embedder.key}\n{text}".encode()).hexdigest()
+
+
+def idea_embedding_text(idea) -> str:
+    """Text used to embed an idea (ORM row or IdeaCreate)."""
+    parts = [
+        idea.title,
+        idea.summary,
+        idea.niche or "",
+        idea.target_audience or "",
+        " ".join(idea.skills or []),
+        " ".join(idea.tech_stack or []),
+    ]
+    return "\n".join(part for part in parts if part)
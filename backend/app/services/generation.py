@@ -1,235 +1,632 @@
+import asyncio
 import json
 import logging
+import time
+from functools import lru_cache
 from typing import Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import Text, func, select, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
 from openai import AsyncOpenAI
 
 from app.config import get_settings
+from app.database import generation_session
+from app.metrics import LLMCall, fallback_activations, llm_retries, validation_rejections
 from app.models.idea import Idea
 from app.schemas.profile import UserProfile
 from app.schemas.generation import GenerationResponse, GeneratedIdea
+from app.services.catalog_snapshot import catalog_snapshot, profile_skill_terms
+from app.services.embeddings import get_embedder, profile_embedding_text
+from app.services.generation_cache import generation_cache
+from app.services.llm_limiter import LimiterRejected, embedding_limiter, llm_limiter
+from app.services.prompt_budget import PromptBuild, fragment_cache, get_tokenizer
+from app.services.validation_rules import RULES, KeywordMatcher
+from app.tracing import trace_span
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
-client = AsyncOpenAI(api_key=settings.openai_api_key)
+# No SDK retries: attempts are retried by generate_with_retries, through the limiter
+client = AsyncOpenAI(api_key=settings.openai_api_key, base_url=settings.openai_base_url or None, max_retries=0)
 
+GENERATION_MODEL = "gpt-4-turbo-preview"
 MAX_RETRIES = 3
 SKILL_MATCH_THRESHOLD = 0.5
 
+# Rejection reasons (also shown to the model in top-up prompts) and their metric labels
+REASON_SCHEMA = "Missing or malformed fields"
+REASON_DUPLICATE = "Duplicate of an already accepted idea"
+REASON_SKILLS = "Tech stack mismatch - less than 50% overlap with user skills"
+REASON_BUDGET = "Suggests paid tools but user has free/low budget"
+REASON_DIFFICULTY = "Difficulty mismatch - too advanced for user level"
+REJECTION_LABELS = {
+    REASON_SCHEMA: "schema",
+    REASON_DUPLICATE: "duplicate",
+    REASON_SKILLS: "skills",
+    REASON_BUDGET: "budget",
+    REASON_DIFFICULTY: "difficulty",
+}
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one running task.
+
+    The work runs in its own task, and each caller awaits it through
+    asyncio.shield. A caller that is cancelled (client disconnect) therefore
+    leaves the flight running for the others. Only when every caller has gone
+    is the task cancelled.
+    """
+
+    def __init__(self):
+        self.flights: dict[str, dict] = {}
+        self.stats = {"leaders": 0, "followers": 0, "abandoned": 0}
+
+    async def run(self, key: str, fn):
+        flight = self.flights.get(key)
+        if flight is None:
+            flight = {"task": asyncio.create_task(fn()), "waiters": 0}
+            self.flights[key] = flight
+            flight["task"].add_done_callback(lambda _: self._forget(key, flight))
+            self.stats["leaders"] += 1
+        else:
+            self.stats["followers"] += 1
+
+        flight["waiters"] += 1
+        try:
+            return await asyncio.shield(flight["task"])
+        finally:
+            flight["waiters"] -= 1
+            if flight["waiters"] == 0 and not flight["task"].done():
+                # Nobody is waiting any more; stop paying for the LLM call
+                self._forget(key, flight)
+                flight["task"].cancel()
+                self.stats["abandoned"] += 1
+
+    def _forget(self, key: str, flight: dict):
+        if self.flights.get(key) is flight:
+            del self.flights[key]
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "in_flight": len(self.flights)}
+
+
+generation_flights = SingleFlight()
+
+# LLM validation outcomes since startup (blocking and streaming generation)
+generation_stats = {
+    "requests": 0, "attempts": 0, "received": 0, "rejected": 0, "fallback_requests": 0,
+    "prompt_tokens": 0, "ideas_dropped": 0,  # First-attempt prompts (see build_generation_prompt)
+}
+
+
+def get_generation_stats() -> dict:
+    requests = generation_stats["requests"]
+    received = generation_stats["received"]
+    return {
+        **generation_stats,
+        "attempts_per_request": round(generation_stats["attempts"] / requests, 3) if requests else 0.0,
+        "rejection_rate": round(generation_stats["rejected"] / received, 3) if received else 0.0,
+        "prompt_tokens_per_request": round(generation_stats["prompt_tokens"] / requests, 1) if requests else 0.0,
+        "limiter": llm_limiter.get_stats(),
+        "embedding_limiter": embedding_limiter.get_stats(),
+        "prompt": {
+            "tokenizer": get_tokenizer().name,
+            "budget": settings.prompt_token_budget,
+            "fragment_cache": fragment_cache.get_stats(),
+        },
+    }
+
 
 async def generate_ideas(
-    profile: UserProfile, num_ideas: int, db: Session
+    profile: UserProfile,
+    num_ideas: int,
+    use_cache: bool = True,
+    refresh: bool = False,
 ) -> GenerationResponse:
-    """Generate ideas with validation and fallback."""
+    """Generate ideas with caching, request coalescing, validation and fallback.
+
+    Successful LLM results are cached per profile; `refresh` skips the lookup
+    but stores the new result. Fallback results are never cached. Concurrent
+    requests for the same profile share one generation (its stage spans are
+    recorded in the trace of the request that started it).
+    """
+    with trace_span("generation", num_ideas=num_ideas, use_cache=use_cache, refresh=refresh) as span:
+        cache_key = await generation_cache.key(profile, num_ideas)
+        if use_cache and not refresh:
+            cached = await generation_cache.get(cache_key)
+            span.set_attribute("cache_hit", cached is not None)
+            if cached is not None:
+                logger.info("Returning cached generation")
+                return cached
+
+        span.set_attribute("coalesced", cache_key in generation_flights.flights)
+        return await generation_flights.run(
+            cache_key,
+            lambda: run_generation(profile, num_ideas, cache_key if use_cache else None),
+        )
 
-    for attempt in range(MAX_RETRIES):
-        try:
-            # Get relevant ideas from database
-            source_ideas = get_matching_ideas(profile, db)
-
-            # Build prompt
-            prompt = build_generation_prompt(profile, source_ideas, num_ideas)
-
-            # Call OpenAI
-            response = await client.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": prompt},
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.8,
+
+async def run_generation(
+    profile: UserProfile, num_ideas: int, cache_key: Optional[str]
+) -> GenerationResponse:
+    """One coalesced generation. Uses its own session so it can outlive the leader request."""
+    generate = generate_with_fanout if settings.generation_mode == "fanout" else generate_with_retries
+    async with generation_session() as db:
+        ideas, profile_summary = await generate(profile, num_ideas, db)
+        if len(ideas) < num_ideas:
+            # Retries exhausted - keep the valid ideas, top up with safe fallback ideas
+            logger.error(
+                "Only %d/%d ideas after %d attempts. Topping up with fallback ideas.",
+                len(ideas), num_ideas, MAX_RETRIES,
+            )
+            generation_stats["fallback_requests"] += 1
+            fallback_activations.labels("generate").inc()
+            with trace_span("generation.fallback", missing=num_ideas - len(ideas)):
+                fallback = await get_fallback_ideas(profile, num_ideas - len(ideas), db)
+            return GenerationResponse(
+                ideas=ideas + fallback.ideas,
+                profile_summary=profile_summary or fallback.profile_summary,
             )
 
-            # Parse response
-            result = json.loads(response.choices[0].message.content)
+    response = GenerationResponse(ideas=ideas, profile_summary=profile_summary)
+    if cache_key is not None:
+        await generation_cache.set(cache_key, response)
+    return response
+
+
+def estimate_call_tokens(prompt: str) -> int:
+    """Tokens reserved in the limiter for one generation call."""
+    return (
+        template_tokens(SYSTEM_PROMPT)
+        + get_tokenizer().count(prompt)
+        + settings.llm_completion_token_estimate
+    )
 
-            # Validate schema
-            if not validate_response_schema(result):
-                logger.warning(f"Attempt {attempt + 1}: Invalid schema in AI response")
-                continue
 
-            # Build ideas
-            generated = []
-            for idea in result["ideas"]:
-                idea_obj = GeneratedIdea(
-                    title=idea["title"],
-                    description=idea["description"],
-                    why_good_fit=idea["why_good_fit"],
-                    first_steps=idea["first_steps"],
-                    tech_recommendations=idea["tech_recommendations"],
-                    source_idea_ids=[],
+async def complete(prompt: str):
+    """One chat completion for a generation prompt. Returns (content, usage).
+
+    Waits for a limiter slot first; raises LimiterRejected if none is free in time.
+    """
+    with trace_span("generation.llm", model=GENERATION_MODEL) as span:
+        async with llm_limiter.slot(estimate_call_tokens(prompt)) as slot:
+            span.set_attribute("queue_wait_ms", round(slot.waited * 1e3, 1))
+            with LLMCall("generate") as call:
+                raw = await client.chat.completions.with_raw_response.create(
+                    model=GENERATION_MODEL,
+                    messages=[
+                        {"role": "system", "content": SYSTEM_PROMPT},
+                        {"role": "user", "content": prompt},
+                    ],
+                    response_format={"type": "json_object"},
+                    temperature=0.8,
                 )
+            llm_limiter.observe_headers(raw.headers)
+            response = raw.parse()
+            usage = response.usage
+            call.usage(usage)
+            if usage is not None:
+                slot.used(usage.total_tokens)
+                span.set_attributes({
+                    "prompt_tokens": usage.prompt_tokens,
+                    "completion_tokens": usage.completion_tokens,
+                })
+    return response.choices[0].message.content, usage
+
+
+def parse_completion(content: str) -> tuple[Optional[list], str]:
+    """(ideas list or None if the schema is wrong, profile summary). Raises on invalid JSON."""
+    with trace_span("generation.parse"):
+        result = json.loads(content)
+    if not isinstance(result, dict) or not isinstance(result.get("ideas"), list):
+        return None, ""
+    return result["ideas"], result.get("profile_summary", "")
+
+
+def accept_ideas(
+    ideas: list,
+    profile: UserProfile,
+    num_ideas: int,
+    accepted: list[GeneratedIdea],
+    rejections: list[dict],
+    label: str,
+) -> tuple[int, int]:
+    """Validate ideas into `accepted` until it holds num_ideas.
+
+    Rejected ideas are added to `rejections` (for top-up prompts).
+    Returns (received, rejected).
+    """
+    received = 0
+    rejected = 0
+    reason_labels = set()
+    with trace_span("generation.validate") as span:
+        for idea, (idea_obj, reasons) in zip(ideas, check_generated_ideas(ideas, profile)):
+            if len(accepted) >= num_ideas:
+                break
+            received += 1
+
+            if idea_obj is not None and is_duplicate(idea_obj, accepted):
+                reasons = [REASON_DUPLICATE]
+            if reasons:
+                rejected += 1
+                record_rejections(reasons)
+                reason_labels.update(REJECTION_LABELS.get(reason, "other") for reason in reasons)
+                title = idea.get("title", "Untitled") if isinstance(idea, dict) else "Untitled"
+                rejections.append({"title": title, "reasons": reasons})
+                logger.warning("%s: Idea '%s' failed validation: %s", label, title, ", ".join(reasons))
+                # Skip this idea but keep others
+                continue
 
-                # Validate each idea
-                validation_result = validate_idea(idea_obj, profile)
-                if not validation_result["valid"]:
-                    logger.warning(
-                        f"Attempt {attempt + 1}: Idea '{idea['title']}' failed validation: "
-                        f"{', '.join(validation_result['reasons'])}"
-                    )
-                    # Skip this idea but keep others
-                    continue
+            accepted.append(idea_obj)
+        span.set_attributes({
+            "received": received,
+            "rejected": rejected,
+            "rejection_reasons": sorted(reason_labels),
+        })
 
-                generated.append(idea_obj)
+    generation_stats["received"] += received
+    generation_stats["rejected"] += rejected
+    return received, rejected
 
-            # Check if we got enough valid ideas
-            if len(generated) >= num_ideas:
-                return GenerationResponse(
-                    ideas=generated[:num_ideas],
-                    profile_summary=result.get("profile_summary", ""),
-                )
+
+async def generate_with_retries(
+    profile: UserProfile, num_ideas: int, db: AsyncSession
+) -> tuple[list[GeneratedIdea], str]:
+    """Call the LLM until num_ideas ideas pass validation, at most MAX_RETRIES times.
+
+    Valid ideas are kept across attempts. After the first attempt the model is
+    only asked for the missing count, with a short prompt listing the accepted
+    titles and why earlier ideas were rejected.
+    Returns (accepted ideas, profile summary); may hold fewer than num_ideas.
+    """
+    # Get relevant ideas from database
+    source_ideas = await get_matching_ideas(profile, db)
+    generation_stats["requests"] += 1
+
+    accepted: list[GeneratedIdea] = []
+    rejections: list[dict] = []
+    profile_summary = ""
+
+    for attempt in range(MAX_RETRIES):
+        missing = num_ideas - len(accepted)
+        with trace_span("generation.attempt", attempt=attempt + 1, requested=missing) as attempt_span:
+            if attempt == 0:
+                prompt = prepare_prompt(profile, source_ideas, num_ideas).text
             else:
-                logger.warning(
-                    f"Attempt {attempt + 1}: Only {len(generated)}/{num_ideas} ideas passed validation"
-                )
+                prompt = build_topup_prompt(profile, accepted, rejections, missing)
+                llm_retries.labels("generate").inc()
+
+            start_time = time.perf_counter()
+            received = 0
+            rejected = 0
+            usage = None
+
+            try:
+                # Call OpenAI
+                content, usage = await complete(prompt)
+                ideas, summary = parse_completion(content)
+
+                if ideas is None:
+                    logger.warning("Attempt %d: Invalid schema in AI response", attempt + 1)
+                    attempt_span.set_attribute("invalid_schema", True)
+                else:
+                    profile_summary = profile_summary or summary
+                    received, rejected = accept_ideas(
+                        ideas, profile, num_ideas, accepted, rejections, f"Attempt {attempt + 1}"
+                    )
+
+            except json.JSONDecodeError as e:
+                logger.error("Attempt %d: JSON parse error: %s", attempt + 1, e)
+            except LimiterRejected as e:
+                # OpenAI capacity is exhausted; more attempts would only queue again
+                logger.warning("Attempt %d: %s", attempt + 1, e)
+                attempt_span.record_exception(e)
+                break
+            except Exception as e:
+                logger.error("Attempt %d: Generation error: %s", attempt + 1, e)
+                attempt_span.record_exception(e)
+
+            generation_stats["attempts"] += 1
+            attempt_span.set_attribute("accepted", len(accepted))
+            logger.info(
+                "Attempt %d: requested %d, received %d, accepted %d/%d, rejected %d, %.2fs, "
+                "tokens %s in / %s out",
+                attempt + 1, missing, received, len(accepted), num_ideas, rejected,
+                time.perf_counter() - start_time,
+                usage.prompt_tokens if usage else "?", usage.completion_tokens if usage else "?",
+            )
 
-        except json.JSONDecodeError as e:
-            logger.error(f"Attempt {attempt + 1}: JSON parse error: {e}")
-        except Exception as e:
-            logger.error(f"Attempt {attempt + 1}: Generation error: {e}")
+        if len(accepted) >= num_ideas:
+            break
 
-    # All retries failed - return safe fallback ideas
-    logger.error(f"All {MAX_RETRIES} attempts failed. Returning fallback ideas.")
-    return get_fallback_ideas(profile, num_ideas, db)
+    return accepted, profile_summary
+
+
+# Angles handed to concurrent fan-out calls so they do not return the same idea
+DIVERSITY_HINTS = [
+    "a tool for a specific professional niche (B2B)",
+    "a consumer app for everyday life",
+    "a content, education or community product",
+    "an automation or integration that saves people time",
+    "a marketplace, directory or aggregator",
+    "a data, analytics or reporting product",
+    "a hobby, creative or game-like project",
+    "a browser extension or plugin for an existing platform",
+]
+
+
+def with_diversity_hint(prompt: str, index: int) -> str:
+    hint = DIVERSITY_HINTS[index % len(DIVERSITY_HINTS)]
+    return (
+        f"{prompt}\n\nDIVERSITY: Other ideas for this user are being generated in parallel. "
+        f"Make this one {hint}, within their preferred niches and types, "
+        f"and avoid generic names and premises."
+    )
+
+
+async def generate_with_fanout(
+    profile: UserProfile, num_ideas: int, db: AsyncSession
+) -> tuple[list[GeneratedIdea], str]:
+    """generate_with_retries with concurrent small completions.
+
+    Each round issues one call per settings.generation_fanout_ideas_per_call
+    missing ideas, plus generation_fanout_extra_calls spares, each with its
+    own diversity hint. Results are validated as they arrive and the calls
+    still running are cancelled once num_ideas ideas are accepted, so the
+    latency is that of the slowest call needed rather than of one long
+    completion. Later rounds use top-up prompts, as retries do; there are
+    none once the limiter has refused a call.
+    """
+    source_ideas = await get_matching_ideas(profile, db)
+    generation_stats["requests"] += 1
+
+    per_call = max(1, settings.generation_fanout_ideas_per_call)
+    accepted: list[GeneratedIdea] = []
+    rejections: list[dict] = []
+    profile_summary = ""
+    hint_index = 0  # Runs across rounds so retries get fresh angles
+    refused = 0
+
+    for round_number in range(1, MAX_RETRIES + 1):
+        missing = num_ideas - len(accepted)
+        calls = -(-missing // per_call) + max(0, settings.generation_fanout_extra_calls)
+        if round_number == 1:
+            prompt = prepare_prompt(profile, source_ideas, per_call).text
+        else:
+            prompt = build_topup_prompt(profile, accepted, rejections, per_call)
+            llm_retries.labels("generate").inc(calls)
+
+        start_time = time.perf_counter()
+        with trace_span("generation.fanout", round=round_number, calls=calls, requested=missing) as span:
+            tasks = [
+                asyncio.create_task(complete(with_diversity_hint(prompt, hint_index + i)))
+                for i in range(calls)
+            ]
+            hint_index += calls
+            for task in tasks:
+                # Failures of calls never awaited (after an early finish) are not worth a warning
+                task.add_done_callback(lambda task: task.cancelled() or task.exception())
+            try:
+                for finished in asyncio.as_completed(tasks):
+                    try:
+                        ideas, summary = parse_completion((await finished)[0])
+                    except LimiterRejected as e:
+                        refused += 1
+                        logger.warning("Fan-out round %d: %s", round_number, e)
+                        continue
+                    except Exception as e:
+                        logger.error("Fan-out round %d: Generation error: %s", round_number, e)
+                        continue
+                    if ideas is None:
+                        logger.warning("Fan-out round %d: Invalid schema in AI response", round_number)
+                        continue
+                    profile_summary = profile_summary or summary
+                    accept_ideas(ideas, profile, num_ideas, accepted, rejections, f"Fan-out round {round_number}")
+                    if len(accepted) >= num_ideas:
+                        break
+            finally:
+                stragglers = [task for task in tasks if not task.done()]
+                for task in stragglers:
+                    task.cancel()
+
+            generation_stats["attempts"] += calls - refused
+            span.set_attributes({"accepted": len(accepted), "cancelled": len(stragglers), "refused": refused})
+            logger.info(
+                "Fan-out round %d: %d calls for %d ideas, accepted %d/%d, %d cancelled, %.2fs",
+                round_number, calls, missing, len(accepted), num_ideas, len(stragglers),
+                time.perf_counter() - start_time,
+            )
+
+        if len(accepted) >= num_ideas or refused:
+            break
+
+    return accepted, profile_summary
+
+
+def check_generated_ideas(
+    ideas: list, profile: UserProfile
+) -> list[tuple[Optional[GeneratedIdea], list[str]]]:
+    """(parsed idea or None, rejection reasons) for each AI idea of a completion.
+
+    Schema-valid ideas are validated as one batch (validate_ideas). Duplicate
+    titles depend on what has been accepted so far, so accept_ideas checks them.
+    """
+    parsed = [
+        parse_generated_idea(idea) if isinstance(idea, dict) and validate_idea_schema(idea) else None
+        for idea in ideas
+    ]
+    results = iter(validate_ideas([idea for idea in parsed if idea is not None], profile))
+    return [(idea, next(results)["reasons"]) if idea is not None else (None, [REASON_SCHEMA]) for idea in parsed]
+
+
+def is_duplicate(idea: GeneratedIdea, accepted: list[GeneratedIdea]) -> bool:
+    title = idea.title.strip().lower()
+    return any(title == existing.title.strip().lower() for existing in accepted)
+
+
+def record_rejections(reasons: list[str]):
+    for reason in reasons:
+        validation_rejections.labels(REJECTION_LABELS.get(reason, "other")).inc()
 
 
 def validate_idea(idea: GeneratedIdea, profile: UserProfile) -> dict:
     """Validate generated idea against user profile."""
-    reasons = []
+    return validate_ideas([idea], profile)[0]
 
-    # 1. Skill validation
-    if not validate_skill_match(idea.tech_recommendations, profile.technical_skills):
-        reasons.append("Tech stack mismatch - less than 50% overlap with user skills")
 
-    # 2. Budget validation
-    if not validate_budget_match(idea.tech_recommendations, profile.budget):
-        reasons.append("Suggests paid tools but user has free/low budget")
+def validate_ideas(ideas: list[GeneratedIdea], profile: UserProfile) -> list[dict]:
+    """Validate a batch of generated ideas against one profile.
 
-    # 3. Difficulty validation
-    if not validate_difficulty_match(idea, profile.experience_level):
-        reasons.append("Difficulty mismatch - too advanced for user level")
+    Profile-derived state (skill set, budget and difficulty rules) is
+    prepared once for the whole batch.
+    """
+    user_skills = {skill.lower() for skill in profile.technical_skills}
+    budget_matcher = budget_rule(profile.budget)
+    advanced_matcher = RULES["advanced"] if profile.experience_level == "beginner" else None
 
-    return {
-        "valid": len(reasons) == 0,
-        "reasons": reasons
-    }
+    results = []
+    for idea in ideas:
+        reasons = []
+        tech_lower = [tech.lower() for tech in idea.tech_recommendations]
+        tech_text = "\n".join(tech_lower)
+
+        # 1. Skill validation
+        if not skill_overlap_ok(tech_lower, user_skills):
+            reasons.append(REASON_SKILLS)
+
+        # 2. Budget validation
+        if budget_matcher is not None and budget_matcher.search(tech_text):
+            reasons.append(REASON_BUDGET)
+
+        # 3. Difficulty validation
+        if advanced_matcher is not None and advanced_matcher.search(
+            tech_text + "\n" + idea.description.lower()
+        ):
+            reasons.append(REASON_DIFFICULTY)
+
+        results.append({
+            "valid": len(reasons) == 0,
+            "reasons": reasons
+        })
+
+    return results
 
 
 def validate_skill_match(tech_recommendations: list[str], user_skills: list[str]) -> bool:
     """Check if tech recommendations overlap with user skills by at least 50%."""
-    if not user_skills or not tech_recommendations:
-        # If user has no skills listed, allow anything
-        return len(user_skills) == 0
+    return skill_overlap_ok(
+        [tech.lower() for tech in tech_recommendations],
+        {skill.lower() for skill in user_skills},
+    )
 
-    # Normalize to lowercase for comparison
-    user_skills_lower = {skill.lower() for skill in user_skills}
-    tech_lower = {tech.lower() for tech in tech_recommendations}
+
+def skill_overlap_ok(tech_lower: list[str], user_skills_lower: set[str]) -> bool:
+    """validate_skill_match on already-lowercased inputs."""
+    if not user_skills_lower or not tech_lower:
+        # If user has no skills listed, allow anything
+        return len(user_skills_lower) == 0
 
     # Count matches
-    matches = len(tech_lower.intersection(user_skills_lower))
-    match_ratio = matches / len(tech_recommendations)
+    matches = len(set(tech_lower).intersection(user_skills_lower))
+    match_ratio = matches / len(tech_lower)
 
     return match_ratio >= SKILL_MATCH_THRESHOLD
 
 
-def validate_budget_match(tech_recommendations: list[str], budget: Optional[str]) -> bool:
-    """Check if tech recommendations fit budget constraints."""
+def budget_rule(budget: Optional[str]) -> Optional[KeywordMatcher]:
+    """Keyword rule that tech recommendations must not hit for this budget."""
     if not budget:
-        return True
+        return None
 
     budget_lower = budget.lower()
 
-    # Define paid services/tools
-    PAID_KEYWORDS = [
-        "aws", "azure", "gcp", "heroku", "vercel pro", "netlify pro",
-        "mongodb atlas", "planetscale", "supabase pro", "firebase blaze",
-        "stripe", "openai api", "anthropic", "replicate",
-        "cloudflare pro", "sendgrid paid", "twilio",
-        "premium", "paid", "subscription", "enterprise"
-    ]
-
-    # Check if budget is free or very low
+    # Free or very low budget: no paid services/tools
     if budget_lower in ["free", "$0", "no budget"]:
-        for tech in tech_recommendations:
-            tech_lower = tech.lower()
-            if any(keyword in tech_lower for keyword in PAID_KEYWORDS):
-                return False
+        return RULES["paid"]
 
     # For <$100 budget, allow some services but flag expensive ones
     if "<$100" in budget_lower or "under $100" in budget_lower or "< $100" in budget_lower:
-        EXPENSIVE_KEYWORDS = [
-            "aws", "azure", "gcp", "enterprise", "premium tier",
-            "openai api", "anthropic"
-        ]
-        for tech in tech_recommendations:
-            tech_lower = tech.lower()
-            if any(keyword in tech_lower for keyword in EXPENSIVE_KEYWORDS):
-                return False
+        return RULES["expensive"]
 
-    return True
+    return None
+
+
+def validate_budget_match(tech_recommendations: list[str], budget: Optional[str]) -> bool:
+    """Check if tech recommendations fit budget constraints."""
+    matcher = budget_rule(budget)
+    if matcher is None:
+        return True
+    return matcher.search("\n".join(tech_recommendations).lower()) is None
 
 
 def validate_difficulty_match(idea: GeneratedIdea, experience_level: str) -> bool:
     """Check if idea matches user experience level."""
     if experience_level == "beginner":
         # Beginners should not get complex frameworks or architectures
-        ADVANCED_KEYWORDS = [
-            "kubernetes", "docker compose", "microservices", "redis",
-            "elasticsearch", "kafka", "graphql", "websockets",
-            "nextjs", "remix", "svelte", "vue", "angular",
-            "terraform", "ci/cd", "jenkins", "github actions"
-        ]
-
-        all_text = " ".join(idea.tech_recommendations).lower()
-        all_text += " " + idea.description.lower()
-
-        for keyword in ADVANCED_KEYWORDS:
-            if keyword in all_text:
-                return False
+        all_text = "\n".join(idea.tech_recommendations).lower()
+        all_text += "\n" + idea.description.lower()
+        return RULES["advanced"].search(all_text) is None
 
     return True
 
 
-def validate_response_schema(response: dict) -> bool:
-    """Validate AI response has required fields."""
+def validate_idea_schema(idea: dict) -> bool:
+    """Validate a single AI-generated idea has required fields."""
     try:
-        if "ideas" not in response:
+        required = ["title", "description", "why_good_fit", "first_steps", "tech_recommendations"]
+        if not all(field in idea for field in required):
             return False
 
-        for idea in response["ideas"]:
-            required = ["title", "description", "why_good_fit", "first_steps", "tech_recommendations"]
-            if not all(field in idea for field in required):
-                return False
-
-            # Check types
-            if not isinstance(idea["first_steps"], list):
-                return False
-            if not isinstance(idea["tech_recommendations"], list):
-                return False
-            if len(idea["first_steps"]) == 0:
-                return False
-            if len(idea["tech_recommendations"]) == 0:
-                return False
+        # Check types
+        if not isinstance(idea["first_steps"], list):
+            return False
+        if not isinstance(idea["tech_recommendations"], list):
+            return False
+        if len(idea["first_steps"]) == 0:
+            return False
+        if len(idea["tech_recommendations"]) == 0:
+            return False
 
         return True
     except Exception:
         return False
 
 
-def get_fallback_ideas(profile: UserProfile, num_ideas: int, db: Session) -> GenerationResponse:
+def parse_generated_idea(idea: dict) -> GeneratedIdea:
+    """Build a GeneratedIdea from a schema-valid AI idea dict."""
+    return GeneratedIdea(
+        title=idea["title"],
+        description=idea["description"],
+        why_good_fit=idea["why_good_fit"],
+        first_steps=idea["first_steps"],
+        tech_recommendations=idea["tech_recommendations"],
+        source_idea_ids=[],
+    )
+
+
+async def load_descriptions(db: AsyncSession, idea_ids: list) -> dict:
+    """Descriptions by idea id (snapshot records do not keep the column)."""
+    if not idea_ids:
+        return {}
+    result = await db.execute(select(Idea.id, Idea.description).where(Idea.id.in_(idea_ids)))
+    return dict(result.all())
+
+
+async def get_fallback_ideas(
+    profile: UserProfile, num_ideas: int, db: AsyncSession
+) -> GenerationResponse:
     """Return safe, pre-validated ideas when AI generation fails."""
     logger.info("Generating fallback ideas from database")
 
     # Get matching ideas from database
-    source_ideas = get_matching_ideas(profile, db, limit=num_ideas)
+    source_ideas = await get_matching_ideas(profile, db, limit=num_ideas)
+    descriptions = await load_descriptions(db, [idea.id for idea in source_ideas[:num_ideas] if not idea.summary])
 
     fallback_ideas = []
     for idea in source_ideas[:num_ideas]:
         # Convert database idea to generated idea format
         fallback = GeneratedIdea(
             title=idea.title,
-            description=idea.summary or idea.description or "A proven idea from successful creators",
+            description=idea.summary or descriptions.get(idea.id) or "A proven idea from successful creators",
             why_good_fit=f"Matches your {profile.experience_level} level and interests",
             first_steps=[
                 "Research similar projects in this space",
@@ -289,32 +686,147 @@ def create_safe_generic_idea(profile: UserProfile, index: int) -> GeneratedIdea:
     )
 
 
-def get_matching_ideas(profile: UserProfile, db: Session, limit: int = 15) -> list[Idea]:
-    """Get ideas that match user profile. Simple filtering for MVP."""
-    query = db.query(Idea)
-
+def apply_profile_filters(query, profile: UserProfile, preferences: bool = True):
+    """Apply structured profile filters (difficulty, and optionally niche/type)."""
     # Filter by difficulty based on experience
     if profile.experience_level == "beginner":
-        query = query.filter(Idea.difficulty.in_(["beginner", None]))
+        query = query.where(Idea.difficulty.in_(["beginner", None]))
     elif profile.experience_level == "intermediate":
-        query = query.filter(Idea.difficulty.in_(["beginner", "intermediate", None]))
+        query = query.where(Idea.difficulty.in_(["beginner", "intermediate", None]))
+
+    if not preferences:
+        return query
 
     # Filter by preferred niches if specified
     if profile.preferred_niches:
-        query = query.filter(Idea.niche.in_(profile.preferred_niches))
+        query = query.where(Idea.niche.in_(profile.preferred_niches))
 
     # Filter by preferred types if specified
     if profile.preferred_types:
-        query = query.filter(Idea.idea_type.in_(profile.preferred_types))
+        query = query.where(Idea.idea_type.in_(profile.preferred_types))
+
+    return query
+
+
+async def get_matching_ideas(
+    profile: UserProfile, db: AsyncSession, limit: int = 15
+) -> list[Idea]:
+    """Get ideas that match user profile.
+
+    Filter retrieval is served from the in-memory catalog snapshot (IdeaRecord
+    objects) when it is loaded and settings.catalog_source is "snapshot".
+    """
+    with trace_span("generation.retrieval", limit=limit) as span:
+        if settings.retrieval_mode == "semantic":
+            span.set_attribute("source", "semantic")
+            ideas = await get_semantic_ideas(profile, db, limit)
+        elif catalog_snapshot.usable:
+            span.set_attribute("source", "snapshot")
+            ideas = catalog_snapshot.match(profile, limit)
+        else:
+            span.set_attribute("source", "sql")
+            query = apply_profile_filters(select(Idea), profile)
+            ideas = await rank_by_skill_overlap(query, profile, db, limit)
+        span.set_attribute("source_ideas", len(ideas))
+        return ideas
+
+
+def idea_skill_terms():
+    """Distinct lowercased skills and tech stack of an idea (record_skill_terms in SQL).
+
+    Same expression as the idx_ideas_skill_terms GIN index (alembic 0004).
+    """
+    return func.idea_skill_terms(Idea.skills, Idea.tech_stack, type_=ARRAY(Text))
+
+
+def skill_overlap_score(skills: set[str]):
+    """Profile skills found in an idea's skills/tech stack (case-insensitive)."""
+    term = func.unnest(idea_skill_terms()).column_valued("term")
+    return select(func.count()).where(term.in_(skills)).scalar_subquery()
+
+
+async def rank_by_skill_overlap(
+    query, profile: UserProfile, db: AsyncSession, limit: int
+) -> list[Idea]:
+    """Top `limit` rows of a filtered query by skill overlap with the profile.
+
+    Same order as CatalogSnapshot.match: most matching skills, then fewest
+    distinct skills overall, then newest, all compared case-insensitively.
+    Candidates come from the idx_ideas_skill_terms index (`&&`), so only rows
+    sharing a skill are scored; the rest of `limit` is filled newest first.
+    """
+    ideas = []
+    skills = profile_skill_terms(profile)
+    if skills:
+        terms = idea_skill_terms()
+        score = skill_overlap_score(skills)
+        ranked = (
+            query.where(terms.overlap(sorted(skills)))
+            .order_by(score.desc(), func.cardinality(terms), Idea.created_at.desc(), Idea.id.desc())
+        )
+        result = await db.execute(ranked.limit(limit))
+        ideas = list(result.scalars().all())
+
+    if len(ideas) < limit:
+        if ideas:
+            query = query.where(Idea.id.notin_([idea.id for idea in ideas]))
+        result = await db.execute(
+            query.order_by(Idea.created_at.desc(), Idea.id.desc()).limit(limit - len(ideas))
+        )
+        ideas.extend(result.scalars().all())
+    return ideas
 
-    return query.limit(limit).all()
 
+async def get_semantic_ideas(
+    profile: UserProfile, db: AsyncSession, limit: int = 15
+) -> list[Idea]:
+    """Rank ideas by embedding similarity to the profile, with structured pre-filters.
 
-def build_generation_prompt(
-    profile: UserProfile, ideas: list[Idea], num_ideas: int
-) -> str:
-    # Format profile
-    profile_str = f"""
+    If the preferred niches/types leave fewer than `limit` rows, the remainder
+    is filled from the nearest ideas that only satisfy the difficulty filter.
+    """
+    profile_text = profile_embedding_text(profile)
+    if not profile_text:
+        query = apply_profile_filters(select(Idea), profile)
+        result = await db.execute(query.limit(limit))
+        return list(result.scalars().all())
+
+    [vector] = await get_embedder().embed([profile_text])
+    distance = Idea.embedding.cosine_distance(vector)
+
+    # Filtered HNSW scans discard non-matching neighbours; widen the candidate list
+    await db.execute(text(f"SET LOCAL hnsw.ef_search = {int(settings.hnsw_ef_search)}"))
+
+    query = select(Idea).where(Idea.embedding.isnot(None))
+    result = await db.execute(
+        apply_profile_filters(query, profile).order_by(distance).limit(limit)
+    )
+    ideas = list(result.scalars().all())
+
+    if len(ideas) < limit and (profile.preferred_niches or profile.preferred_types):
+        relaxed = apply_profile_filters(query, profile, preferences=False)
+        if ideas:
+            relaxed = relaxed.where(Idea.id.notin_([idea.id for idea in ideas]))
+        result = await db.execute(relaxed.order_by(distance).limit(limit - len(ideas)))
+        ideas.extend(result.scalars().all())
+
+    return ideas
+
+
+def format_profile(profile: UserProfile, truncated: Optional[list[str]] = None) -> str:
+    """Profile block. Long free-text fields are cut to settings.prompt_field_max_tokens
+    and their names appended to `truncated`."""
+    tokenizer = get_tokenizer()
+
+    def clip(name: str, value: Optional[str], default: str) -> str:
+        if not value:
+            return default
+        clipped = tokenizer.truncate(value, settings.prompt_field_max_tokens)
+        if clipped != value and truncated is not None:
+            truncated.append(name)
+        return clipped
+
+    return f"""
 USER PROFILE:
 - Technical Skills: {', '.join(profile.technical_skills) or 'None specified'}
 - Other Skills: {', '.join(profile.non_technical_skills) or 'None specified'}
@@ -325,32 +837,137 @@ USER PROFILE:
 - Budget: {profile.budget or 'Not specified'}
 - Income Goal: {profile.income_goal or 'Not specified'}
 - Timeline: {profile.timeline or 'Flexible'}
-- Interests: {profile.interests or 'Not specified'}
-- Background: {profile.background or 'Not specified'}
+- Interests: {clip('interests', profile.interests, 'Not specified')}
+- Background: {clip('background', profile.background, 'Not specified')}
 """
 
-    # Format source ideas
-    ideas_str = "\n\n".join(
-        [
-            f"""IDEA {i+1}: {idea.title}
-Summary: {idea.summary}
+
+def format_idea_fragment(idea) -> str:
+    """Prompt lines for one inspiration idea (without its "IDEA n:" prefix)."""
+    summary = get_tokenizer().truncate(idea.summary or "", settings.prompt_field_max_tokens)
+    return f"""{idea.title}
+Summary: {summary}
 Type: {idea.idea_type} | Model: {idea.business_model}
 Skills: {', '.join(idea.skills or [])}
 Difficulty: {idea.difficulty}
 Niche: {idea.niche}"""
-            for i, idea in enumerate(ideas)
-        ]
-    )
 
-    return f"""{profile_str}
 
-INSPIRATION IDEAS FROM SUCCESSFUL CREATORS:
-{ideas_str if ideas else 'No specific inspiration ideas available.'}
+def idea_fragment(idea) -> tuple[str, int]:
+    """(fragment, token count), cached per idea id and row version."""
+    version = getattr(idea, "updated_at", None)
+    if version is None:
+        text = format_idea_fragment(idea)
+        return text, get_tokenizer().count(text)
+    return fragment_cache.get_or_build((idea.id, version), lambda: format_idea_fragment(idea))
+
+
+@lru_cache(maxsize=64)
+def template_tokens(text: str) -> int:
+    """Token count of a fixed prompt template part."""
+    return get_tokenizer().count(text)
+
+
+INSPIRATION_HEADER = "\n\nINSPIRATION IDEAS FROM SUCCESSFUL CREATORS:\n"
+NO_INSPIRATION = "No specific inspiration ideas available."
+
+
+def build_generation_prompt(
+    profile: UserProfile, ideas: list[Idea], num_ideas: int
+) -> PromptBuild:
+    """User prompt within settings.prompt_token_budget.
+
+    `ideas` come best-first from get_matching_ideas; once the budget runs out
+    the remaining (lowest-ranked) ideas are dropped.
+    """
+    tokenizer = get_tokenizer()
+    budget = settings.prompt_token_budget
+    truncated: list[str] = []
+
+    # Format profile
+    profile_str = format_profile(profile, truncated)
+    footer = f"""
 
 Generate {num_ideas} NEW, ORIGINAL project ideas for this user.
 Each idea should be unique and tailored to their specific profile.
 If no inspiration ideas provided, create ideas based purely on user profile.
 
+CRITICAL: Only suggest technologies from their Technical Skills list above."""
+    tokens = (
+        tokenizer.count(profile_str)
+        + template_tokens(INSPIRATION_HEADER)
+        + template_tokens(footer)
+        + template_tokens(NO_INSPIRATION)
+    )
+
+    # Format source ideas, best first, while they fit
+    fragments = []
+    for idea in ideas:
+        text, fragment_tokens = idea_fragment(idea)
+        prefix = f"IDEA {len(fragments) + 1}: "
+        cost = template_tokens(prefix) + fragment_tokens + 1  # +1 for the blank line between ideas
+        if tokens + cost > budget:
+            break
+        fragments.append(prefix + text)
+        tokens += cost
+
+    ideas_str = "\n\n".join(fragments) or NO_INSPIRATION
+    return PromptBuild(
+        text=f"{profile_str}{INSPIRATION_HEADER}{ideas_str}{footer}",
+        tokens=tokens,
+        budget=budget,
+        ideas_used=len(fragments),
+        ideas_dropped=len(ideas) - len(fragments),
+        truncated_fields=truncated,
+    )
+
+
+def prepare_prompt(profile: UserProfile, ideas: list[Idea], num_ideas: int) -> PromptBuild:
+    """build_generation_prompt in a trace span, with its stats logged."""
+    with trace_span("generation.prompt", source_ideas=len(ideas)) as span:
+        build = build_generation_prompt(profile, ideas, num_ideas)
+        span.set_attributes({
+            "prompt_tokens": build.tokens,
+            "ideas_used": build.ideas_used,
+            "ideas_dropped": build.ideas_dropped,
+            "truncated_fields": build.truncated_fields,
+        })
+    log_prompt_build(build)
+    return build
+
+
+def log_prompt_build(build: PromptBuild):
+    generation_stats["prompt_tokens"] += build.tokens
+    generation_stats["ideas_dropped"] += build.ideas_dropped
+    truncated = ", truncated " + ", ".join(build.truncated_fields) if build.truncated_fields else ""
+    logger.info(
+        "Prompt: %d/%d tokens, %d inspiration ideas (%d dropped)%s",
+        build.tokens, build.budget, build.ideas_used, build.ideas_dropped, truncated,
+    )
+
+
+def build_topup_prompt(
+    profile: UserProfile,
+    accepted: list[GeneratedIdea],
+    rejections: list[dict],
+    num_ideas: int,
+) -> str:
+    """Short follow-up prompt asking only for the missing ideas."""
+    accepted_str = "\n".join(f"- {idea.title}" for idea in accepted) or "None yet."
+    rejected_str = "\n".join(
+        f"- {rejection['title']}: {'; '.join(rejection['reasons'])}" for rejection in rejections
+    ) or "None."
+
+    return f"""{format_profile(profile)}
+
+ALREADY ACCEPTED (do not repeat or closely resemble these):
+{accepted_str}
+
+REJECTED EARLIER (do not repeat these mistakes):
+{rejected_str}
+
+Generate {num_ideas} more NEW, ORIGINAL project idea(s) for this user.
+
 CRITICAL: Only suggest technologies from their Technical Skills list above."""
 
 
@@ -0,0 +1,201 @@
+"""
+Response cache for idea generation.
+
+Keys are a canonicalized UserProfile + num_ideas + catalog version, so any
+write to the ideas table makes older entries unreachable. Entries live in a
+bounded in-process LRU with TTL and, optionally, a shared backend (Redis)
+so several workers can reuse each other's results.
+"""
+import hashlib
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+
+from app.config import get_settings
+from app.logging_config import get_logger
+from app.schemas.generation import GenerationResponse
+from app.schemas.profile import UserProfile
+from app.services.catalog import catalog_version
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+SHARED_VERSION_KEY = "binko:catalog_version"
+
+
+def canonical_profile(profile: UserProfile) -> dict:
+    """Profile with normalized casing, whitespace and list order."""
+    canonical = {}
+    for field, value in profile.model_dump().items():
+        if isinstance(value, list):
+            value = sorted({" ".join(item.lower().split()) for item in value if item.strip()})
+        elif isinstance(value, str):
+            value = " ".join(value.lower().split()) or None
+        canonical[field] = value
+    return canonical
+
+
+def profile_key(profile: UserProfile, num_ideas: int) -> str:
+    """Stable hash of a canonical profile and idea count (no catalog version)."""
+    payload = json.dumps(
+        {"profile": canonical_profile(profile), "num_ideas": num_ideas},
+        sort_keys=True, separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class CacheBackend(ABC):
+    """Shared store interface. Values are strings; ttl is in seconds."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl: int):
+        ...
+
+    @abstractmethod
+    async def incr(self, key: str) -> int:
+        ...
+
+
+class InMemoryBackend(CacheBackend):
+    """Local stand-in for the shared backend (single process, tests)."""
+
+    def __init__(self):
+        self.data: dict[str, tuple[Optional[float], str]] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: str, ttl: int):
+        self.data[key] = (time.monotonic() + ttl, value)
+
+    async def incr(self, key: str) -> int:
+        value = int(await self.get(key) or 0) + 1
+        self.data[key] = (None, str(value))
+        return value
+
+
+class RedisBackend(CacheBackend):
+    """Shared backend on Redis. Requires the optional `redis` package."""
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("generation_cache_url is set but the redis package is not installed")
+        self.client = redis.from_url(url, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: str, ttl: int):
+        await self.client.set(key, value, ex=ttl)
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(key)
+
+
+class GenerationCache:
+    """Bounded LRU with TTL in front of an optional shared backend."""
+
+    def __init__(self, max_entries: int, ttl: int, backend: Optional[CacheBackend] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.backend = backend
+        self.entries: OrderedDict[str, tuple[float, GenerationResponse]] = OrderedDict()
+        self.local_version = catalog_version.value
+        self.stats = {"hits": 0, "shared_hits": 0, "misses": 0, "sets": 0, "invalidations": 0}
+
+    async def key(self, profile: UserProfile, num_ideas: int) -> str:
+        """Cache key for this profile at the current catalog version."""
+        if catalog_version.value != self.local_version:
+            # Old keys can no longer be produced; free their memory now
+            self.entries.clear()
+            self.local_version = catalog_version.value
+            self.stats["invalidations"] += 1
+
+        # With a shared backend every worker must agree on the version, so only
+        # the shared counter (bumped by invalidate_shared) goes into the key
+        if self.backend is not None:
+            version = await self.backend.get(SHARED_VERSION_KEY) or "0"
+        else:
+            version = str(self.local_version)
+        return f"binko:generation:{version}:{profile_key(profile, num_ideas)}"
+
+    async def get(self, key: str) -> Optional[GenerationResponse]:
+        entry = self.entries.get(key)
+        if entry is not None:
+            expires_at, response = entry
+            if expires_at >= time.monotonic():
+                self.entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return response
+            del self.entries[key]
+
+        if self.backend is not None:
+            payload = await self.backend.get(key)
+            if payload is not None:
+                response = GenerationResponse.model_validate_json(payload)
+                self._store(key, response)
+                self.stats["shared_hits"] += 1
+                return response
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, response: GenerationResponse):
+        self._store(key, response)
+        self.stats["sets"] += 1
+        if self.backend is not None:
+            await self.backend.set(key, response.model_dump_json(), self.ttl)
+
+    async def invalidate_shared(self):
+        """Bump the shared catalog version so other workers drop their entries too."""
+        if self.backend is not None:
+            await self.backend.incr(SHARED_VERSION_KEY)
+
+    def _store(self, key: str, response: GenerationResponse):
+        self.entries[key] = (time.monotonic() + self.ttl, response)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def get_stats(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["shared_hits"] + self.stats["misses"]
+        hit_rate = (self.stats["hits"] + self.stats["shared_hits"]) / lookups if lookups else 0.0
+        return {
+            **self.stats,
+            "hit_rate": round(hit_rate, 3),
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "catalog_version": catalog_version.value,
+        }
+
+
+def create_backend() -> Optional[CacheBackend]:
+    """Shared backend from settings: "" (none), "memory" or a redis:// URL."""
+    url = settings.generation_cache_url
+    if not url:
+        return None
+    if url == "memory":
+        return InMemoryBackend()
+    return RedisBackend(url)
+
+
+generation_cache = GenerationCache(
+    max_entries=settings.generation_cache_size,
+    ttl=settings.generation_cache_ttl,
+    backend=create_backend(),
+)
@@ -0,0 +1,208 @@
+"""
+Generation jobs: POST /api/generate/jobs returns a job id at once and a
+bounded pool of worker tasks runs generate_ideas in the background.
+
+Clients fetch the result with GET /api/generate/jobs/{id}, optionally
+long-polling with ?wait=. A request for a profile that already has a queued
+or running job gets that job back (deduplicated=true) instead of a new one.
+Finished jobs are kept for settings.generation_job_ttl seconds.
+
+Jobs live in this process (a local stand-in for a persistent job table):
+they are lost on restart, and with several app processes a job can only be
+read from the process that accepted it.
+"""
+import asyncio
+import contextvars
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.config import get_settings
+from app.logging_config import get_logger
+from app.metrics import (
+    generation_job_outcomes,
+    generation_job_queue_depth,
+    generation_job_wait,
+    generation_jobs_running,
+)
+from app.schemas.generation import GenerationJob, GenerationRequest, GenerationResponse
+from app.services.generation import generate_ideas
+from app.services.generation_cache import profile_key
+from app.tracing import trace_span
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class JobQueueFull(Exception):
+    """No room for another queued job."""
+
+
+class Job:
+    __slots__ = (
+        "id", "key", "request", "status", "created_at", "started_at", "finished_at",
+        "result", "error", "finished", "context", "enqueued",
+    )
+
+    def __init__(self, key: str, request: GenerationRequest):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.request = request
+        self.status = QUEUED
+        self.created_at = datetime.now(timezone.utc)
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.result: Optional[GenerationResponse] = None
+        self.error: Optional[str] = None
+        self.finished = asyncio.Event()
+        # Runs in the submitting request's context, so its spans and log lines
+        # carry that request's trace id
+        self.context = contextvars.copy_context()
+        self.enqueued = time.monotonic()
+
+    def to_schema(self, deduplicated: bool = False) -> GenerationJob:
+        return GenerationJob(
+            job_id=self.id,
+            status=self.status,
+            deduplicated=deduplicated,
+            created_at=self.created_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+            result=self.result,
+            error=self.error,
+        )
+
+
+def job_key(request: GenerationRequest) -> str:
+    """Requests with the same key can share a job."""
+    return f"{profile_key(request.profile, request.num_ideas)}:{int(request.use_cache)}{int(request.refresh)}"
+
+
+class GenerationJobs:
+    """Job registry plus a fixed pool of worker tasks fed by a bounded queue."""
+
+    def __init__(self, workers: int, max_queue: int, ttl: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.ttl = ttl
+        self.jobs: dict[str, Job] = {}
+        self.active: dict[str, Job] = {}  # Job key -> queued or running job
+        self.expiry: deque[tuple[float, str]] = deque()  # (expires_at, job id), in finish order
+        self.queue: Optional[asyncio.Queue] = None
+        self.tasks: list[asyncio.Task] = []
+        self.running = 0
+        self.stats = {"submitted": 0, "deduplicated": 0, "rejected": 0, "done": 0, "failed": 0}
+
+    def start(self):
+        """Start the worker tasks (on app startup)."""
+        self.queue = asyncio.Queue()
+        self.tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        logger.info("Started %d generation job workers", self.workers)
+
+    async def stop(self):
+        """Cancel the workers; queued and running jobs are dropped."""
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def submit(self, request: GenerationRequest) -> tuple[Job, bool]:
+        """(job, deduplicated). Raises JobQueueFull. Call on the event loop."""
+        self._purge()
+        key = job_key(request)
+        job = self.active.get(key)
+        if job is not None:
+            self.stats["deduplicated"] += 1
+            generation_job_outcomes.labels("deduplicated").inc()
+            return job, True
+
+        if self.queue is None:
+            raise RuntimeError("Generation job workers are not running")
+        if self.queue.qsize() >= self.max_queue:
+            self.stats["rejected"] += 1
+            generation_job_outcomes.labels("rejected").inc()
+            raise JobQueueFull()
+
+        job = Job(key, request)
+        self.jobs[job.id] = job
+        self.active[key] = job
+        self.queue.put_nowait(job)
+        self.stats["submitted"] += 1
+        generation_job_queue_depth.inc()
+        return job, False
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._purge()
+        return self.jobs.get(job_id)
+
+    async def wait(self, job: Job, timeout: float) -> Job:
+        """Return once the job has finished or after `timeout` seconds."""
+        if timeout > 0 and not job.finished.is_set():
+            try:
+                await asyncio.wait_for(job.finished.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return job
+
+    async def _work(self):
+        while True:
+            job = await self.queue.get()
+            generation_job_queue_depth.dec()
+            # A task per job so it runs in the submitter's context
+            await asyncio.create_task(self._run(job), context=job.context)
+
+    async def _run(self, job: Job):
+        job.status = RUNNING
+        job.started_at = datetime.now(timezone.utc)
+        generation_job_wait.observe(time.monotonic() - job.enqueued)
+        self.running += 1
+        generation_jobs_running.inc()
+        request = job.request
+        try:
+            with trace_span("generation.job", job_id=job.id):
+                job.result = await generate_ideas(
+                    request.profile, request.num_ideas, use_cache=request.use_cache, refresh=request.refresh
+                )
+            job.status = DONE
+        except asyncio.CancelledError:
+            job.status, job.error = FAILED, "Cancelled at shutdown"
+            raise
+        except Exception as e:
+            logger.error("Generation job %s failed: %s", job.id, e, exc_info=True)
+            job.status, job.error = FAILED, "Generation failed"
+        finally:
+            self.running -= 1
+            generation_jobs_running.dec()
+            self.stats[job.status] += 1
+            generation_job_outcomes.labels(job.status).inc()
+            job.finished_at = datetime.now(timezone.utc)
+            self.expiry.append((time.monotonic() + self.ttl, job.id))
+            if self.active.get(job.key) is job:
+                del self.active[job.key]
+            job.finished.set()
+
+    def _purge(self):
+        """Drop finished jobs past their TTL."""
+        now = time.monotonic()
+        while self.expiry and self.expiry[0][0] < now:
+            self.jobs.pop(self.expiry.popleft()[1], None)
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "running": self.running,
+            "workers": self.workers,
+            "kept": len(self.jobs),
+        }
+
+
+generation_jobs = GenerationJobs(
+    workers=settings.generation_job_workers,
+    max_queue=settings.generation_job_max_queue,
+    ttl=settings.generation_job_ttl,
+)
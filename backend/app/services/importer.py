@@ -0,0 +1,248 @@
+"""
+Streaming bulk import of ideas from NDJSON or CSV bodies of any size.
+
+The body is decoded and parsed line by line, each row is validated against
+IdeaCreate and the table's column limits, and valid rows are written with
+Postgres COPY in fixed-size batches. Each batch is copied into a temporary
+staging table and upserted on the content fingerprint, so re-importing a
+dump updates or skips rows instead of duplicating them. Only one batch is
+held in memory. Each batch commits on its own, so a bad row or a failed batch
+is reported without aborting the rest of the import.
+"""
+import codecs
+import csv
+import json
+import time
+import uuid
+from dataclasses import dataclass, field, asdict
+from typing import AsyncIterator, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import column, select, table, text
+from sqlalchemy.dialects.postgresql import insert
+
+from app.database import async_engine
+from app.logging_config import get_logger
+from app.models.idea import Idea
+from app.schemas.idea import IdeaCreate
+from app.services.catalog import catalog_version
+from app.services.catalog_snapshot import catalog_snapshot
+from app.services.dedup import UpsertResult, collect_result, unique_by_fingerprint, upsert_statement
+
+logger = get_logger(__name__)
+
+STAGING_TABLE = "ideas_import_staging"
+STAGING_COLUMNS = ["id", "fingerprint", *IdeaCreate.model_fields]
+staging = table(STAGING_TABLE, *(column(name) for name in STAGING_COLUMNS))
+ARRAY_FIELDS = {name for name in IdeaCreate.model_fields if name in (
+    "skills", "tech_stack", "key_features", "success_factors", "challenges",
+)}
+# varchar(n) limits; COPY would reject the whole batch for one long value
+MAX_LENGTHS = {
+    col.name: col.type.length
+    for col in Idea.__table__.columns
+    if col.name in IdeaCreate.model_fields and getattr(col.type, "length", None)
+}
+MAX_ERRORS_PER_BATCH = 20
+
+
+@dataclass
+class BatchReport:
+    batch: int
+    first_line: int
+    last_line: int
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0  # Unchanged re-imports and repeats within the batch
+    failed: int = 0
+    errors: list[dict] = field(default_factory=list)  # {"line": n, "error": "..."}, capped
+
+    def add_error(self, line: int, error: str):
+        self.failed += 1
+        if len(self.errors) < MAX_ERRORS_PER_BATCH:
+            self.errors.append({"line": line, "error": error})
+
+
+@dataclass
+class ImportReport:
+    format: str
+    rows: int = 0
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+    batches: list[BatchReport] = field(default_factory=list)
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "rows_per_sec": round(self.rows_per_sec, 1)}
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream into lines (without line endings)."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+def parse_array(value: str) -> list[str]:
+    """CSV array cell: a JSON array, or values separated by "|"."""
+    if value.startswith("["):
+        return json.loads(value)
+    return [item.strip() for item in value.split("|") if item.strip()]
+
+
+async def iter_rows(chunks: AsyncIterator[bytes], format: str) -> AsyncIterator[tuple[int, object]]:
+    """Yield (line number, dict or parse error message) for every non-empty row."""
+    header = None
+    pending, start_line = "", 0
+    line_no = 0
+
+    async for line in iter_lines(chunks):
+        line_no += 1
+        if format == "ndjson":
+            if not line.strip():
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, f"Invalid JSON: {e.msg}"
+            continue
+
+        # CSV: quoted fields may span lines, so join until the quotes balance
+        if not pending:
+            start_line = line_no
+            if not line.strip():
+                continue
+        pending = f"{pending}\n{line}" if pending else line
+        if pending.count('"') % 2:
+            continue
+        [cells] = list(csv.reader([pending]))
+        pending = ""
+
+        if header is None:
+            header = [cell.strip() for cell in cells]
+            continue
+        if len(cells) != len(header):
+            yield start_line, f"Expected {len(header)} columns, got {len(cells)}"
+            continue
+        row = {}
+        try:
+            for name, cell in zip(header, cells):
+                if cell == "":
+                    continue
+                row[name] = parse_array(cell) if name in ARRAY_FIELDS else cell
+        except json.JSONDecodeError as e:
+            yield start_line, f"Invalid array value: {e.msg}"
+            continue
+        yield start_line, row
+
+    if pending:
+        yield start_line, "Unterminated quoted field"
+
+
+def validate_row(row) -> tuple[Optional[IdeaCreate], Optional[str]]:
+    if isinstance(row, str):
+        return None, row
+    if not isinstance(row, dict):
+        return None, "Row must be an object"
+    try:
+        idea = IdeaCreate.model_validate(row)
+    except ValidationError as e:
+        errors = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+        return None, errors
+    for name, length in MAX_LENGTHS.items():
+        value = getattr(idea, name)
+        if value is not None and len(value) > length:
+            return None, f"{name}: longer than {length} characters"
+    return idea, None
+
+
+async def copy_batch(ideas: list[IdeaCreate]) -> UpsertResult:
+    """COPY one batch into a staging table and upsert it, in one transaction."""
+    records = [
+        (uuid.uuid4(), fingerprint, *(getattr(idea, name) for name in IdeaCreate.model_fields))
+        for fingerprint, idea in unique_by_fingerprint(ideas).items()
+    ]
+    async with async_engine.begin() as conn:
+        # Runs first so the driver has opened the transaction COPY joins
+        await conn.execute(text(
+            f"CREATE TEMP TABLE {STAGING_TABLE} (LIKE ideas INCLUDING DEFAULTS) ON COMMIT DROP"
+        ))
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            STAGING_TABLE, records=records, columns=STAGING_COLUMNS
+        )
+        stmt = insert(Idea).from_select(STAGING_COLUMNS, select(*staging.c))
+        result = await conn.execute(upsert_statement(stmt))
+        return collect_result(result.all(), len(ideas))
+
+
+async def import_ideas(
+    chunks: AsyncIterator[bytes], format: str, batch_size: int
+) -> ImportReport:
+    """Validate and COPY rows from a streamed body, batch by batch."""
+    start = time.perf_counter()
+    report = ImportReport(format=format)
+    batch: list[IdeaCreate] = []
+    current = None
+
+    async def flush():
+        nonlocal batch, current
+        if batch:
+            try:
+                result = await copy_batch(batch)
+            except Exception as e:
+                logger.error("Import batch %d failed: %s", current.batch, e)
+                current.failed += len(batch)
+                current.errors.append({"line": None, "error": f"Batch failed: {str(e)}"})
+            else:
+                current.inserted = result.inserted
+                current.updated = result.updated
+                current.skipped = result.skipped
+                if result.records:
+                    catalog_version.bump()
+                    catalog_snapshot.apply(upserted=result.records)
+        report.inserted += current.inserted
+        report.updated += current.updated
+        report.skipped += current.skipped
+        report.failed += current.failed
+        report.batches.append(current)
+        batch, current = [], None
+
+    async for line_no, row in iter_rows(chunks, format):
+        if current is None:
+            current = BatchReport(batch=len(report.batches) + 1, first_line=line_no, last_line=line_no)
+        current.last_line = line_no
+        report.rows += 1
+
+        idea, error = validate_row(row)
+        if error:
+            current.add_error(line_no, error)
+        else:
+            batch.append(idea)
+
+        if len(batch) + current.failed >= batch_size:
+            await flush()
+
+    if current is not None:
+        await flush()
+
+    report.elapsed = time.perf_counter() - start
+    logger.info(
+        "Imported %d ideas: %d inserted, %d updated, %d skipped, %d failed in %d batches, %.0f rows/s",
+        report.rows, report.inserted, report.updated, report.skipped, report.failed,
+        len(report.batches), report.rows_per_sec,
+    )
+    return report
@@ -0,0 +1,156 @@
+"""
+Idea ingestion: batched embedding of new and existing rows.
+
+Rows are written without vectors and embedded afterwards in large batches.
+Rows whose content hash already has a stored vector reuse it instead of
+calling the embedder again.
+"""
+import time
+from dataclasses import dataclass, asdict
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.logging_config import get_logger
+from app.models.idea import Idea
+from app.services.embeddings import content_hash, get_embedder, idea_embedding_text
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+
+@dataclass
+class EmbeddingStats:
+    rows: int = 0
+    embedded: int = 0  # Vectors computed by the embedder
+    skipped: int = 0  # Vectors reused because the content hash matched
+    embed_calls: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def add(self, other: "EmbeddingStats"):
+        self.rows += other.rows
+        self.embedded += other.embedded
+        self.skipped += other.skipped
+        self.embed_calls += other.embed_calls
+        self.elapsed += other.elapsed
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "rows_per_sec": round(self.rows_per_sec, 1)}
+
+
+async def embed_batch(db: AsyncSession, ideas: list[Idea]) -> EmbeddingStats:
+    """Embed one batch of rows with a single embedder call and write the vectors."""
+    start = time.perf_counter()
+    stats = EmbeddingStats(rows=len(ideas))
+    if not ideas:
+        return stats
+
+    embedder = get_embedder()
+    texts = {idea.id: idea_embedding_text(idea) for idea in ideas}
+    hashes = {idea_id: content_hash(embedder, text) for idea_id, text in texts.items()}
+
+    # Vectors already stored for any of these hashes (re-imports, duplicates)
+    result = await db.execute(
+        select(Idea.content_hash, Idea.embedding)
+        .where(Idea.content_hash.in_(set(hashes.values())), Idea.embedding.isnot(None))
+        .distinct(Idea.content_hash)
+    )
+    vectors = {row.content_hash: row.embedding for row in result}
+
+    # One embedder call for the unique texts that are still missing
+    missing = {}
+    for idea_id, digest in hashes.items():
+        if digest not in vectors:
+            missing.setdefault(digest, texts[idea_id])
+    if missing:
+        embedded = await embedder.embed(list(missing.values()))
+        vectors.update(zip(missing.keys(), embedded))
+        stats.embed_calls = 1
+        stats.embedded = len(missing)
+    stats.skipped = stats.rows - stats.embedded
+
+    await db.execute(
+        update(Idea),
+        [
+            {"id": idea_id, "content_hash": digest, "embedding": vectors[digest]}
+            for idea_id, digest in hashes.items()
+        ],
+    )
+    await db.commit()
+
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+async def embed_ideas(idea_ids: list[UUID], batch_size: Optional[int] = None) -> EmbeddingStats:
+    """Embed the given rows in batches. Runs as a background task after writes."""
+    batch_size = batch_size or settings.embedding_batch_size
+    stats = EmbeddingStats()
+
+    try:
+        async with AsyncSessionLocal() as db:
+            for i in range(0, len(idea_ids), batch_size):
+                chunk = idea_ids[i:i + batch_size]
+                result = await db.execute(select(Idea).where(Idea.id.in_(chunk)))
+                stats.add(await embed_batch(db, list(result.scalars().all())))
+    except Exception as e:
+        logger.error("Embedding %d new ideas failed: %s", len(idea_ids), e)
+        return stats
+
+    logger.info(
+        "Embedded %d ideas: %d computed, %d reused (%.1f rows/s)",
+        stats.rows, stats.embedded, stats.skipped, stats.rows_per_sec,
+    )
+    return stats
+
+
+# Progress of the most recent backfill, exposed by the ideas API
+backfill_state = {"running": False, "cursor": None, "stats": EmbeddingStats()}
+
+
+async def backfill_embeddings(
+    start_after: Optional[UUID] = None, batch_size: Optional[int] = None
+) -> EmbeddingStats:
+    """Embed every row without a vector, walking the table in id order.
+
+    The cursor is the last processed id. Finished rows no longer match
+    `embedding IS NULL`, so a restarted backfill resumes where it stopped
+    even without passing the cursor back in.
+    """
+    batch_size = batch_size or settings.embedding_batch_size
+    stats = EmbeddingStats()
+    backfill_state.update(running=True, cursor=start_after, stats=stats)
+
+    try:
+        async with AsyncSessionLocal() as db:
+            cursor = start_after
+            while True:
+                query = select(Idea).where(Idea.embedding.is_(None))
+                if cursor is not None:
+                    query = query.where(Idea.id > cursor)
+                result = await db.execute(query.order_by(Idea.id).limit(batch_size))
+                batch = list(result.scalars().all())
+                if not batch:
+                    break
+
+                stats.add(await embed_batch(db, batch))
+                cursor = batch[-1].id
+                backfill_state["cursor"] = cursor
+                logger.info(
+                    "Backfill progress: %d rows, %d reused, %.1f rows/s, cursor %s",
+                    stats.rows, stats.skipped, stats.rows_per_sec, cursor,
+                )
+    except Exception as e:
+        logger.error("Embedding backfill stopped at %s: %s", backfill_state["cursor"], e)
+    finally:
+        backfill_state["running"] = False
+
+    return stats
@@ -0,0 +1,307 @@
+"""
+Process-wide limiters for OpenAI calls.
+
+Every chat call (generation, streaming, call_openai_with_retry) takes a slot
+from llm_limiter first, and every embeddings call one from embedding_limiter;
+OpenAI limits the two models separately. A slot is granted when:
+
+- fewer than max_concurrency calls are in flight,
+- the requests-per-minute and tokens-per-minute buckets have room, and
+- no rate-limit cooldown is running.
+
+Waiting calls are served in FIFO order from a queue of at most
+settings.llm_max_queue. A call whose estimated wait exceeds its deadline is
+refused at once (LimiterRejected with a retry_after hint) instead of queueing
+past it. A 429's Retry-After and the x-ratelimit-* headers of successful
+responses pause or shrink the buckets, so bursts slow down before OpenAI
+starts refusing them.
+"""
+import asyncio
+import re
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from openai import RateLimitError
+
+from app.config import get_settings
+from app.logging_config import get_logger
+from app.metrics import (
+    limiter_cooldowns,
+    limiter_in_flight,
+    limiter_queue_depth,
+    limiter_rejections,
+    limiter_wait,
+)
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+DURATION_SECONDS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+DEFAULT_COOLDOWN = 1.0  # Seconds, for a 429 without Retry-After
+
+
+def parse_duration(value: str) -> Optional[float]:
+    """Seconds in an OpenAI reset header ("1s", "6m0s", "20ms")."""
+    parts = DURATION_PART.findall(value or "")
+    if not parts:
+        return None
+    return sum(float(number) * DURATION_SECONDS[unit] for number, unit in parts)
+
+
+class LimiterRejected(Exception):
+    """The call was refused; retry_after is the estimated wait in seconds."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"OpenAI limiter refused call ({reason}), retry in {retry_after:.1f}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Refills per_minute units per minute, up to per_minute. 0 means unlimited."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        if self.capacity:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float, now: float) -> float:
+        """Seconds until `amount` (capped at capacity) can be taken."""
+        if not self.capacity:
+            return 0.0
+        self.refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return missing / self.rate if missing > 0 else 0.0
+
+    def take(self, amount: float):
+        if self.capacity:
+            self.level -= amount  # May go negative; later calls wait it off
+
+    def sync(self, remaining: int, now: float):
+        """Lower the level to what the API reports as remaining."""
+        if self.capacity:
+            self.refill(now)
+            self.level = min(self.level, remaining)
+
+
+class Waiter:
+    __slots__ = ("tokens", "future")
+
+    def __init__(self, tokens: int, future: asyncio.Future):
+        self.tokens = tokens
+        self.future = future
+
+
+class Slot:
+    """A granted call. Report the actual token usage with used()."""
+
+    __slots__ = ("limiter", "reserved", "waited")
+
+    def __init__(self, limiter: "LLMLimiter", reserved: int, waited: float):
+        self.limiter = limiter
+        self.reserved = reserved
+        self.waited = waited
+
+    def used(self, tokens: Optional[int]):
+        """Replace the reservation with the actual usage in the token bucket."""
+        if tokens is not None:
+            self.limiter.tokens.take(tokens - self.reserved)
+            self.reserved = tokens
+
+
+class LLMLimiter:
+    def __init__(
+        self,
+        max_concurrency: int,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_queue: int,
+        max_wait: float,
+        name: str = "chat",
+    ):
+        self.name = name  # Metric label
+        self.max_concurrency = max_concurrency or float("inf")
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.active = 0
+        self.waiters: deque[Waiter] = deque()
+        self.cooldown_until = 0.0
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.stats = {"admitted": 0, "queued": 0, "rejected": 0, "cooldowns": 0}
+
+    def _delay(self, tokens: int, queued_requests: int, queued_tokens: int, now: float) -> float:
+        return max(
+            self.cooldown_until - now,
+            self.requests.delay(queued_requests + 1, now),
+            self.tokens.delay(queued_tokens + tokens, now),
+        )
+
+    def estimated_wait(self, tokens: int) -> float:
+        """Bucket and cooldown wait for a new call behind the current queue.
+
+        Ignores the concurrency cap, so it is a lower bound when all slots are busy.
+        """
+        queued_tokens = sum(waiter.tokens for waiter in self.waiters)
+        return self._delay(tokens, len(self.waiters), queued_tokens, time.monotonic())
+
+    def _reject(self, reason: str, retry_after: float):
+        self.stats["rejected"] += 1
+        limiter_rejections.labels(self.name, reason).inc()
+        raise LimiterRejected(reason, retry_after)
+
+    async def acquire(self, tokens: int, max_wait: Optional[float] = None) -> float:
+        """Wait for a slot; returns the seconds waited. Raises LimiterRejected."""
+        max_wait = self.max_wait if max_wait is None else max_wait
+        start = time.monotonic()
+
+        if not self.waiters and self.active < self.max_concurrency and self._delay(tokens, 0, 0, start) <= 0:
+            self._admit(tokens)
+            limiter_wait.labels(self.name).observe(0)
+            return 0.0
+
+        if len(self.waiters) >= self.max_queue:
+            self._reject("queue_full", self.estimated_wait(tokens))
+        wait = self.estimated_wait(tokens)
+        if wait > max_wait:
+            self._reject("deadline", wait)
+
+        waiter = Waiter(tokens, asyncio.get_running_loop().create_future())
+        self.waiters.append(waiter)
+        self.stats["queued"] += 1
+        limiter_queue_depth.labels(self.name).inc()
+        self._dispatch()
+        try:
+            await asyncio.wait_for(waiter.future, max_wait - (time.monotonic() - start))
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release()  # Granted just as the wait ended
+            if isinstance(e, asyncio.TimeoutError):
+                self._reject("timeout", self.estimated_wait(tokens))
+            raise
+        finally:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+                limiter_queue_depth.labels(self.name).dec()
+
+        waited = time.monotonic() - start
+        limiter_wait.labels(self.name).observe(waited)
+        return waited
+
+    def _admit(self, tokens: int):
+        self.requests.take(1)
+        self.tokens.take(tokens)
+        self.active += 1
+        self.stats["admitted"] += 1
+        limiter_in_flight.labels(self.name).inc()
+
+    def _dispatch(self):
+        """Grant slots to queued calls in order; re-arm a timer if the head must wait."""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        now = time.monotonic()
+        while self.waiters and self.active < self.max_concurrency:
+            waiter = self.waiters[0]
+            if waiter.future.done():  # Timed out or cancelled
+                self.waiters.popleft()
+                limiter_queue_depth.labels(self.name).dec()
+                continue
+            delay = self._delay(waiter.tokens, 0, 0, now)
+            if delay > 0:
+                self.timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+            self.waiters.popleft()
+            limiter_queue_depth.labels(self.name).dec()
+            self._admit(waiter.tokens)
+            waiter.future.set_result(None)
+
+    def release(self):
+        self.active -= 1
+        limiter_in_flight.labels(self.name).dec()
+        if self.waiters:
+            self._dispatch()
+
+    def cooldown(self, seconds: float):
+        """Admit nothing for `seconds`."""
+        until = time.monotonic() + seconds
+        if until > self.cooldown_until:
+            self.cooldown_until = until
+            self.stats["cooldowns"] += 1
+            limiter_cooldowns.labels(self.name).inc()
+            logger.warning("OpenAI rate limited, pausing %s calls for %.1fs", self.name, seconds)
+
+    def rate_limited(self, headers):
+        """Pause after a 429, for Retry-After (or retry-after-ms) when given."""
+        retry_after = None
+        if headers is not None:
+            if headers.get("retry-after-ms"):
+                retry_after = float(headers["retry-after-ms"]) / 1000
+            elif headers.get("retry-after"):
+                try:
+                    retry_after = float(headers["retry-after"])
+                except ValueError:
+                    retry_after = None  # HTTP-date form; not sent by OpenAI
+        self.cooldown(retry_after or DEFAULT_COOLDOWN)
+
+    def observe_headers(self, headers):
+        """Align the buckets with x-ratelimit-remaining-*; pause until reset if exhausted."""
+        now = time.monotonic()
+        for kind, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            if remaining is None or not remaining.isdigit():
+                continue
+            bucket.sync(int(remaining), now)
+            if int(remaining) == 0:
+                reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}", ""))
+                self.cooldown(reset or DEFAULT_COOLDOWN)
+
+    @asynccontextmanager
+    async def slot(self, tokens: int, max_wait: Optional[float] = None):
+        """`async with llm_limiter.slot(estimated_tokens) as slot:` around one OpenAI call."""
+        waited = await self.acquire(tokens, max_wait)
+        try:
+            yield Slot(self, tokens, waited)
+        except RateLimitError as e:
+            self.rate_limited(e.response.headers if e.response is not None else None)
+            raise
+        finally:
+            self.release()
+
+    def get_stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            **self.stats,
+            "in_flight": self.active,
+            "queue_depth": len(self.waiters),
+            "cooldown_remaining": round(max(0.0, self.cooldown_until - now), 2),
+            "requests_available": round(self.requests.level, 1) if self.requests.capacity else None,
+            "tokens_available": round(self.tokens.level) if self.tokens.capacity else None,
+        }
+
+
+llm_limiter = LLMLimiter(
+    max_concurrency=settings.llm_max_concurrency,
+    requests_per_minute=settings.rate_limit_per_minute,
+    tokens_per_minute=settings.llm_tokens_per_minute,
+    max_queue=settings.llm_max_queue,
+    max_wait=settings.llm_max_queue_wait,
+)
+embedding_limiter = LLMLimiter(
+    max_concurrency=settings.embedding_max_concurrency,
+    requests_per_minute=settings.embedding_requests_per_minute,
+    tokens_per_minute=settings.embedding_tokens_per_minute,
+    max_queue=settings.llm_max_queue,
+    max_wait=settings.llm_max_queue_wait,
+    name="embeddings",
+)
@@ -4,11 +4,25 @@ Import and use instead of direct OpenAI calls in generation.py
 """
 import json
 import asyncio
+import math
 from openai import AsyncOpenAI, APIError, RateLimitError, APIConnectionError
 from fastapi import HTTPException, status
+from app.config import get_settings
 from app.logging_config import get_logger
+from app.metrics import LLMCall, llm_retries
+from app.services.llm_limiter import LimiterRejected, llm_limiter
+from app.services.prompt_budget import get_tokenizer
 
 logger = get_logger(__name__)
+settings = get_settings()
+
+
+def busy_error(retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="AI service rate limit reached. Try again in a moment.",
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
 
 
 async def call_openai_with_retry(
@@ -20,51 +34,72 @@ async def call_openai_with_retry(
     """
     Call OpenAI with exponential backoff retry.
 
-    Retries on connection errors and API errors.
-    Fails fast on rate limits.
+    Every attempt waits for a slot in the shared OpenAI limiter. Retries on
+    connection errors and API errors; a rate limit pauses the limiter for
+    Retry-After and the next attempt waits it out. If the limiter cannot
+    admit the call in time, fails fast with a 429 and a Retry-After hint.
     Returns parsed JSON dict or raises HTTPException.
     """
+    tokenizer = get_tokenizer()
+    estimate = (
+        tokenizer.count(system_prompt) + tokenizer.count(user_prompt) + settings.llm_completion_token_estimate
+    )
+
     for attempt in range(max_retries):
         try:
-            logger.info(f"OpenAI call attempt {attempt + 1}/{max_retries}")
+            logger.info("OpenAI call attempt %d/%d", attempt + 1, max_retries)
+            if attempt > 0:
+                llm_retries.labels("chat").inc()
 
-            response = await client.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.8,
-                max_tokens=2000,
-            )
+            async with llm_limiter.slot(estimate) as slot:
+                with LLMCall("chat") as call:
+                    raw = await client.chat.completions.with_raw_response.create(
+                        model="gpt-4-turbo-preview",
+                        messages=[
+                            {"role": "system", "content": system_prompt},
+                            {"role": "user", "content": user_prompt},
+                        ],
+                        response_format={"type": "json_object"},
+                        temperature=0.8,
+                        max_tokens=2000,
+                    )
+                llm_limiter.observe_headers(raw.headers)
+                response = raw.parse()
+                call.usage(response.usage)
+                if response.usage is not None:
+                    slot.used(response.usage.total_tokens)
 
             result = json.loads(response.choices[0].message.content)
             logger.info("OpenAI call successful")
             return result
 
+        except LimiterRejected as e:
+            logger.warning("%s", e)
+            raise busy_error(e.retry_after)
+
+        # Before APIError, which it subclasses
+        except RateLimitError as e:
+            if attempt < max_retries - 1:
+                logger.warning("OpenAI rate limit hit, retrying after the limiter cooldown")
+            else:
+                logger.error("OpenAI rate limit hit")
+                raise busy_error(llm_limiter.estimated_wait(estimate))
+
         except (APIConnectionError, APIError) as e:
             if attempt < max_retries - 1:
                 wait_time = 2 ** attempt  # 1s, 2s, 4s
-                logger.warning(f"OpenAI error, retrying in {wait_time}s: {str(e)}")
+                logger.warning("OpenAI error, retrying in %ss: %s", wait_time, e)
                 await asyncio.sleep(wait_time)
             else:
-                logger.error(f"OpenAI call failed after {max_retries} attempts")
+                logger.error("OpenAI call failed after %d attempts", max_retries)
                 raise HTTPException(
                     status_code=status.HTTP_502_BAD_GATEWAY,
                     detail="AI service error. Try again later."
                 )
 
-        except RateLimitError as e:
-            logger.error("OpenAI rate limit hit")
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail="AI service rate limit reached. Try again in a moment."
-            )
-
         except json.JSONDecodeError as e:
             if attempt < max_retries - 1:
-                logger.warning(f"JSON parse error, retrying: {str(e)}")
+                logger.warning("JSON parse error, retrying: %s", e)
                 await asyncio.sleep(1)
             else:
                 logger.error("Failed to parse JSON after retries")
@@ -0,0 +1,150 @@
+"""
+Token accounting for generation prompts.
+
+Prompts are assembled from fragments whose token counts are known, so the
+builder can keep the user prompt within settings.prompt_token_budget by
+dropping the lowest-ranked inspiration ideas. Idea fragments are cached by
+(id, updated_at): repeated generations reuse the formatted text and its count
+instead of re-formatting and re-tokenizing the same rows.
+
+Token counts use tiktoken when it is installed (optional dependency) and a
+conservative local approximation otherwise.
+"""
+import math
+import re
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from app.config import get_settings
+from app.logging_config import get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+PIECE_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+class Tokenizer(ABC):
+    name: str
+
+    @abstractmethod
+    def count(self, text: str) -> int:
+        ...
+
+    @abstractmethod
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Text cut to at most max_tokens, with an ellipsis if anything was cut."""
+
+
+class TiktokenTokenizer(Tokenizer):
+    """Exact BPE counts for OpenAI models. Requires the optional `tiktoken` package."""
+
+    def __init__(self, model: str):
+        import tiktoken
+
+        try:
+            self.encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            self.encoding = tiktoken.get_encoding("cl100k_base")
+        self.name = f"tiktoken:{self.encoding.name}"
+
+    def count(self, text: str) -> int:
+        return len(self.encoding.encode(text))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        tokens = self.encoding.encode(text)
+        if len(tokens) <= max_tokens:
+            return text
+        return self.encoding.decode(tokens[:max(max_tokens - 1, 0)]).rstrip() + "…"
+
+
+class ApproxTokenizer(Tokenizer):
+    """Offline estimate: one token per punctuation mark, one per ~4 word characters.
+
+    Errs on the high side for English text, so budgets hold with either tokenizer.
+    """
+
+    name = "approx"
+
+    def token_ends(self, text: str):
+        """End offset of each estimated token."""
+        for match in PIECE_PATTERN.finditer(text):
+            start, end = match.span()
+            pieces = max(1, math.ceil((end - start) / 4))
+            step = math.ceil((end - start) / pieces)
+            yield from (min(i + step, end) for i in range(start, end, step))
+
+    def count(self, text: str) -> int:
+        return sum(1 for _ in self.token_ends(text))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        keep = max(max_tokens - 1, 0)
+        cut = 0
+        for n, end in enumerate(self.token_ends(text), start=1):
+            if n > max_tokens:
+                return text[:cut].rstrip() + "…"
+            if n <= keep:
+                cut = end
+        return text
+
+
+@lru_cache
+def get_tokenizer() -> Tokenizer:
+    """tiktoken if available (or requested), else the approximation."""
+    if settings.prompt_tokenizer in ("auto", "tiktoken"):
+        try:
+            return TiktokenTokenizer(settings.prompt_tokenizer_model)
+        except ImportError:
+            if settings.prompt_tokenizer == "tiktoken":
+                raise RuntimeError("prompt_tokenizer is tiktoken but the tiktoken package is not installed")
+            logger.info("tiktoken not installed, using approximate prompt token counts")
+    return ApproxTokenizer()
+
+
+class FragmentCache:
+    """LRU of formatted idea fragments and their token counts, keyed by (id, version)."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: OrderedDict[tuple, tuple[str, int]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, key: tuple, build) -> tuple[str, int]:
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        text = build()
+        entry = (text, get_tokenizer().count(text))
+        self.entries[key] = entry
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return entry
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+fragment_cache = FragmentCache(max_entries=settings.prompt_fragment_cache_size)
+
+
+@dataclass
+class PromptBuild:
+    text: str
+    tokens: int  # Sum of fragment counts (fragments are joined at line breaks)
+    budget: int
+    ideas_used: int = 0
+    ideas_dropped: int = 0
+    truncated_fields: list[str] = field(default_factory=list)
@@ -0,0 +1,295 @@
+"""
+Streaming generation: emits each idea as soon as its JSON object is complete.
+
+The model streams one JSON document ({"profile_summary": ..., "ideas": [...]}).
+IdeaStreamParser scans the text as it arrives and hands back every finished
+object of the top-level "ideas" array, so validation and delivery of the first
+idea does not wait for the rest of the completion. Acceptance and top-up
+prompts are shared with generate_with_retries.
+"""
+import json
+from contextlib import aclosing
+from typing import AsyncIterator, Optional
+
+from openai.types import CompletionUsage
+
+from app.database import generation_session
+from app.logging_config import get_logger
+from app.metrics import LLMCall, fallback_activations, llm_retries
+from app.schemas.generation import GeneratedIdea, GenerationResponse
+from app.schemas.profile import UserProfile
+from app.services.generation import (
+    GENERATION_MODEL,
+    MAX_RETRIES,
+    SYSTEM_PROMPT,
+    accept_ideas,
+    build_topup_prompt,
+    client,
+    estimate_call_tokens,
+    generation_stats,
+    get_fallback_ideas,
+    get_matching_ideas,
+    prepare_prompt,
+    template_tokens,
+)
+from app.services.generation_cache import generation_cache
+from app.services.llm_limiter import LimiterRejected, llm_limiter
+from app.services.prompt_budget import get_tokenizer
+from app.tracing import get_tracer
+
+logger = get_logger(__name__)
+
+
+class IdeaStreamParser:
+    """Incremental scanner for the top-level "ideas" array of a JSON object."""
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.string_start = 0
+        self.last_key = None
+        self.expect_value = False
+        self.fields = {}  # Top-level string values seen so far (e.g. profile_summary)
+        self.in_ideas = False
+        self.object_start = None
+
+    def feed(self, chunk: str) -> list[dict]:
+        """Add text and return the ideas completed by it."""
+        self.buffer += chunk
+        completed = []
+        buffer = self.buffer
+
+        for i in range(self.pos, len(buffer)):
+            char = buffer[i]
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.depth == 1:
+                        value = json.loads(buffer[self.string_start:i + 1])
+                        if self.expect_value:
+                            self.fields[self.last_key] = value
+                        else:
+                            self.last_key = value
+                continue
+
+            if char == '"':
+                self.in_string = True
+                self.string_start = i
+            elif self.depth == 1 and char in ":,":
+                self.expect_value = char == ":"
+            elif char in "{[":
+                if char == "[" and self.depth == 1 and self.last_key == "ideas":
+                    self.in_ideas = True
+                elif char == "{" and self.in_ideas and self.depth == 2:
+                    self.object_start = i
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if char == "}" and self.in_ideas and self.depth == 2:
+                    try:
+                        completed.append(json.loads(buffer[self.object_start:i + 1]))
+                    except json.JSONDecodeError:
+                        logger.warning("Skipping malformed idea object in stream")
+                    self.object_start = None
+                elif char == "]" and self.in_ideas and self.depth == 1:
+                    self.in_ideas = False
+
+        self.pos = len(buffer)
+        return completed
+
+    def result(self) -> dict:
+        """The whole document, or the top-level string fields seen if it is incomplete."""
+        try:
+            return json.loads(self.buffer)
+        except json.JSONDecodeError:
+            return dict(self.fields)
+
+
+def chunk_usage(chunk) -> Optional[CompletionUsage]:
+    """Usage sent in the last chunk of a stream requested with include_usage."""
+    usage = getattr(chunk, "usage", None)
+    if isinstance(usage, dict):  # Not a declared chunk field in this SDK version
+        usage = CompletionUsage(**usage)
+    return usage
+
+
+async def stream_attempt(
+    prompt: str,
+    profile: UserProfile,
+    num_ideas: int,
+    accepted: list[GeneratedIdea],
+    rejections: list[dict],
+    parser: "IdeaStreamParser",
+    label: str,
+) -> AsyncIterator[tuple[str, dict]]:
+    """One streamed completion: yield ("idea" | "rejected", data) as ideas complete.
+
+    Ideas go through accept_ideas, so they are checked against the ideas
+    accepted so far (duplicate titles included) exactly as in
+    generate_with_retries. Reports the token usage to the limiter when the
+    stream ends; a stream closed early reports the tokens streamed so far.
+    Raises LimiterRejected if no limiter slot is free in time.
+    """
+    # Not made current: the span stays open across yields to the response
+    span = get_tracer().start_span("generation.llm", {"model": GENERATION_MODEL, "stream": True})
+    call = None
+    error = None
+    received = 0
+    usage = None
+    try:
+        # Holds a limiter slot for the whole stream
+        async with llm_limiter.slot(estimate_call_tokens(prompt)) as slot:
+            span.set_attribute("queue_wait_ms", round(slot.waited * 1e3, 1))
+            # Covers the whole stream, so the latency is time to the last idea used
+            call = LLMCall("generate_stream")
+            stream = await client.chat.completions.create(
+                model=GENERATION_MODEL,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt},
+                ],
+                response_format={"type": "json_object"},
+                temperature=0.8,
+                stream=True,
+                # A last chunk with the usage (stream_options is not a parameter of this SDK version)
+                extra_body={"stream_options": {"include_usage": True}},
+            )
+            try:
+                async for chunk in stream:
+                    usage = chunk_usage(chunk) or usage
+                    if not chunk.choices or not chunk.choices[0].delta.content:
+                        continue
+
+                    for idea in parser.feed(chunk.choices[0].delta.content):
+                        if len(accepted) >= num_ideas:
+                            break
+                        received += 1
+                        count = len(accepted)
+                        accept_ideas([idea], profile, num_ideas, accepted, rejections, label)
+                        if len(accepted) > count:
+                            yield "idea", accepted[-1].model_dump(mode="json")
+                        else:
+                            yield "rejected", rejections[-1]
+
+                    if len(accepted) >= num_ideas:
+                        break
+            finally:
+                # Stop paying for tokens we will not use
+                await stream.close()
+                if usage is not None:
+                    call.usage(usage)
+                    slot.used(usage.total_tokens)
+                else:
+                    # Closed before the usage chunk: count what was sent and streamed
+                    tokenizer = get_tokenizer()
+                    slot.used(
+                        template_tokens(SYSTEM_PROMPT) + tokenizer.count(prompt) + tokenizer.count(parser.buffer)
+                    )
+    except LimiterRejected as e:
+        error = e
+        span.record_exception(e)
+        raise
+    except Exception as e:
+        error = e
+        span.record_exception(e)
+        logger.error("%s: Streaming generation error: %s", label, e)
+    except BaseException as e:
+        # The client disconnected (GeneratorExit / CancelledError); still record the call
+        error = e
+        span.set_attribute("cancelled", True)
+        raise
+    finally:
+        if call is not None:
+            call.finish(error)
+        generation_stats["attempts"] += 1
+        span.set_attributes({"received": received, "accepted": len(accepted)})
+        if usage is not None:
+            span.set_attributes({
+                "prompt_tokens": usage.prompt_tokens,
+                "completion_tokens": usage.completion_tokens,
+            })
+        span.end()
+
+
+async def stream_generation(
+    profile: UserProfile,
+    num_ideas: int,
+    use_cache: bool = True,
+    refresh: bool = False,
+) -> AsyncIterator[tuple[str, dict]]:
+    """Yield ("idea" | "rejected" | "profile_summary", data) events.
+
+    Valid ideas are yielded as they complete; the last event is always
+    profile_summary. Like generate_with_retries, ideas still missing after a
+    stream are asked for with a top-up prompt, at most MAX_RETRIES streams in
+    all, and then topped up from fallback ideas.
+    """
+    cache_key = await generation_cache.key(profile, num_ideas)
+    if use_cache and not refresh:
+        cached = await generation_cache.get(cache_key)
+        if cached is not None:
+            for idea in cached.ideas:
+                yield "idea", idea.model_dump(mode="json")
+            yield "profile_summary", {"profile_summary": cached.profile_summary}
+            return
+
+    # Release the connection before the LLM call; it may stream for a minute
+    async with generation_session() as db:
+        source_ideas = await get_matching_ideas(profile, db)
+
+    accepted: list[GeneratedIdea] = []
+    rejections: list[dict] = []
+    profile_summary = ""
+    generation_stats["requests"] += 1
+
+    for attempt in range(MAX_RETRIES):
+        missing = num_ideas - len(accepted)
+        if attempt == 0:
+            prompt = prepare_prompt(profile, source_ideas, num_ideas).text
+        else:
+            prompt = build_topup_prompt(profile, accepted, rejections, missing)
+            llm_retries.labels("generate_stream").inc()
+
+        parser = IdeaStreamParser()
+        events = stream_attempt(
+            prompt, profile, num_ideas, accepted, rejections, parser, f"Stream attempt {attempt + 1}"
+        )
+        try:
+            # Closed here, not when collected, so a client that leaves frees the slot at once
+            async with aclosing(events):
+                async for event in events:
+                    yield event
+        except LimiterRejected as e:
+            # OpenAI capacity is exhausted; more attempts would only queue again
+            logger.warning("Stream attempt %d: %s", attempt + 1, e)
+            break
+        finally:
+            profile_summary = profile_summary or parser.result().get("profile_summary", "")
+
+        if len(accepted) >= num_ideas:
+            break
+
+    if len(accepted) < num_ideas:
+        logger.warning("Only %d/%d streamed ideas passed validation", len(accepted), num_ideas)
+        generation_stats["fallback_requests"] += 1
+        fallback_activations.labels("stream").inc()
+        async with generation_session() as db:
+            fallback = await get_fallback_ideas(profile, num_ideas - len(accepted), db)
+        for idea_obj in fallback.ideas:
+            yield "idea", idea_obj.model_dump(mode="json")
+        profile_summary = profile_summary or fallback.profile_summary
+    elif use_cache:
+        await generation_cache.set(
+            cache_key,
+            GenerationResponse(ideas=accepted[:num_ideas], profile_summary=profile_summary),
+        )
+
+    yield "profile_summary", {"profile_summary": profile_summary}
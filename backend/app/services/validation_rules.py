@@ -0,0 +1,110 @@
+"""
+Keyword rule sets for idea validation, compiled once at import time.
+
+Each rule set becomes a single word-boundary-aware regex built from a keyword
+trie, so matching cost stays flat as rule sets grow, and "vue" no longer
+matches inside "revenue". Keywords also match with a plural ending
+("subscriptions", "enterprises"). Rule sets can be extended or replaced with a
+JSON file (settings.validation_rules_file) mapping rule set names to keyword
+lists.
+"""
+import json
+import re
+from typing import Optional
+
+from app.config import get_settings
+from app.logging_config import get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+DEFAULT_RULE_SETS = {
+    # Paid services/tools (rejected for free budgets)
+    "paid": [
+        "aws", "azure", "gcp", "heroku", "vercel pro", "netlify pro",
+        "mongodb atlas", "planetscale", "supabase pro", "firebase blaze",
+        "stripe", "openai api", "anthropic", "replicate",
+        "cloudflare pro", "sendgrid paid", "twilio",
+        "premium", "paid", "subscription", "enterprise",
+    ],
+    # Expensive services (rejected for <$100 budgets)
+    "expensive": [
+        "aws", "azure", "gcp", "enterprise", "premium tier",
+        "openai api", "anthropic",
+    ],
+    # Complex frameworks or architectures (rejected for beginners)
+    "advanced": [
+        "kubernetes", "docker compose", "microservices", "redis",
+        "elasticsearch", "kafka", "graphql", "websockets",
+        "nextjs", "remix", "svelte", "vue", "angular",
+        "terraform", "ci/cd", "jenkins", "github actions",
+    ],
+}
+
+
+def trie_pattern(keywords: list[str]) -> str:
+    """Regex for a keyword trie: shared prefixes are matched once, so the
+    engine does not retry every keyword at every position of the text."""
+    trie: dict = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}  # End of keyword
+
+    def build(node: dict) -> str:
+        ends = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if ends:
+            # Prefer the longer keyword ("premium tier" over "premium"); boundary check backtracks
+            body = f"(?:{body})?"
+        return body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """Matches any of a set of keywords as whole words in one regex scan."""
+
+    def __init__(self, keywords: list[str]):
+        self.keywords = sorted({k.strip().lower() for k in keywords if k.strip()}, key=len, reverse=True)
+        if self.keywords:
+            # \w boundaries on both sides, so "vue" does not match inside "revenue";
+            # an optional plural ending, so "subscriptions" still matches "subscription"
+            self.pattern = re.compile(rf"(?<!\w){trie_pattern(self.keywords)}(?:e?s)?(?!\w)")
+        else:
+            self.pattern = None
+
+    def search(self, text: str) -> Optional[str]:
+        """First keyword found in text (already lowercased), or None."""
+        if self.pattern is None:
+            return None
+        match = self.pattern.search(text)
+        return match.group(0) if match else None
+
+
+def load_rule_sets(path: str = "") -> dict[str, list[str]]:
+    """Default rule sets, with any sets from the JSON file replacing them."""
+    rule_sets = {name: list(keywords) for name, keywords in DEFAULT_RULE_SETS.items()}
+    if not path:
+        return rule_sets
+
+    try:
+        with open(path) as f:
+            overrides = json.load(f)
+        rule_sets.update({name: list(keywords) for name, keywords in overrides.items()})
+        logger.info("Loaded validation rules from %s: %s", path, ", ".join(overrides))
+    except (OSError, ValueError, AttributeError, TypeError) as e:
+        logger.error("Could not load validation rules from %s, using defaults: %s", path, e)
+
+    return rule_sets
+
+
+def compile_rules(rule_sets: dict[str, list[str]]) -> dict[str, KeywordMatcher]:
+    return {name: KeywordMatcher(keywords) for name, keywords in rule_sets.items()}
+
+
+RULES = compile_rules(load_rule_sets(settings.validation_rules_file))
@@ -0,0 +1,239 @@
+"""
+Tracing spans for the request and generation pipeline.
+
+The span API mirrors OpenTelemetry (start_as_current_span / start_span,
+set_attribute, record_exception, end) and ids follow W3C Trace Context, so
+an incoming `traceparent` header continues the caller's trace. Finished
+spans go to the exporter chosen by settings.tracing_exporter:
+
+- "memory": a bounded buffer of recent spans, served at GET /traces
+- "stdout": one JSON line per span
+- "otel": spans are created with the OpenTelemetry API instead (optional
+  `opentelemetry-api` package; exporters are configured by its SDK)
+- "none": no spans and no trace ids
+
+The current trace id is added to every log line (see logging_config).
+"""
+import json
+import random
+import re
+import sys
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Optional
+
+from app.config import get_settings
+
+settings = get_settings()
+
+TRACEPARENT_PATTERN = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "status", "exporter")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: dict, exporter):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.status = "ok"
+        self.exporter = exporter
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: dict):
+        self.attributes.update(attributes)
+
+    def record_exception(self, exc: BaseException):
+        self.status = "error"
+        self.attributes["exception.type"] = type(exc).__name__
+        self.attributes["exception.message"] = str(exc)
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.exporter.export(self)
+
+    def to_dict(self) -> dict:
+        end_ns = self.end_ns or time.time_ns()
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_ns / 1e9,
+            "duration_ms": round((end_ns - self.start_ns) / 1e6, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class NoopSpan:
+    trace_id = None
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, attributes):
+        pass
+
+    def record_exception(self, exc):
+        pass
+
+    def end(self):
+        pass
+
+
+NOOP_SPAN = NoopSpan()
+
+
+class MemoryExporter:
+    """Keeps the last `max_spans` finished spans for GET /traces."""
+
+    def __init__(self, max_spans: int):
+        self.spans: deque[Span] = deque(maxlen=max_spans)
+
+    def export(self, span: Span):
+        self.spans.append(span)
+
+    def get_trace(self, trace_id: str) -> list[dict]:
+        spans = [span for span in self.spans if span.trace_id == trace_id]
+        return [span.to_dict() for span in sorted(spans, key=lambda span: span.start_ns)]
+
+    def recent_traces(self, limit: int) -> list[dict]:
+        """Newest traces first: root span name, span count and duration."""
+        traces: OrderedDict[str, dict] = OrderedDict()
+        for span in reversed(self.spans):
+            trace = traces.setdefault(span.trace_id, {"trace_id": span.trace_id, "spans": 0, "root": None})
+            trace["spans"] += 1
+            if span.parent_id is None or trace["root"] is None:
+                trace["root"] = {"name": span.name, "duration_ms": span.to_dict()["duration_ms"]}
+        return list(traces.values())[:limit]
+
+
+class StdoutExporter:
+    def export(self, span: Span):
+        sys.stdout.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """Built-in tracer; spans go to `exporter` when they end."""
+
+    def __init__(self, exporter):
+        self.exporter = exporter
+
+    def start_span(
+        self, name: str, attributes: Optional[dict] = None, traceparent: Optional[str] = None
+    ) -> Span:
+        """Child of the current span (or of `traceparent`), not made current.
+
+        For work that cannot sit in one `with` block, e.g. across the yields
+        of a streaming generator; call end() when done.
+        """
+        parent = current_span.get()
+        if parent is not None:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        else:
+            match = TRACEPARENT_PATTERN.match(traceparent or "")
+            if match:
+                trace_id, parent_id = match.groups()
+            else:
+                trace_id, parent_id = f"{random.getrandbits(128):032x}", None
+        return Span(name, trace_id, parent_id, dict(attributes or {}), self.exporter)
+
+    @contextmanager
+    def start_as_current_span(
+        self, name: str, attributes: Optional[dict] = None, traceparent: Optional[str] = None
+    ):
+        span = self.start_span(name, attributes, traceparent)
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            current_span.reset(token)
+            span.end()
+
+    def current_trace_id(self) -> Optional[str]:
+        span = current_span.get()
+        return span.trace_id if span is not None else None
+
+
+class NoopTracer:
+    exporter = None
+
+    def start_span(self, name, attributes=None, traceparent=None):
+        return NOOP_SPAN
+
+    @contextmanager
+    def start_as_current_span(self, name, attributes=None, traceparent=None):
+        yield NOOP_SPAN
+
+    def current_trace_id(self):
+        return None
+
+
+class OTelTracer:
+    """Spans through the OpenTelemetry API. Requires the optional `opentelemetry-api` package."""
+
+    exporter = None
+
+    def __init__(self):
+        try:
+            from opentelemetry import propagate, trace
+        except ImportError:
+            raise RuntimeError("tracing_exporter is otel but the opentelemetry-api package is not installed")
+        self.trace = trace
+        self.propagate = propagate
+        self.tracer = trace.get_tracer("binko")
+
+    def _context(self, traceparent: Optional[str]):
+        if traceparent and not self.trace.get_current_span().get_span_context().is_valid:
+            return self.propagate.extract({"traceparent": traceparent})
+        return None
+
+    def start_span(self, name, attributes=None, traceparent=None):
+        return self.tracer.start_span(name, context=self._context(traceparent), attributes=attributes)
+
+    def start_as_current_span(self, name, attributes=None, traceparent=None):
+        return self.tracer.start_as_current_span(
+            name, context=self._context(traceparent), attributes=attributes
+        )
+
+    def current_trace_id(self) -> Optional[str]:
+        context = self.trace.get_current_span().get_span_context()
+        return f"{context.trace_id:032x}" if context.is_valid else None
+
+
+@lru_cache
+def get_tracer():
+    """Tracer for settings.tracing_exporter."""
+    if settings.tracing_exporter == "otel":
+        return OTelTracer()
+    if settings.tracing_exporter == "memory":
+        return Tracer(MemoryExporter(settings.tracing_max_spans))
+    if settings.tracing_exporter == "stdout":
+        return Tracer(StdoutExporter())
+    return NoopTracer()
+
+
+def trace_span(name: str, **attributes):
+    """`with trace_span("generation.retrieval", mode=...) as span:` - a child of the current span."""
+    return get_tracer().start_as_current_span(name, attributes)
+
+
+def current_trace_id() -> Optional[str]:
+    return get_tracer().current_trace_id()
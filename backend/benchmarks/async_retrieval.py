@@ -0,0 +1,80 @@
+"""
+Concurrent retrieval benchmark: blocking Session vs AsyncSession.
+
+Runs get_matching_ideas-style queries from many concurrent coroutines and
+reports requests/sec for the old (sync Session on the event loop) path and
+the new async path.
+
+Usage (from backend/, with DATABASE_URL pointing at a seeded database):
+    python -m benchmarks.async_retrieval --requests 500 --concurrency 50
+"""
+import argparse
+import asyncio
+import time
+
+from app.database import generation_session, read_session
+from app.models.idea import Idea
+from app.schemas.profile import UserProfile
+from app.services.generation import get_matching_ideas
+
+PROFILE = UserProfile(
+    technical_skills=["python", "react"],
+    experience_level="intermediate",
+)
+
+
+def sync_matching_ideas(profile: UserProfile, limit: int = 15) -> list[Idea]:
+    """The pre-async retrieval: psycopg2 query executed on the event loop."""
+    db = read_session()
+    try:
+        query = db.query(Idea)
+        if profile.experience_level == "beginner":
+            query = query.filter(Idea.difficulty.in_(["beginner", None]))
+        elif profile.experience_level == "intermediate":
+            query = query.filter(Idea.difficulty.in_(["beginner", "intermediate", None]))
+        return query.limit(limit).all()
+    finally:
+        db.close()
+
+
+async def sync_request():
+    # Mirrors the old endpoint: `async def` handler calling blocking ORM code
+    sync_matching_ideas(PROFILE)
+
+
+async def async_request():
+    async with generation_session() as db:
+        await get_matching_ideas(PROFILE, db)
+
+
+async def run(label: str, request, total: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await request()
+
+    # Warm up the pool so connection setup is not measured
+    await asyncio.gather(*(request() for _ in range(min(concurrency, 5))))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    rps = total / elapsed
+    print(f"{label:>6}: {total} requests, concurrency {concurrency}: {elapsed:.2f}s ({rps:.1f} req/s)")
+    return rps
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    before = await run("sync", sync_request, args.requests, args.concurrency)
+    after = await run("async", async_request, args.requests, args.concurrency)
+    print(f"speedup: {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+"""
+Bulk import benchmark: ORM add_all in 100-idea requests vs streamed COPY import.
+
+Generates N ideas and writes them with the original /bulk code path (ORM
+objects, 100 per request) and with import_ideas (NDJSON stream, COPY
+batches). Reports rows/sec and peak Python memory for each. Rows are written
+to the configured database; use a scratch database.
+
+Usage (from backend/, with DATABASE_URL pointing at a migrated database):
+    python -m benchmarks.bulk_import --ideas 20000 --batch-size 1000
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+
+from app.database import SessionLocal
+from app.models.idea import Idea
+from app.schemas.idea import IdeaCreate
+from app.services.importer import import_ideas
+
+
+def idea_payload(n: int, path: str) -> dict:
+    # Distinct titles per path, so the second run is not all fingerprint conflicts
+    return {
+        "title": f"{path} benchmark idea {n}",
+        "summary": "A generated idea used to measure import throughput",
+        "idea_type": "saas",
+        "skills": ["python", "sql"],
+        "tech_stack": ["fastapi", "postgresql"],
+        "difficulty": "beginner",
+        "niche": "benchmark",
+        "source_channel": "benchmark",
+    }
+
+
+def orm_import(count: int):
+    """The original /bulk write path: ORM add_all, 100 ideas per request."""
+    for start in range(0, count, 100):
+        ideas = [IdeaCreate(**idea_payload(n, "orm")) for n in range(start, min(start + 100, count))]
+        db = SessionLocal()
+        try:
+            db.add_all([Idea(**idea.model_dump()) for idea in ideas])
+            db.commit()
+        finally:
+            db.close()
+
+
+async def ndjson_body(count: int, lines_per_chunk: int = 200):
+    for start in range(0, count, lines_per_chunk):
+        end = min(start + lines_per_chunk, count)
+        yield "".join(json.dumps(idea_payload(n, "copy")) + "\n" for n in range(start, end)).encode()
+
+
+def measure(label: str, count: int, fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label}: {count / elapsed:,.0f} rows/s ({elapsed:.2f}s), peak {peak / 1e6:.1f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ideas", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    measure("orm add_all (100/request)", args.ideas, lambda: orm_import(args.ideas))
+    measure(
+        f"copy import ({args.batch_size}/batch)",
+        args.ideas,
+        lambda: asyncio.run(import_ideas(ndjson_body(args.ideas), "ndjson", args.batch_size)),
+    )
+
+    db = SessionLocal()
+    try:
+        deleted = db.query(Idea).filter(Idea.source_channel == "benchmark").delete()
+        db.commit()
+        print(f"Removed {deleted} benchmark rows")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Catalog snapshot benchmark: in-memory filter retrieval latency and footprint.
+
+Fills a CatalogSnapshot with generated ideas and times match() for a set of
+profiles, then prints the snapshot's memory report. With --sql, the same
+profiles are also run against the database for comparison.
+
+Usage (from backend/):
+    python -m benchmarks.catalog_snapshot --ideas 100000 --queries 2000
+    python -m benchmarks.catalog_snapshot --sql   # needs a seeded database
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+
+from app.schemas.profile import UserProfile
+from app.services.catalog_snapshot import CatalogSnapshot, IdeaRecord
+
+NICHES = ["productivity", "education", "finance", "health", "gaming", "devtools", "marketing", "travel"]
+TYPES = ["saas", "service", "product", "content", "marketplace"]
+MODELS = ["subscription", "one_time", "freemium", "ads"]
+LEVELS = ["beginner", "intermediate", "advanced"]
+SKILLS = ["python", "javascript", "react", "sql", "design", "marketing", "writing", "flask", "django", "node"]
+
+
+def generate_records(count: int, rng: random.Random) -> list[IdeaRecord]:
+    return [
+        IdeaRecord(
+            id=uuid.uuid4(),
+            title=f"Idea {n}",
+            summary=f"Generated idea number {n} for the snapshot benchmark",
+            idea_type=rng.choice(TYPES),
+            business_model=rng.choice(MODELS),
+            skills=rng.sample(SKILLS, 3),
+            tech_stack=rng.sample(SKILLS, 2),
+            difficulty=rng.choice(LEVELS),
+            niche=rng.choice(NICHES),
+        )
+        for n in range(count)
+    ]
+
+
+def generate_profiles(count: int, rng: random.Random) -> list[UserProfile]:
+    return [
+        UserProfile(
+            technical_skills=rng.sample(SKILLS, 3),
+            experience_level=rng.choice(LEVELS),
+            preferred_niches=rng.sample(NICHES, rng.randint(0, 2)),
+            preferred_types=rng.sample(TYPES, rng.randint(0, 2)),
+        )
+        for _ in range(count)
+    ]
+
+
+def report(label: str, latencies: list[float]):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label}: p50 {statistics.median(latencies) * 1e3:.3f}ms, p95 {p95 * 1e3:.3f}ms")
+
+
+async def sql_latencies(profiles: list[UserProfile]) -> list[float]:
+    from app.database import generation_session
+    from app.services.generation import apply_profile_filters
+    from sqlalchemy import select
+    from app.models.idea import Idea
+
+    latencies = []
+    async with generation_session() as db:
+        for profile in profiles:
+            start = time.perf_counter()
+            result = await db.execute(apply_profile_filters(select(Idea), profile).limit(15))
+            result.scalars().all()
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ideas", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--sql", action="store_true", help="Also time the SQL path")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    snapshot = CatalogSnapshot()
+    snapshot.loaded = True
+
+    start = time.perf_counter()
+    snapshot.apply(upserted=generate_records(args.ideas, rng))
+    print(f"Built snapshot of {args.ideas} ideas in {time.perf_counter() - start:.2f}s")
+
+    profiles = generate_profiles(args.queries, rng)
+    latencies = []
+    for profile in profiles:
+        start = time.perf_counter()
+        snapshot.match(profile, 15)
+        latencies.append(time.perf_counter() - start)
+    report("snapshot", latencies)
+
+    if args.sql:
+        report("sql", asyncio.run(sql_latencies(profiles)))
+
+    memory = snapshot.memory_report()
+    print(
+        f"Memory: {memory['total_bytes'] / 1e6:.1f}MB "
+        f"(records {memory['record_bytes'] / 1e6:.1f}MB, indexes {memory['index_bytes'] / 1e6:.1f}MB, "
+        f"{memory['bytes_per_record']} bytes/idea)"
+    )
+
+
+if __name__ == "__main__":
+    main()
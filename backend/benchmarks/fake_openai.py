@@ -0,0 +1,230 @@
+"""
+Stub OpenAI-compatible server for load tests.
+
+Serves POST /v1/chat/completions (plain and streamed) and POST /v1/embeddings
+with configurable latency, failure rate and malformed-JSON rate. Generated
+ideas use the technologies from the prompt's "Technical Skills" line, so
+they pass validation unless a failure is injected. Latency is a fixed time
+to first token plus a decode time per idea, so longer completions take
+longer, as with the real API. With --max-in-flight, chat calls beyond that
+many concurrent ones get a 429 with Retry-After, like an exhausted quota.
+
+Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8101/v1.
+
+Usage (from backend/):
+    python -m benchmarks.fake_openai --port 8101 --latency 0.5 --per-idea 1.0 \\
+        --failure-rate 0.02 --rate-limit-rate 0.02 --malformed-rate 0.05
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+SKILLS_PATTERN = re.compile(r"Technical Skills: (.*)")
+COUNT_PATTERN = re.compile(r"Generate (\d+)")
+STREAM_PIECES = 20  # Content chunks per streamed completion
+
+app = FastAPI(title="Fake OpenAI")
+app.state.options = argparse.Namespace(
+    latency=0.5, per_idea=1.0, jitter=0.2, failure_rate=0.0, rate_limit_rate=0.0, malformed_rate=0.0,
+    max_in_flight=0, seed=None,
+)
+stats = {"chat": 0, "stream": 0, "embeddings": 0, "failed": 0, "rate_limited": 0, "malformed": 0, "peak_in_flight": 0}
+in_flight = 0
+
+
+def jittered(seconds: float) -> float:
+    jitter = app.state.options.jitter
+    return max(0.0, seconds * random.uniform(1 - jitter, 1 + jitter))
+
+
+def injected_error():
+    """A 500 or 429 response, at the configured rates, or None."""
+    options = app.state.options
+    roll = random.random()
+    if roll < options.failure_rate:
+        stats["failed"] += 1
+        return JSONResponse(
+            status_code=500, content={"error": {"message": "Injected failure", "type": "server_error"}}
+        )
+    if roll < options.failure_rate + options.rate_limit_rate:
+        stats["rate_limited"] += 1
+        return JSONResponse(
+            status_code=429,
+            content={"error": {"message": "Injected rate limit", "type": "rate_limit_error"}},
+            headers={"Retry-After": "1", "x-ratelimit-remaining-requests": "0"},
+        )
+    return None
+
+
+def over_quota():
+    """A 429 when --max-in-flight chat calls are already running, or None."""
+    limit = app.state.options.max_in_flight
+    if not limit or in_flight < limit:
+        return None
+    stats["rate_limited"] += 1
+    return JSONResponse(
+        status_code=429,
+        content={"error": {"message": "Quota exceeded", "type": "rate_limit_error"}},
+        headers={"Retry-After": "1"},
+    )
+
+
+def completion_content(prompt: str) -> tuple[str, int]:
+    """(JSON content, idea count) answering a generation prompt."""
+    skills_match = SKILLS_PATTERN.search(prompt)
+    skills = [s.strip() for s in skills_match.group(1).split(",")] if skills_match else []
+    skills = [s for s in skills if s and s != "None specified"] or ["HTML", "CSS"]
+    count_match = COUNT_PATTERN.search(prompt)
+    count = int(count_match.group(1)) if count_match else 3
+
+    ideas = [
+        {
+            "title": f"Load test idea {uuid.uuid4().hex[:8]}",
+            "description": "A small tool that solves one recurring problem for a niche audience.",
+            "why_good_fit": "Uses the skills listed in the profile.",
+            "first_steps": ["Interview five users", "Build the smallest version", "Share it"],
+            "tech_recommendations": skills[:2],
+        }
+        for _ in range(count)
+    ]
+    content = json.dumps({"profile_summary": "Load test profile", "ideas": ideas})
+    if random.random() < app.state.options.malformed_rate:
+        stats["malformed"] += 1
+        content = content[: len(content) // 2]  # Cut mid-document, like a truncated completion
+    return content, count
+
+
+def usage(prompt: str, content: str) -> dict:
+    prompt_tokens, completion_tokens = len(prompt) // 4, len(content) // 4
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    global in_flight
+    body = await request.json()
+    error = over_quota()
+    if error is not None:
+        return error
+    error = injected_error()
+    if error is not None:
+        await asyncio.sleep(jittered(app.state.options.latency))
+        return error
+
+    prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+    content, count = completion_content(prompt)
+    options = app.state.options
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    created = int(time.time())
+    model = body.get("model", "gpt-4-turbo-preview")
+
+    if body.get("stream"):
+        stats["stream"] += 1
+
+        async def chunks():
+            await asyncio.sleep(jittered(options.latency))
+            step = max(1, len(content) // STREAM_PIECES)
+            pause = jittered(options.per_idea * count) / STREAM_PIECES
+            for start in range(0, len(content), step):
+                await asyncio.sleep(pause)
+                chunk = {
+                    "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": {"content": content[start:start + step]}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+            done = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            }
+            yield f"data: {json.dumps(done)}\n\n"
+            if body.get("stream_options", {}).get("include_usage"):
+                last = {
+                    "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [], "usage": usage(prompt, content),
+                }
+                yield f"data: {json.dumps(last)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    stats["chat"] += 1
+    in_flight += 1
+    stats["peak_in_flight"] = max(stats["peak_in_flight"], in_flight)
+    try:
+        await asyncio.sleep(jittered(options.latency + options.per_idea * count))
+    finally:
+        in_flight -= 1
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": created,
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": usage(prompt, content),
+    }
+
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    error = injected_error()
+    if error is not None:
+        return error
+
+    stats["embeddings"] += 1
+    texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+    dim = body.get("dimensions") or 256
+    await asyncio.sleep(jittered(app.state.options.latency / 5))
+    data = []
+    for index, text in enumerate(texts):
+        rng = random.Random(text)
+        vector = [rng.gauss(0, 1) for _ in range(dim)]
+        norm = sum(v * v for v in vector) ** 0.5
+        data.append({"object": "embedding", "index": index, "embedding": [v / norm for v in vector]})
+    tokens = sum(len(text) // 4 for text in texts)
+    return {
+        "object": "list",
+        "data": data,
+        "model": body.get("model"),
+        "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+    }
+
+
+@app.get("/stats")
+def get_stats():
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8101)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds to first token")
+    parser.add_argument("--per-idea", type=float, default=1.0, help="Decode seconds per generated idea")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Latency varies by +/- this fraction")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of calls answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share answered with 429")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Share with truncated JSON")
+    parser.add_argument("--max-in-flight", type=int, default=0, help="429 chat calls beyond this many (0 = off)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    app.state.options = args
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
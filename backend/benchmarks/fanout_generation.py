@@ -0,0 +1,81 @@
+"""
+Fan-out generation benchmark: one completion for all ideas vs concurrent calls.
+
+Runs generate_ideas against the stub OpenAI server (benchmarks.fake_openai,
+in-process) whose latency is a time to first token plus a decode time per
+idea, in "single" and "fanout" mode, and reports wall-clock latency per
+generation and LLM calls per generation. Retrieval uses an in-memory catalog
+snapshot, so no database is needed.
+
+Usage (from backend/):
+    python -m benchmarks.fanout_generation --ideas 3,5 --generations 10 --latency 0.3 --per-idea 0.6
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import httpx
+from openai import AsyncOpenAI
+
+from app.config import get_settings
+from app.schemas.profile import UserProfile
+from app.services import generation
+from app.services.catalog_snapshot import catalog_snapshot
+from benchmarks import fake_openai
+from benchmarks.catalog_snapshot import generate_records
+
+PROFILE = UserProfile(technical_skills=["python", "sql", "react"], experience_level="intermediate")
+
+
+async def measure(mode: str, num_ideas: int, generations: int) -> tuple[float, float, float]:
+    """(median seconds, p95 seconds, LLM calls) per generation."""
+    get_settings().generation_mode = mode
+    calls_before = generation.generation_stats["attempts"]
+    latencies = []
+    for _ in range(generations):
+        start = time.perf_counter()
+        response = await generation.generate_ideas(PROFILE, num_ideas, use_cache=False)
+        latencies.append(time.perf_counter() - start)
+        assert len(response.ideas) == num_ideas
+    latencies.sort()
+    calls = (generation.generation_stats["attempts"] - calls_before) / generations
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1], calls
+
+
+async def run(args):
+    fake_openai.app.state.options = argparse.Namespace(
+        latency=args.latency, per_idea=args.per_idea, jitter=args.jitter,
+        failure_rate=0.0, rate_limit_rate=0.0, malformed_rate=args.malformed_rate, max_in_flight=0, seed=1,
+    )
+    transport = httpx.ASGITransport(app=fake_openai.app)
+    generation.client = AsyncOpenAI(
+        api_key="benchmark", base_url="http://fake/v1", http_client=httpx.AsyncClient(transport=transport)
+    )
+    catalog_snapshot.loaded = True
+    catalog_snapshot.apply(upserted=generate_records(1000, random.Random(1)))
+
+    for num_ideas in args.ideas:
+        for mode in ("single", "fanout"):
+            median, p95, calls = await measure(mode, num_ideas, args.generations)
+            print(
+                f"{num_ideas} ideas, {mode:>6}: median {median:.2f}s, p95 {p95:.2f}s, "
+                f"{calls:.1f} LLM calls per generation"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ideas", type=lambda v: [int(n) for n in v.split(",")], default=[3, 5])
+    parser.add_argument("--generations", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.3, help="Stub seconds to first token")
+    parser.add_argument("--per-idea", type=float, default=0.6, help="Stub decode seconds per idea")
+    parser.add_argument("--jitter", type=float, default=0.3)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
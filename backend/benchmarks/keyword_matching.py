@@ -0,0 +1,62 @@
+"""
+Keyword validation microbenchmark: substring scans vs compiled regex rules.
+
+Compares the previous `any(keyword in text)` loop with KeywordMatcher for a
+growing number of keywords, on a fixed batch of generated ideas.
+
+Usage (from backend/):
+    python -m benchmarks.keyword_matching --ideas 1000
+"""
+import argparse
+import random
+import timeit
+
+from app.services.validation_rules import DEFAULT_RULE_SETS, KeywordMatcher
+
+TECHS = ["Python", "React", "PostgreSQL", "Flask", "Tailwind", "Stripe", "Vue", "FastAPI", "SQLite"]
+WORDS = ["revenue", "tracker", "simple", "dashboard", "for", "small", "teams", "with", "reports"]
+
+
+def substring_match(keywords: list[str], techs: list[str], description: str) -> bool:
+    """The pre-compiled-rules check: every keyword against every field."""
+    all_text = " ".join(techs).lower() + " " + description.lower()
+    return any(keyword in all_text for keyword in keywords)
+
+
+def regex_match(matcher: KeywordMatcher, techs: list[str], description: str) -> bool:
+    return matcher.search("\n".join(techs).lower() + "\n" + description.lower()) is not None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ideas", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    ideas = [
+        (rng.sample(TECHS, 3), " ".join(rng.choices(WORDS, k=40)))
+        for _ in range(args.ideas)
+    ]
+    base = DEFAULT_RULE_SETS["advanced"]
+
+    for size in (len(base), 100, 500):
+        keywords = base + [f"tool{n}" for n in range(size - len(base))]
+        matcher = KeywordMatcher(keywords)
+
+        old = min(timeit.repeat(
+            lambda: [substring_match(keywords, t, d) for t, d in ideas], number=1, repeat=args.repeat
+        ))
+        new = min(timeit.repeat(
+            lambda: [regex_match(matcher, t, d) for t, d in ideas], number=1, repeat=args.repeat
+        ))
+        per_idea_old = old / args.ideas * 1e6
+        per_idea_new = new / args.ideas * 1e6
+        print(
+            f"{size:>4} keywords: substring {per_idea_old:.1f}us/idea, "
+            f"regex {per_idea_new:.1f}us/idea ({old / new:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Idea listing benchmark: payload size and serialization time per page.
+
+Builds a page of ideas with realistic text and array lengths and times how
+GET /api/ideas turns it into a response body:
+
+- full: ORM objects through the IdeaList response model (FastAPI validates
+  and serializes it, then encodes with json; for this sync route it also
+  hops to the threadpool for that, which is not timed here)
+- summary / fields: projected row tuples encoded directly (lean_response),
+  with orjson when installed and the stdlib encoder otherwise
+
+Only the encoding differs here; the projection also avoids reading the
+deferred columns from the database. No database is needed.
+
+Usage (from backend/):
+    python -m benchmarks.list_serialization --rows 100 --repeat 500
+"""
+import argparse
+import asyncio
+import datetime
+import random
+import statistics
+import time
+import uuid
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+from app.api import ideas as ideas_api
+from app.main import app
+from app.models.idea import Idea
+from app.schemas.idea import SUMMARY_FIELDS
+
+WORDS = (
+    "build launch users pricing audience weekly report dashboard niche automate "
+    "freelance tool newsletter template market growth feedback creators small teams"
+).split()
+SKILLS = ["python", "javascript", "react", "sql", "design", "marketing", "writing", "flask", "django", "node"]
+
+
+def text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def generate_ideas(count: int, rng: random.Random) -> list[Idea]:
+    now = datetime.datetime.now()
+    return [
+        Idea(
+            id=uuid.uuid4(),
+            title=text(rng, 6),
+            summary=text(rng, 30),
+            description=text(rng, 150),
+            idea_type=rng.choice(["saas", "service", "product", "content"]),
+            business_model=rng.choice(["subscription", "one_time", "freemium"]),
+            monetization=text(rng, 60),
+            skills=rng.sample(SKILLS, 3),
+            tech_stack=rng.sample(SKILLS, 3),
+            difficulty=rng.choice(["beginner", "intermediate", "advanced"]),
+            time_to_mvp="1 month",
+            startup_cost="<$100",
+            target_audience=text(rng, 25),
+            niche=rng.choice(["productivity", "education", "finance"]),
+            competition="medium",
+            key_features=[text(rng, 10) for _ in range(5)],
+            success_factors=[text(rng, 10) for _ in range(4)],
+            challenges=[text(rng, 10) for _ in range(4)],
+            source_video_id="dQw4w9WgXcQ",
+            source_channel="Benchmark",
+            confidence=0.8,
+            created_at=now - datetime.timedelta(seconds=n),
+        )
+        for n in range(count)
+    ]
+
+
+def list_route():
+    return next(route for route in app.routes if getattr(route, "path", None) == "/api/ideas" and "GET" in route.methods)
+
+
+def time_it(fn, repeat: int) -> tuple[float, int]:
+    """(median milliseconds, body bytes)."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn()
+        timings.append((time.perf_counter() - start) * 1e3)
+    return statistics.median(timings), len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    rows = generate_ideas(args.rows, random.Random(1))
+    field = list_route().secure_cloned_response_field
+    page = {"total": 5000, "total_is_estimate": False, "next_cursor": "abc"}
+
+    loop = asyncio.new_event_loop()
+
+    def full() -> bytes:
+        content = ideas_api.IdeaList(ideas=rows, **page)
+        serialized = loop.run_until_complete(
+            serialize_response(field=field, response_content=content, is_coroutine=True)
+        )
+        return JSONResponse(serialized).body
+
+    def lean(names: list[str]):
+        tuples = [(idea.created_at, *(getattr(idea, name) for name in names)) for idea in rows]
+        return lambda: ideas_api.lean_response(names, tuples, **page).body
+
+    cases = [
+        ("full", full),
+        ("view=summary", lean(ideas_api.projected_fields("summary", None))),
+        ("fields=id,title,niche", lean(ideas_api.projected_fields("full", "id,title,niche"))),
+    ]
+    orjson = ideas_api.orjson
+    print(f"{args.rows}-row page, median of {args.repeat} (orjson {'on' if orjson else 'not installed'})")
+    for label, fn in cases:
+        millis, size = time_it(fn, args.repeat)
+        print(f"{label:<24} {millis:8.3f} ms  {size / 1024:8.1f} KiB")
+    if orjson is not None:
+        ideas_api.orjson = None
+        millis, size = time_it(cases[1][1], args.repeat)
+        print(f"{'view=summary (json)':<24} {millis:8.3f} ms  {size / 1024:8.1f} KiB")
+        ideas_api.orjson = orjson
+    print(f"summary columns: {', '.join(SUMMARY_FIELDS)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+OpenAI limiter benchmark: a burst of generations against a concurrency quota.
+
+Fires --burst concurrent generate_ideas calls (single mode) at the stub
+OpenAI server (benchmarks.fake_openai, in-process), which answers 429 to chat
+calls beyond --quota concurrent ones. Runs once with the limiter off and once
+capped at the quota, and reports how many generations got LLM ideas rather
+than the fallback, the 429s the stub sent, limiter rejections and latency.
+Retrieval uses an in-memory catalog snapshot, so no database is needed.
+
+Usage (from backend/):
+    python -m benchmarks.llm_limiter --burst 40 --quota 8 --latency 0.3 --per-idea 0.3
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import httpx
+from openai import AsyncOpenAI
+
+from app.config import get_settings
+from app.schemas.profile import UserProfile
+from app.services import generation
+from app.services.catalog_snapshot import catalog_snapshot
+from app.services.llm_limiter import LLMLimiter
+from benchmarks import fake_openai
+from benchmarks.catalog_snapshot import generate_records
+
+SKILLS = ["python", "javascript", "react", "sql", "html", "css", "flask", "django", "node", "typescript"]
+
+
+def profile(n: int) -> UserProfile:
+    """A distinct profile per generation, so identical requests are not coalesced."""
+    rng = random.Random(n)
+    return UserProfile(technical_skills=rng.sample(SKILLS, 4), experience_level="intermediate")
+
+
+async def burst(limiter: LLMLimiter, size: int) -> dict:
+    generation.llm_limiter = limiter
+    fake_openai.stats.update({key: 0 for key in fake_openai.stats})
+    fallbacks_before = generation.generation_stats["fallback_requests"]
+
+    async def one(n: int) -> float:
+        start = time.perf_counter()
+        await generation.generate_ideas(profile(n), 3, use_cache=False)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = sorted(await asyncio.gather(*(one(n) for n in range(size))))
+    return {
+        "elapsed": time.perf_counter() - start,
+        "llm_ideas": size - (generation.generation_stats["fallback_requests"] - fallbacks_before),
+        "rate_limited": fake_openai.stats["rate_limited"],
+        "peak_in_flight": fake_openai.stats["peak_in_flight"],
+        "rejected": limiter.stats["rejected"],
+        "median": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+    }
+
+
+async def run(args):
+    fake_openai.app.state.options = argparse.Namespace(
+        latency=args.latency, per_idea=args.per_idea, jitter=args.jitter,
+        failure_rate=0.0, rate_limit_rate=0.0, malformed_rate=0.0, max_in_flight=args.quota, seed=1,
+    )
+    transport = httpx.ASGITransport(app=fake_openai.app)
+    generation.client = AsyncOpenAI(
+        api_key="benchmark", base_url="http://fake/v1", http_client=httpx.AsyncClient(transport=transport),
+        max_retries=0,
+    )
+    get_settings().generation_mode = "single"
+    catalog_snapshot.loaded = True
+    catalog_snapshot.apply(upserted=generate_records(1000, random.Random(1)))
+
+    limiters = {
+        "off": LLMLimiter(0, 0, 0, max_queue=args.burst, max_wait=args.max_wait),
+        f"cap {args.quota}": LLMLimiter(args.quota, 0, 0, max_queue=args.burst, max_wait=args.max_wait),
+    }
+    for label, limiter in limiters.items():
+        result = await burst(limiter, args.burst)
+        print(
+            f"limiter {label:>6}: {result['llm_ideas']}/{args.burst} with LLM ideas, "
+            f"{result['rate_limited']} x 429, {result['rejected']} refused, "
+            f"peak {result['peak_in_flight']} in flight, median {result['median']:.2f}s, "
+            f"p95 {result['p95']:.2f}s, burst {result['elapsed']:.2f}s"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--burst", type=int, default=40, help="Concurrent generations")
+    parser.add_argument("--quota", type=int, default=8, help="Stub chat calls allowed in flight")
+    parser.add_argument("--max-wait", type=float, default=20.0, help="Limiter queue deadline, seconds")
+    parser.add_argument("--latency", type=float, default=0.3, help="Stub seconds to first token")
+    parser.add_argument("--per-idea", type=float, default=0.3, help="Stub decode seconds per idea")
+    parser.add_argument("--jitter", type=float, default=0.2)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""
+Load test: the API under concurrent traffic against a stub OpenAI server.
+
+Starts benchmarks.fake_openai and the app (uvicorn) pointed at it, then
+drives each scenario at each concurrency level and reports p50/p95/p99
+latency, throughput and error rate. Results are saved as JSON under
+benchmarks/results/ so runs can be compared (--compare).
+
+Scenarios:
+    generate    POST /api/generate (uncached, a random profile per request)
+    list        GET /api/ideas (random page)
+    revalidate  GET /api/ideas with the ETag of an earlier response (304s)
+    bulk        POST /api/ideas/bulk (100 new ideas; removed after the run)
+
+Needs a migrated database (e.g. `docker-compose up db -d` and
+`alembic upgrade head`).
+
+Usage (from backend/):
+    python -m benchmarks.load_test --concurrency 1,10,50 --requests 200 \\
+        --fake-latency 0.5 --fake-per-idea 1.0 --fake-malformed-rate 0.05 --label baseline
+    python -m benchmarks.load_test --label change --compare benchmarks/results/<baseline>.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from sqlalchemy import create_engine, text
+
+from app.config import get_settings
+from app.database import sync_database_url
+
+RESULTS_DIR = Path(__file__).parent / "results"
+SKILLS = ["python", "javascript", "react", "sql", "html", "css", "flask", "django", "node", "typescript"]
+LEVELS = ["beginner", "intermediate", "advanced"]
+SOURCE_CHANNEL = "load-test"
+RUN_ID = f"{int(time.time())}"  # Keeps bulk titles (fingerprints) unique across runs
+ETAGS: dict[str, str] = {}  # Page URL -> last ETag, for the revalidate scenario
+
+
+def generate_request(n: int) -> dict:
+    rng = random.Random(n)
+    return {
+        "method": "POST",
+        "url": "/api/generate",
+        "json": {
+            "profile": {
+                "technical_skills": rng.sample(SKILLS, rng.randint(2, 4)),
+                "experience_level": rng.choice(LEVELS),
+                "budget": rng.choice(["free", "<$100", None]),
+            },
+            "num_ideas": 3,
+            "use_cache": False,
+        },
+    }
+
+
+def list_request(n: int) -> dict:
+    return {"method": "GET", "url": "/api/ideas", "params": {"limit": 50, "skip": random.randint(0, 500)}}
+
+
+def revalidate_request(n: int) -> dict:
+    url = f"/api/ideas?limit=50&skip={n % 10 * 50}"
+    headers = {"If-None-Match": ETAGS[url]} if url in ETAGS else {}
+    return {"method": "GET", "url": url, "headers": headers}
+
+
+def bulk_request(n: int) -> dict:
+    return {
+        "method": "POST",
+        "url": "/api/ideas/bulk",
+        "json": [
+            {
+                "title": f"Load test idea {RUN_ID}-{n}-{i}",
+                "summary": "Generated by the load test",
+                "idea_type": "saas",
+                "skills": ["python"],
+                "difficulty": "beginner",
+                "niche": "load-test",
+                "source_channel": SOURCE_CHANNEL,
+            }
+            for i in range(100)
+        ],
+    }
+
+
+SCENARIOS = {
+    "generate": generate_request,
+    "list": list_request,
+    "revalidate": revalidate_request,
+    "bulk": bulk_request,
+}
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(q / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def run_level(client: httpx.AsyncClient, scenario: str, concurrency: int, requests: int) -> dict:
+    """`requests` calls from `concurrency` workers; latency in milliseconds."""
+    make_request = SCENARIOS[scenario]
+    latencies: list[float] = []
+    errors: dict[str, int] = {}
+    next_request = iter(range(requests))
+
+    async def worker():
+        for n in next_request:
+            start = time.perf_counter()
+            request = make_request(n)
+            try:
+                response = await client.request(**request)
+                outcome = None if response.status_code < 400 else str(response.status_code)
+                if "etag" in response.headers:
+                    ETAGS[request["url"]] = response.headers["etag"]
+            except httpx.HTTPError as e:
+                outcome = type(e).__name__
+            latencies.append((time.perf_counter() - start) * 1e3)
+            if outcome:
+                errors[outcome] = errors.get(outcome, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    failed = sum(errors.values())
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": requests,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 2),
+        "error_rate": round(failed / requests, 4),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "mean_ms": round(statistics.mean(latencies), 1),
+    }
+
+
+def start_process(args: list[str], env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, *args], env={**os.environ, **env}, cwd=Path(__file__).parent.parent
+    )
+
+
+async def wait_until_up(url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+def print_results(results: list[dict], baseline: dict | None):
+    print(f"{'scenario':<12}{'conc':>6}{'rps':>10}{'err':>8}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for row in results:
+        print(
+            f"{row['scenario']:<12}{row['concurrency']:>6}{row['throughput_rps']:>10.1f}"
+            f"{row['error_rate']:>8.1%}{row['p50_ms']:>10.0f}{row['p95_ms']:>10.0f}{row['p99_ms']:>10.0f}"
+        )
+        before = (baseline or {}).get((row["scenario"], row["concurrency"]))
+        if before:
+            def change(key):
+                return f"{(row[key] - before[key]) / before[key]:+.0%}" if before[key] else "n/a"
+
+            print(
+                f"{'  vs base':<18}{change('throughput_rps'):>10}{'':>8}"
+                f"{change('p50_ms'):>10}{change('p95_ms'):>10}{change('p99_ms'):>10}"
+            )
+
+
+async def run(args) -> dict:
+    app_url = args.app_url
+    processes = []
+    try:
+        if not app_url:
+            fake_url = f"http://127.0.0.1:{args.fake_port}"
+            processes.append(start_process([
+                "-m", "benchmarks.fake_openai", "--port", str(args.fake_port),
+                "--latency", str(args.fake_latency), "--per-idea", str(args.fake_per_idea),
+                "--failure-rate", str(args.fake_failure_rate), "--rate-limit-rate", str(args.fake_rate_limit_rate),
+                "--malformed-rate", str(args.fake_malformed_rate),
+                "--max-in-flight", str(args.fake_max_in_flight), "--seed", "1",
+            ], {}))
+            await wait_until_up(f"{fake_url}/stats")
+            processes.append(start_process(
+                ["-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+                {
+                    "DATABASE_URL": args.database_url,
+                    "OPENAI_BASE_URL": f"{fake_url}/v1",
+                    "OPENAI_API_KEY": "load-test",
+                    "ENVIRONMENT": "development",
+                },
+            ))
+            app_url = f"http://127.0.0.1:{args.port}"
+        await wait_until_up(f"{app_url}/health")
+
+        results = []
+        limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+        async with httpx.AsyncClient(base_url=app_url, timeout=args.timeout, limits=limits) as client:
+            for scenario in args.scenarios:
+                for concurrency in args.concurrency:
+                    row = await run_level(client, scenario, concurrency, args.requests)
+                    results.append(row)
+                    print(f"{scenario} x{concurrency}: {row['throughput_rps']} rps, p95 {row['p95_ms']}ms", flush=True)
+
+            fake_stats = None
+            if not args.app_url:
+                fake_stats = (await client.get(f"http://127.0.0.1:{args.fake_port}/stats")).json()
+            generation_stats = (await client.get("/api/generate/stats")).json()
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            process.wait(timeout=10)
+
+    return {
+        "label": args.label,
+        "started_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True
+        ).stdout.strip(),
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "fake_latency": args.fake_latency,
+            "fake_per_idea": args.fake_per_idea,
+            "fake_failure_rate": args.fake_failure_rate,
+            "fake_rate_limit_rate": args.fake_rate_limit_rate,
+            "fake_malformed_rate": args.fake_malformed_rate,
+            "fake_max_in_flight": args.fake_max_in_flight,
+            "app_url": args.app_url,
+        },
+        "results": results,
+        "fake_openai": fake_stats,
+        "generation": generation_stats,
+    }
+
+
+def remove_bulk_rows(database_url: str):
+    engine = create_engine(sync_database_url(database_url))
+    with engine.begin() as conn:
+        deleted = conn.execute(text("DELETE FROM ideas WHERE source_channel = :channel"), {"channel": SOURCE_CHANNEL})
+    engine.dispose()
+    print(f"Removed {deleted.rowcount} load test rows")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenarios", type=lambda v: v.split(","), default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=lambda v: [int(c) for c in v.split(",")], default=[1, 10, 50])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario and level")
+    parser.add_argument("--timeout", type=float, default=180)
+    parser.add_argument("--database-url", default=get_settings().database_url)
+    parser.add_argument("--port", type=int, default=8001, help="Port for the app under test")
+    parser.add_argument("--app-url", default=None, help="Test a running app instead of starting one")
+    parser.add_argument("--fake-port", type=int, default=8101)
+    parser.add_argument("--fake-latency", type=float, default=0.5)
+    parser.add_argument("--fake-per-idea", type=float, default=1.0)
+    parser.add_argument("--fake-failure-rate", type=float, default=0.0)
+    parser.add_argument("--fake-rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--fake-malformed-rate", type=float, default=0.0)
+    parser.add_argument("--fake-max-in-flight", type=int, default=0, help="Stub 429s chat calls beyond this many")
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--compare", type=Path, default=None, help="Earlier results file to diff against")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    report = asyncio.run(run(args))
+    if "bulk" in args.scenarios:
+        remove_bulk_rows(args.database_url)
+
+    baseline = None
+    if args.compare:
+        previous = json.loads(args.compare.read_text())
+        baseline = {(row["scenario"], row["concurrency"]): row for row in previous["results"]}
+        print(f"Compared with {args.compare.name} ({previous['label']}, {previous['commit']})")
+    print_results(report["results"], baseline)
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    path = RESULTS_DIR / f"{datetime.datetime.now():%Y%m%d-%H%M%S}-{args.label}.json"
+    path.write_text(json.dumps(report, indent=2))
+    print(f"Saved {path}")
+
+
+if __name__ == "__main__":
+    main()
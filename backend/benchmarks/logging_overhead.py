@@ -0,0 +1,117 @@
+"""
+Logging overhead benchmark: time the request path spends on logging.
+
+Replays the request middleware's logging for --requests requests inside a
+trace span and reports microseconds per request on the calling thread (the
+event loop, in the app):
+
+- before: the previous setup, a synchronous StreamHandler with two eagerly
+  formatted f-string INFO lines per request
+- after: setup_logging (queued records, written by a background thread),
+  one lazily formatted line per request, text and JSON, optionally sampled
+
+Output goes to a temporary file; --write-latency adds a delay per write to
+mimic a slow stdout pipe (e.g. a container log driver under load).
+
+Usage (from backend/):
+    python -m benchmarks.logging_overhead --requests 20000 --write-latency 50
+"""
+import argparse
+import logging
+import tempfile
+import time
+
+from prometheus_client import REGISTRY
+
+from app import logging_config
+from app.logging_config import TEXT_FORMAT, TraceIdFilter, sample_request_log, setup_logging, stop_logging
+from app.tracing import trace_span
+
+logger = logging.getLogger("benchmarks.logging_overhead")
+
+
+class SlowFile:
+    """File whose writes take at least `latency` seconds."""
+
+    def __init__(self, file, latency: float):
+        self.file = file
+        self.latency = latency
+
+    def write(self, text: str):
+        if self.latency:
+            deadline = time.perf_counter() + self.latency
+            while time.perf_counter() < deadline:
+                pass
+        return self.file.write(text)
+
+    def flush(self):
+        self.file.flush()
+
+
+def before_request(method: str, path: str, status: int, seconds: float):
+    logger.info(f"Request: {method} {path}")
+    logger.info(f"Completed: {method} {path} - {status} - {seconds:.3f}s")
+
+
+def after_request(method: str, path: str, status: int, seconds: float):
+    logger.debug("Request: %s %s", method, path)
+    if sample_request_log(status, seconds):
+        logger.info(
+            "Completed: %s %s - %d - %.3fs", method, path, status, seconds,
+            extra={"method": method, "path": path, "status": status, "duration_ms": round(seconds * 1000, 1)},
+        )
+
+
+def dropped() -> float:
+    return REGISTRY.get_sample_value("binko_log_records_dropped_total") or 0.0
+
+
+def replay(log_request, requests: int) -> float:
+    """Microseconds per request spent in logging calls."""
+    start = time.perf_counter()
+    for n in range(requests):
+        with trace_span("http.request"):
+            log_request("GET", f"/api/ideas/{n}", 200, 0.012)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--write-latency", type=float, default=0.0, help="Microseconds added per write")
+    parser.add_argument("--sample-rate", type=float, default=0.1, help="For the sampled run")
+    args = parser.parse_args()
+    settings = logging_config.settings
+
+    with tempfile.TemporaryFile("w+") as file:
+        sink = SlowFile(file, args.write_latency / 1e6)
+        stop_logging()  # Importing app modules may have configured logging already
+
+        handler = logging.StreamHandler(sink)
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+        handler.addFilter(TraceIdFilter())
+        logging.getLogger().handlers = [handler]
+        logging.getLogger().setLevel(logging.INFO)
+        runs = [("before (sync, f-strings)", replay(before_request, args.requests), 0.0, 0)]
+
+        for label, log_format, rate in (
+            ("after (queued, text)", "text", 1.0),
+            ("after (queued, json)", "json", 1.0),
+            (f"after (json, {args.sample_rate:.0%} sampled)", "json", args.sample_rate),
+        ):
+            settings.log_format, settings.log_request_sample_rate = log_format, rate
+            setup_logging(stream=sink)
+            dropped_before = dropped()
+            per_request = replay(after_request, args.requests)
+            start = time.perf_counter()
+            stop_logging()  # Waits for the writer thread to drain the queue
+            runs.append((label, per_request, time.perf_counter() - start, dropped() - dropped_before))
+
+    print(f"{args.requests} requests, {args.write_latency:.0f}us per write")
+    print(f"{'':<30}{'us/request':>12}{'drain after (s)':>18}{'dropped':>10}")
+    for label, per_request, drain, lost in runs:
+        print(f"{label:<30}{per_request:>12.1f}{drain:>18.2f}{lost:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
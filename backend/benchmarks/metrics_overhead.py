@@ -0,0 +1,57 @@
+"""
+Metrics overhead benchmark: per-request instrumentation and scrape cost.
+
+Times the work the request middleware and LLM call sites add per event
+(observe_request, LLMCall with usage), then fills every API route with a few
+status codes and times rendering the /metrics payload.
+
+Usage (from backend/):
+    python -m benchmarks.metrics_overhead --events 200000
+"""
+import argparse
+import time
+import types
+
+from prometheus_client import generate_latest
+
+from app.main import app
+from app.metrics import LLMCall, observe_request
+
+USAGE = types.SimpleNamespace(prompt_tokens=1200, completion_tokens=600)
+
+
+def per_event(label: str, events: int, fn):
+    start = time.perf_counter()
+    for _ in range(events):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label}: {elapsed / events * 1e6:.2f}us per event")
+
+
+def llm_call():
+    with LLMCall("benchmark") as call:
+        pass
+    call.usage(USAGE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=200000)
+    args = parser.parse_args()
+
+    routes = [route for route in app.routes if hasattr(route, "methods")]
+    scope = {"route": routes[0]}
+    per_event("observe_request", args.events, lambda: observe_request("GET", scope, 200, 0.012))
+    per_event("LLMCall + usage", args.events, llm_call)
+
+    for route in routes:
+        for status in (200, 404, 422, 500):
+            observe_request(sorted(route.methods)[0], {"route": route}, status, 0.05)
+    start = time.perf_counter()
+    payload = generate_latest()
+    elapsed = time.perf_counter() - start
+    print(f"Scrape: {len(routes)} routes x 4 statuses, {len(payload) / 1e3:.0f}KB in {elapsed * 1e3:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Prompt builder benchmark: token budget and fragment cache.
+
+Builds generation prompts for 15 inspiration ideas with long summaries and a
+long profile background, and compares the unbounded format (the previous
+builder) with the budgeted builder: prompt tokens, and build time with a
+cold and a warm fragment cache.
+
+Usage (from backend/):
+    python -m benchmarks.prompt_budget --builds 500
+"""
+import argparse
+import datetime
+import random
+import time
+import uuid
+
+from app.schemas.profile import UserProfile
+from app.services.catalog_snapshot import IdeaRecord
+from app.services.generation import build_generation_prompt
+from app.services.prompt_budget import fragment_cache, get_tokenizer
+
+WORDS = ["users", "track", "simple", "dashboard", "small", "teams", "reports", "automate", "weekly", "share"]
+
+
+def unbounded_prompt(profile: UserProfile, ideas: list[IdeaRecord]) -> str:
+    """The previous builder: full profile and every idea, untruncated."""
+    ideas_str = "\n\n".join(
+        f"IDEA {i + 1}: {idea.title}\nSummary: {idea.summary}\n"
+        f"Type: {idea.idea_type} | Model: {idea.business_model}\n"
+        f"Skills: {', '.join(idea.skills)}\nDifficulty: {idea.difficulty}\nNiche: {idea.niche}"
+        for i, idea in enumerate(ideas)
+    )
+    return f"{profile.model_dump_json()}\n\n{ideas_str}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--builds", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    now = datetime.datetime.now()
+    ideas = [
+        IdeaRecord(
+            uuid.uuid4(), f"Idea {n}", " ".join(rng.choices(WORDS, k=rng.randint(30, 400))),
+            "saas", "subscription", ["python", "react"], ["flask"], "beginner", "productivity", now,
+        )
+        for n in range(15)
+    ]
+    profile = UserProfile(
+        technical_skills=["python", "react"],
+        experience_level="beginner",
+        background=" ".join(rng.choices(WORDS, k=800)),
+    )
+    tokenizer = get_tokenizer()
+
+    build = build_generation_prompt(profile, ideas, 3)
+    print(f"Tokenizer: {tokenizer.name}")
+    print(f"Unbounded prompt: {tokenizer.count(unbounded_prompt(profile, ideas))} tokens")
+    print(
+        f"Budgeted prompt: {tokenizer.count(build.text)} tokens (budget {build.budget}), "
+        f"{build.ideas_used} ideas, {build.ideas_dropped} dropped, truncated {build.truncated_fields}"
+    )
+
+    for label in ("cold", "warm"):
+        start = time.perf_counter()
+        for _ in range(args.builds):
+            if label == "cold":
+                fragment_cache.entries.clear()
+            build_generation_prompt(profile, ideas, 3)
+        elapsed = (time.perf_counter() - start) / args.builds
+        print(f"Build time, {label} fragment cache: {elapsed * 1e3:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Semantic retrieval latency benchmark.
+
+Optionally seeds synthetic ideas with local embeddings, then times
+get_semantic_ideas for a set of profiles and reports p50/p95 latency.
+
+Usage (from backend/, against a pgvector-enabled database):
+    python -m benchmarks.semantic_retrieval --seed 100000 --queries 200
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from sqlalchemy import insert
+
+from app.database import AsyncSessionLocal, generation_session
+from app.models.idea import Idea
+from app.schemas.profile import UserProfile
+from app.services.embeddings import HashingEmbedder, idea_embedding_text
+from app.services.generation import get_semantic_ideas
+
+SKILLS = ["python", "react", "node", "sql", "stripe", "openai", "figma", "seo", "nextjs", "django"]
+NICHES = ["career", "health", "fintech", "education", "marketing", "productivity", "sales"]
+TYPES = ["saas", "app", "content", "service", "marketplace"]
+LEVELS = ["beginner", "intermediate", "advanced"]
+
+
+def synthetic_idea(rng: random.Random, n: int) -> dict:
+    skills = rng.sample(SKILLS, 3)
+    niche = rng.choice(NICHES)
+    return {
+        "title": f"Idea {n}: {niche} {skills[0]} tool",
+        "summary": f"A {niche} product built with {', '.join(skills)}.",
+        "idea_type": rng.choice(TYPES),
+        "difficulty": rng.choice(LEVELS),
+        "niche": niche,
+        "skills": skills,
+        "tech_stack": skills,
+    }
+
+
+async def seed(count: int, batch_size: int = 1000):
+    rng = random.Random(42)
+    embedder = HashingEmbedder(Idea.embedding.type.dim)
+    async with AsyncSessionLocal() as db:
+        for start in range(0, count, batch_size):
+            rows = [synthetic_idea(rng, n) for n in range(start, min(start + batch_size, count))]
+            for row in rows:
+                row["embedding"] = embedder.embed_one(idea_embedding_text(Idea(**row)))
+            await db.execute(insert(Idea), rows)
+            await db.commit()
+    print(f"seeded {count} ideas")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic ideas to insert first")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.seed:
+        await seed(args.seed)
+
+    rng = random.Random(7)
+    timings = []
+    for _ in range(args.queries):
+        profile = UserProfile(
+            technical_skills=rng.sample(SKILLS, 2),
+            experience_level=rng.choice(["beginner", "intermediate", "experienced"]),
+            preferred_niches=rng.sample(NICHES, 1),
+            interests="building tools for small teams",
+        )
+        async with generation_session() as db:
+            start = time.perf_counter()
+            await get_semantic_ideas(profile, db)
+            timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{args.queries} queries: p50 {statistics.median(timings):.1f}ms, p95 {p95:.1f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+"""
+Skill-overlap ranking benchmark: inspiration quality and ranking cost.
+
+Fills a CatalogSnapshot with generated ideas and, for random profiles,
+compares the old unranked top 15 (first filter matches) with the top 15
+ranked by skill overlap. Quality is measured as the share of inspiration
+ideas whose skills/tech stack would themselves pass validate_skill_match,
+a proxy for how often the model's ideas built on them are rejected.
+
+Usage (from backend/):
+    python -m benchmarks.skill_ranking --ideas 100000 --queries 1000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.schemas.profile import UserProfile
+from app.services.catalog_snapshot import record_skill_terms
+from app.services.generation import skill_overlap_ok
+from benchmarks.catalog_snapshot import LEVELS, NICHES, TYPES, generate_records
+
+TECH = [
+    "python", "javascript", "react", "sql", "html", "css", "flask", "django", "node",
+    "typescript", "vue", "go", "rust", "swift", "kotlin", "php", "ruby", "java",
+]
+WEIGHTS = [10, 10, 8, 7, 6, 6, 4, 4, 4, 3, 2, 2, 1, 1, 1, 1, 1, 1]  # Popular skills dominate
+
+
+def skill_profiles(count: int, rng: random.Random) -> list[UserProfile]:
+    return [
+        UserProfile(
+            technical_skills=list({*rng.choices(TECH, WEIGHTS, k=rng.randint(2, 4))}),
+            experience_level=rng.choice(LEVELS),
+            preferred_niches=rng.sample(NICHES, rng.randint(0, 1)),
+            preferred_types=rng.sample(TYPES, rng.randint(0, 1)),
+        )
+        for _ in range(count)
+    ]
+
+
+def passing_share(ideas, profile: UserProfile) -> float:
+    """Share of ideas whose own skills would pass the 50% overlap check."""
+    if not ideas:
+        return 0.0
+    skills = {skill.lower() for skill in profile.technical_skills}
+    return sum(skill_overlap_ok(sorted(record_skill_terms(idea)), skills) for idea in ideas) / len(ideas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ideas", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    from app.services.catalog_snapshot import CatalogSnapshot
+
+    snapshot = CatalogSnapshot()
+    snapshot.loaded = True
+    records = generate_records(args.ideas, rng)
+    for record in records:
+        record.skills = tuple(rng.choices(TECH, WEIGHTS, k=3))
+        record.tech_stack = tuple(rng.choices(TECH, WEIGHTS, k=2))
+    snapshot.apply(upserted=records)
+
+    results = {"unranked": ([], []), "ranked": ([], [])}
+    for profile in skill_profiles(args.queries, rng):
+        for label, query_profile in (
+            ("unranked", profile.model_copy(update={"technical_skills": []})),
+            ("ranked", profile),
+        ):
+            start = time.perf_counter()
+            ideas = snapshot.match(query_profile, 15)
+            latencies, shares = results[label]
+            latencies.append(time.perf_counter() - start)
+            shares.append(passing_share(ideas, profile))
+
+    for label, (latencies, shares) in results.items():
+        latencies.sort()
+        print(
+            f"{label:>8}: {statistics.mean(shares):.1%} of inspiration ideas pass the skill check, "
+            f"p50 {statistics.median(latencies) * 1e3:.3f}ms, "
+            f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1e3:.3f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Workload pools benchmark: generation checkout waits during a bulk import.
+
+Runs a bulk import (--import-workers threads, each holding a connection for
+--batch-seconds per batch) while generation requests arrive every
+--interval seconds, each needing a connection for --query-seconds. Compares
+one shared pool with the old engine settings (pool_size=5, max_overflow=10)
+against separate ingestion and generation pools sized from settings
+(DB_INGESTION_* / DB_GENERATION_*), and reports generation checkout wait,
+checkout timeouts and import duration.
+
+Connections are in-memory stand-ins, so only pool contention is measured;
+no database is needed.
+
+Usage (from backend/):
+    python -m benchmarks.workload_pools --import-workers 16 --batches 80
+"""
+import argparse
+import statistics
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from app.config import get_settings
+
+
+class FakeConnection:
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def pool(size: int, overflow: int, timeout: float) -> QueuePool:
+    return QueuePool(FakeConnection, pool_size=size, max_overflow=overflow, timeout=timeout)
+
+
+def run(ingestion: QueuePool, generation: QueuePool, args) -> dict:
+    batches = iter(range(args.batches))
+    lock = threading.Lock()
+    waits, timeouts = [], []
+
+    def importer():
+        while True:
+            with lock:
+                if next(batches, None) is None:
+                    return
+            conn = ingestion.connect()
+            time.sleep(args.batch_seconds)
+            conn.close()
+
+    def request():
+        start = time.perf_counter()
+        try:
+            conn = generation.connect()
+        except PoolTimeoutError:
+            timeouts.append(time.perf_counter() - start)
+            return
+        waits.append(time.perf_counter() - start)
+        time.sleep(args.query_seconds)
+        conn.close()
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=importer) for _ in range(args.import_workers)]
+    for worker in workers:
+        worker.start()
+    requests = []
+    while any(worker.is_alive() for worker in workers):
+        thread = threading.Thread(target=request)
+        thread.start()
+        requests.append(thread)
+        time.sleep(args.interval)
+    import_seconds = time.perf_counter() - start
+    for thread in requests:
+        thread.join()
+
+    waits.sort()
+    return {
+        "requests": len(requests),
+        "median": statistics.median(waits) if waits else 0.0,
+        "p95": waits[int(len(waits) * 0.95) - 1] if waits else 0.0,
+        "max": waits[-1] if waits else 0.0,
+        "timeouts": len(timeouts),
+        "import": import_seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--import-workers", type=int, default=16, help="Concurrent import batches")
+    parser.add_argument("--batches", type=int, default=80)
+    parser.add_argument("--batch-seconds", type=float, default=0.2, help="Connection hold per batch")
+    parser.add_argument("--interval", type=float, default=0.02, help="Seconds between generation requests")
+    parser.add_argument("--query-seconds", type=float, default=0.01, help="Connection hold per request")
+    parser.add_argument("--shared-timeout", type=float, default=30.0, help="pool_timeout of the shared pool")
+    args = parser.parse_args()
+    settings = get_settings()
+
+    shared = pool(5, 10, args.shared_timeout)
+    configs = {
+        "shared (5+10)": (shared, shared),
+        f"split (ingestion {settings.db_ingestion_pool_size}+{settings.db_ingestion_max_overflow}, "
+        f"generation {settings.db_generation_pool_size}+{settings.db_generation_max_overflow})": (
+            pool(settings.db_ingestion_pool_size, settings.db_ingestion_max_overflow,
+                 settings.db_ingestion_pool_timeout),
+            pool(settings.db_generation_pool_size, settings.db_generation_max_overflow,
+                 settings.db_generation_pool_timeout),
+        ),
+    }
+    for label, (ingestion, generation) in configs.items():
+        result = run(ingestion, generation, args)
+        print(
+            f"{label}: {result['requests']} generation checkouts, wait median "
+            f"{result['median'] * 1e3:.1f}ms p95 {result['p95'] * 1e3:.1f}ms max {result['max'] * 1e3:.1f}ms, "
+            f"{result['timeouts']} timeouts, import {result['import']:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+Shared fixtures. Database tests run against settings.database_url (CI starts
+a Postgres service) upgraded to the latest Alembic revision, and are skipped
+when it is unreachable.
+"""
+from pathlib import Path
+
+import pytest
+from alembic.config import Config
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from alembic import command
+from app.database import engine
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture(scope="session")
+def migrated_db():
+    """The primary engine, after `alembic upgrade head`."""
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except OperationalError as e:
+        pytest.skip(f"Database not reachable: {e.orig}")
+
+    # No config file: alembic.ini's logging setup would replace the app's
+    config = Config()
+    config.set_main_option("script_location", str(BACKEND / "alembic"))
+    command.upgrade(config, "head")
+    return engine
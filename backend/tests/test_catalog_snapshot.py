@@ -0,0 +1,120 @@
+"""CatalogSnapshot.match ranking and filters, and writes applied to a loaded snapshot."""
+import asyncio
+import threading
+import uuid
+
+import pytest
+
+from app.schemas.profile import UserProfile
+from app.services.catalog_snapshot import CatalogSnapshot, IdeaRecord
+
+
+def record(title, skills=(), tech_stack=(), difficulty="beginner", niche="career", idea_type="saas"):
+    return IdeaRecord(
+        uuid.uuid4(), title, f"{title} summary", idea_type, None, list(skills), list(tech_stack), difficulty, niche,
+    )
+
+
+def row(item: IdeaRecord) -> tuple:
+    """A SNAPSHOT_COLUMNS row, as load() fetches it."""
+    return tuple(getattr(item, field) for field in IdeaRecord.__slots__)
+
+
+def snapshot(*records) -> CatalogSnapshot:
+    """Loaded snapshot of `records`, oldest first."""
+    loaded = CatalogSnapshot.build([row(item) for item in records])
+    loaded.loaded = True
+    return loaded
+
+
+def titles(records) -> list[str]:
+    return [item.title for item in records]
+
+
+def profile(skills=(), level="experienced", **preferences) -> UserProfile:
+    return UserProfile(experience_level=level, technical_skills=list(skills), **preferences)
+
+
+def test_ranks_by_skill_overlap_then_fewer_terms_then_newest():
+    catalog = snapshot(
+        record("one skill", ["Python"]),
+        record("two skills, wide stack", ["python"], ["SQL", "Docker", "Go"]),
+        record("two skills", ["Python", "sql"]),
+        record("two skills, newer", ["PYTHON"], ["SQL"]),
+        record("no overlap", ["Rust"]),
+    )
+    ranked = catalog.match(profile(["python", "SQL "]), 10)
+    assert titles(ranked) == [
+        "two skills, newer", "two skills", "two skills, wide stack", "one skill", "no overlap",
+    ]
+
+
+def test_fills_with_newest_unranked_ideas():
+    catalog = snapshot(record("old"), record("match", ["Python"]), record("new"))
+    assert titles(catalog.match(profile(["python"]), 2)) == ["match", "new"]
+    assert titles(catalog.match(profile(), 2)) == ["new", "match"]
+
+
+@pytest.mark.parametrize("level, expected", [
+    ("beginner", ["beginner"]),
+    ("intermediate", ["intermediate", "beginner"]),
+    ("experienced", ["unset", "advanced", "intermediate", "beginner"]),
+])
+def test_difficulty_follows_experience_level(level, expected):
+    catalog = snapshot(*(record(name, difficulty=name) for name in ("beginner", "intermediate", "advanced")))
+    catalog._apply([record("unset", difficulty=None)], [])
+    assert titles(catalog.match(profile(level=level), 10)) == expected
+
+
+def test_preferred_niches_and_types_filter():
+    catalog = snapshot(
+        record("career saas", niche="career", idea_type="saas"),
+        record("career service", niche="career", idea_type="service"),
+        record("health saas", niche="health", idea_type="saas"),
+        record("finance product", niche="finance", idea_type="product"),
+    )
+    preferences = profile(preferred_niches=["career", "health"], preferred_types=["saas"])
+    assert titles(catalog.match(preferences, 10)) == ["health saas", "career saas"]
+
+
+def test_upsert_and_delete_update_the_indexes():
+    first, second = record("first", ["Python"]), record("second", ["Go"])
+    catalog = snapshot(first, second)
+    assert titles(catalog.match(profile(["go"]), 1)) == ["second"]
+
+    moved = IdeaRecord(*row(first)[:5], ["Go"], [], "beginner", "career")
+    catalog._apply([moved], [second.id])
+    assert titles(catalog.match(profile(["go"]), 10)) == ["first"]
+    assert catalog.match(profile(["python"]), 10)[0] is moved
+    assert catalog.memory_report()["deleted_slots"] == 1
+
+
+def test_apply_from_a_worker_thread_runs_on_the_owning_loop():
+    async def run():
+        catalog = snapshot(record("first"))
+        catalog.loop = asyncio.get_running_loop()
+        writer_threads = []
+        write = catalog._write
+
+        def spy(*args):
+            writer_threads.append(threading.get_ident())
+            write(*args)
+
+        catalog._write = spy
+        added = record("added")
+        await asyncio.to_thread(catalog.apply, [added])
+        await asyncio.sleep(0)
+        return catalog, writer_threads, added
+
+    catalog, writer_threads, added = asyncio.run(run())
+    assert writer_threads == [threading.get_ident()]
+    assert catalog.match(profile(), 1) == [added]
+
+
+def test_writes_during_a_load_are_kept_for_replay():
+    catalog = snapshot(record("first"))
+    catalog.loading = True
+    added = record("added")
+    catalog.apply([added])
+    assert catalog.pending == [([added], [])]
+    assert catalog.match(profile(), 1) == [added]
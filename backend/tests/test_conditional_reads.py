@@ -0,0 +1,44 @@
+"""Conditional GETs of idea reads: a current ETag gets a 304 without a database session."""
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.ideas import catalog_etag
+from app.database import get_read_db
+from app.main import app
+
+
+def no_session():
+    raise AssertionError("read session opened for a 304")
+    yield
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_read_db] = no_session
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(get_read_db)
+
+
+def test_list_ideas_304_opens_no_session(client):
+    etag = catalog_etag()
+    response = client.get("/api/ideas", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+
+def test_get_idea_304_opens_no_session(client):
+    idea_id = uuid.uuid4()
+    etag = catalog_etag(str(idea_id), "20240101000000000000")
+    response = client.get(f"/api/ideas/{idea_id}", headers={"If-None-Match": f"W/{etag}"})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+
+def test_get_idea_tag_of_another_idea_is_not_a_match(client):
+    etag = catalog_etag(str(uuid.uuid4()), "20240101000000000000")
+    with pytest.raises(AssertionError, match="read session opened"):
+        client.get(f"/api/ideas/{uuid.uuid4()}", headers={"If-None-Match": etag})
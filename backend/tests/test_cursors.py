@@ -0,0 +1,43 @@
+"""Keyset cursors of the idea list."""
+import base64
+import uuid
+from datetime import UTC, datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.ideas import decode_cursor, encode_cursor
+
+
+@pytest.mark.parametrize("created_at", [
+    datetime(2024, 3, 15, 12, 30, 45, 123456),
+    datetime(2024, 3, 15, 12, 30, 45, tzinfo=UTC),
+    datetime(2024, 3, 15, tzinfo=timezone(timedelta(hours=-5))),
+])
+def test_round_trip(created_at):
+    idea = SimpleNamespace(created_at=created_at, id=uuid.uuid4())
+    assert decode_cursor(encode_cursor(idea)) == (created_at, idea.id)
+
+
+def test_cursor_is_url_safe_without_padding():
+    for _ in range(20):
+        cursor = encode_cursor(SimpleNamespace(created_at=datetime(2024, 1, 1), id=uuid.uuid4()))
+        assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+
+
+def encoded(payload: str) -> str:
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    encoded("[]"),
+    encoded('{"c": "2024-01-01T00:00:00"}'),
+    encoded('{"c": "yesterday", "i": "00000000-0000-0000-0000-000000000000"}'),
+    encoded('{"c": "2024-01-01T00:00:00", "i": "not-a-uuid"}'),
+])
+def test_invalid_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
@@ -0,0 +1,81 @@
+"""KeywordMatcher: whole-word keyword matching through one trie regex."""
+import random
+
+import pytest
+
+from app.services.validation_rules import (
+    DEFAULT_RULE_SETS,
+    RULES,
+    KeywordMatcher,
+    load_rule_sets,
+)
+
+
+@pytest.mark.parametrize("rule_set, text, found", [
+    ("advanced", "vue", "vue"),
+    ("advanced", "revenue dashboard", None),
+    ("advanced", "uses redis\ncaching", "redis"),
+    ("advanced", "ci/cd pipeline", "ci/cd"),
+    ("advanced", "github actions", "github actions"),
+    ("advanced", "github", None),
+    ("paid", "subscriptions", "subscriptions"),
+    ("paid", "stripe payments", "stripe"),
+    ("paid", "awesome tool", None),
+    ("expensive", "enterprises", "enterprises"),
+    ("expensive", "premium tier", "premium tier"),
+    ("expensive", "premium tiers", "premium tiers"),
+    ("expensive", "premium", None),
+])
+def test_default_rules(rule_set, text, found):
+    assert RULES[rule_set].search(text) == found
+
+
+@pytest.mark.parametrize("text", ["sass", "boxes", "buses", "bus", "box"])
+def test_plural_endings(text):
+    matcher = KeywordMatcher(["box", "bus", "sass"])
+    assert matcher.search(text) == text
+
+
+def test_plural_ending_is_not_any_suffix():
+    matcher = KeywordMatcher(["kafka"])
+    assert matcher.search("kafkaesque") is None
+    assert matcher.search("kafkas") == "kafkas"
+
+
+def test_keywords_are_normalized():
+    matcher = KeywordMatcher([" Docker Compose ", "", "DOCKER compose"])
+    assert matcher.keywords == ["docker compose"]
+    assert matcher.search("docker compose setup") == "docker compose"
+
+
+def test_empty_rule_set_matches_nothing():
+    assert KeywordMatcher([]).search("anything") is None
+
+
+def test_same_result_as_word_scan():
+    """Any match is one of the keywords (or a plural of one) standing as whole words."""
+    rng = random.Random(3)
+    keywords = DEFAULT_RULE_SETS["paid"] + DEFAULT_RULE_SETS["advanced"]
+    matcher = KeywordMatcher(keywords)
+    vocabulary = keywords + ["python", "revenue", "flask", "awsome", "reduxjs", "preview"]
+    for _ in range(500):
+        text = " ".join(rng.sample(vocabulary, 3))
+        words = f" {text} "
+        expected = any(
+            f" {keyword}{ending} " in words for keyword in keywords for ending in ("", "s", "es")
+        )
+        assert (matcher.search(text) is not None) == expected, text
+
+
+def test_rules_file_replaces_named_sets(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text('{"paid": ["custom"]}')
+    rule_sets = load_rule_sets(str(path))
+    assert rule_sets["paid"] == ["custom"]
+    assert rule_sets["advanced"] == DEFAULT_RULE_SETS["advanced"]
+
+
+def test_unreadable_rules_file_keeps_defaults(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text("not json")
+    assert load_rule_sets(str(path)) == DEFAULT_RULE_SETS
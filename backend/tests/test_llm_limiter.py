@@ -0,0 +1,157 @@
+"""LLMLimiter admission, queueing, refusals and cooldowns."""
+import asyncio
+
+import pytest
+
+from app.services.llm_limiter import (
+    LimiterRejected,
+    LLMLimiter,
+    TokenBucket,
+    parse_duration,
+)
+
+
+def limiter(max_concurrency=0, requests_per_minute=0, tokens_per_minute=0, max_queue=10, max_wait=5.0):
+    return LLMLimiter(max_concurrency, requests_per_minute, tokens_per_minute, max_queue, max_wait, name="tests")
+
+
+def test_admits_at_once_while_there_is_room():
+    async def run():
+        calls = limiter(max_concurrency=2)
+        assert await calls.acquire(10) == 0.0
+        assert await calls.acquire(10) == 0.0
+        return calls.active, calls.stats
+
+    active, stats = asyncio.run(run())
+    assert active == 2
+    assert stats["admitted"] == 2 and stats["queued"] == 0
+
+
+def test_queued_calls_get_released_slots_in_order():
+    async def run():
+        calls = limiter(max_concurrency=1)
+        await calls.acquire(1)
+        order = []
+
+        async def wait(name):
+            await calls.acquire(1)
+            order.append(name)
+
+        waiters = [asyncio.create_task(wait(name)) for name in "abc"]
+        await asyncio.sleep(0)
+        assert len(calls.waiters) == 3
+        for _ in waiters:
+            calls.release()
+            await asyncio.sleep(0)
+        await asyncio.gather(*waiters)
+        return order, calls.stats
+
+    order, stats = asyncio.run(run())
+    assert order == ["a", "b", "c"]
+    assert stats["queued"] == 3
+
+
+def test_full_queue_is_refused():
+    async def run():
+        calls = limiter(max_concurrency=1, max_queue=1)
+        await calls.acquire(1)
+        queued = asyncio.create_task(calls.acquire(1))
+        await asyncio.sleep(0)
+        try:
+            with pytest.raises(LimiterRejected) as refused:
+                await calls.acquire(1)
+        finally:
+            queued.cancel()
+        return refused.value
+
+    assert asyncio.run(run()).reason == "queue_full"
+
+
+def test_call_expected_to_wait_past_its_deadline_is_refused_at_once():
+    async def run():
+        calls = limiter(requests_per_minute=1, max_wait=5.0)
+        await calls.acquire(1)
+        with pytest.raises(LimiterRejected) as refused:
+            await calls.acquire(1)
+        return refused.value, calls.waiters
+
+    refused, waiters = asyncio.run(run())
+    assert refused.reason == "deadline"
+    assert refused.retry_after == pytest.approx(60, abs=1)
+    assert not waiters
+
+
+def test_wait_that_runs_out_is_refused():
+    async def run():
+        calls = limiter(max_concurrency=1, max_wait=0.05)
+        await calls.acquire(1)
+        with pytest.raises(LimiterRejected) as refused:
+            await calls.acquire(1)
+        return refused.value, calls
+
+    refused, calls = asyncio.run(run())
+    assert refused.reason == "timeout"
+    assert not calls.waiters and calls.active == 1
+
+
+def test_cancelled_waiter_gives_its_turn_to_the_next():
+    async def run():
+        calls = limiter(max_concurrency=1)
+        await calls.acquire(1)
+        first = asyncio.create_task(calls.acquire(1))
+        second = asyncio.create_task(calls.acquire(1))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        calls.release()
+        await asyncio.wait_for(second, 1)
+        return calls.active
+
+    assert asyncio.run(run()) == 1
+
+
+def test_slot_replaces_its_reservation_with_the_usage():
+    async def run():
+        calls = limiter(tokens_per_minute=6000)
+        async with calls.slot(1000) as slot:
+            assert calls.tokens.level == pytest.approx(5000, abs=5)
+            slot.used(200)
+        return calls
+
+    calls = asyncio.run(run())
+    assert calls.tokens.level == pytest.approx(5800, abs=5)
+    assert calls.active == 0
+
+
+def test_rate_limit_response_pauses_admission():
+    async def run():
+        calls = limiter(max_wait=0.5)
+        calls.rate_limited({"retry-after-ms": "2000"})
+        with pytest.raises(LimiterRejected) as refused:
+            await calls.acquire(1)
+        return refused.value, calls.stats
+
+    refused, stats = asyncio.run(run())
+    assert refused.reason == "deadline"
+    assert refused.retry_after == pytest.approx(2, abs=0.1)
+    assert stats["cooldowns"] == 1
+
+
+def test_exhausted_quota_header_pauses_until_reset():
+    calls = limiter(requests_per_minute=100)
+    calls.observe_headers({"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "1.5s"})
+    assert calls.requests.level == 0
+    assert calls.estimated_wait(1) == pytest.approx(1.5, abs=0.1)
+
+
+def test_unlimited_bucket_never_delays():
+    bucket = TokenBucket(0)
+    bucket.take(10 ** 9)
+    assert bucket.delay(10 ** 9, 0.0) == 0.0
+
+
+@pytest.mark.parametrize("value, seconds", [
+    ("1s", 1.0), ("6m0s", 360.0), ("20ms", 0.02), ("1h2m", 3720.0), ("", None), ("soon", None),
+])
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == (pytest.approx(seconds) if seconds is not None else None)
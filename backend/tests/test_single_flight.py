@@ -0,0 +1,130 @@
+"""SingleFlight: concurrent calls with the same key share one task."""
+import asyncio
+
+import pytest
+
+from app.services.generation import SingleFlight
+
+
+def test_concurrent_calls_share_one_run():
+    async def run():
+        flights = SingleFlight()
+        runs = []
+
+        async def work():
+            runs.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(flights.run("key", work) for _ in range(5)))
+        return results, runs, flights
+
+    results, runs, flights = asyncio.run(run())
+    assert results == ["result"] * 5
+    assert len(runs) == 1
+    assert flights.get_stats() == {"leaders": 1, "followers": 4, "abandoned": 0, "in_flight": 0}
+
+
+def test_different_keys_run_separately():
+    async def run():
+        flights = SingleFlight()
+
+        async def work(value):
+            await asyncio.sleep(0)
+            return value
+
+        return await asyncio.gather(flights.run("a", lambda: work("a")), flights.run("b", lambda: work("b")))
+
+    assert asyncio.run(run()) == ["a", "b"]
+
+
+def test_finished_flight_is_not_reused():
+    async def run():
+        flights = SingleFlight()
+        runs = []
+
+        async def work():
+            runs.append(1)
+            return len(runs)
+
+        return [await flights.run("key", work), await flights.run("key", work)]
+
+    assert asyncio.run(run()) == [1, 2]
+
+
+def test_error_reaches_every_caller():
+    async def run():
+        flights = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0)
+            raise ValueError("failed")
+
+        return await asyncio.gather(flights.run("key", work), flights.run("key", work), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert [type(result) for result in results] == [ValueError, ValueError]
+
+
+def test_cancelled_caller_leaves_the_flight_to_the_others():
+    async def run():
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "result"
+
+        leaver = asyncio.create_task(flights.run("key", work))
+        stayer = asyncio.create_task(flights.run("key", work))
+        await asyncio.sleep(0)
+        leaver.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return await stayer, leaver.cancelled(), flights.stats
+
+    result, cancelled, stats = asyncio.run(run())
+    assert result == "result" and cancelled
+    assert stats["abandoned"] == 0
+
+
+def test_flight_is_cancelled_when_every_caller_has_gone():
+    async def run():
+        flights = SingleFlight()
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def work():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        callers = [asyncio.create_task(flights.run("key", work)) for _ in range(2)]
+        await started.wait()
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.wait_for(cancelled.wait(), 1)
+        return flights
+
+    flights = asyncio.run(run())
+    assert flights.get_stats()["abandoned"] == 1
+    assert not flights.flights
+
+
+@pytest.mark.parametrize("callers", [1, 3])
+def test_leader_and_follower_counts(callers):
+    async def run():
+        flights = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0)
+
+        await asyncio.gather(*(flights.run("key", work) for _ in range(callers)))
+        return flights.stats
+
+    stats = asyncio.run(run())
+    assert (stats["leaders"], stats["followers"]) == (1, callers - 1)
@@ -0,0 +1,53 @@
+"""IdeaStreamParser: ideas are handed back as soon as their object is complete."""
+import json
+
+import pytest
+
+from app.services.streaming import IdeaStreamParser
+
+IDEAS = [
+    {
+        "title": "Recipe {scaler}",
+        "description": 'Scales "family" recipes, with [brackets] and \\ backslashes',
+        "first_steps": ["Parse", {"nested": ["deep"]}],
+        "tech_recommendations": ["Python"],
+    },
+    {"title": "Second", "description": "Plain", "first_steps": [], "tech_recommendations": []},
+]
+DOCUMENT = json.dumps({"profile_summary": "Builder", "ideas": IDEAS, "note": {"ideas": [{"x": 1}]}})
+
+
+def feed_in_chunks(text: str, size: int) -> tuple[IdeaStreamParser, list[list[dict]]]:
+    parser = IdeaStreamParser()
+    return parser, [parser.feed(text[i:i + size]) for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 64, len(DOCUMENT)])
+def test_completed_ideas_for_any_chunking(size):
+    parser, batches = feed_in_chunks(DOCUMENT, size)
+    assert [idea for batch in batches for idea in batch] == IDEAS
+    assert parser.result()["profile_summary"] == "Builder"
+
+
+def test_idea_is_returned_by_the_chunk_that_closes_it():
+    first_end = DOCUMENT.index('"Second"') - len('{"title": ')
+    parser = IdeaStreamParser()
+    assert parser.feed(DOCUMENT[:first_end - 3]) == []
+    assert parser.feed(DOCUMENT[first_end - 3:first_end]) == [IDEAS[0]]
+
+
+def test_nested_ideas_keys_are_not_top_level_ideas():
+    parser = IdeaStreamParser()
+    assert parser.feed(json.dumps({"meta": {"ideas": [{"title": "no"}]}, "ideas": [{"title": "yes"}]})) == [
+        {"title": "yes"}
+    ]
+
+
+def test_incomplete_document_keeps_top_level_fields():
+    parser, _ = feed_in_chunks(DOCUMENT[:DOCUMENT.index('"Second"')], 5)
+    assert parser.result() == {"profile_summary": "Builder"}
+
+
+def test_malformed_idea_is_skipped():
+    parser = IdeaStreamParser()
+    assert parser.feed('{"ideas": [{"title": tru}, {"title": "ok"}]}') == [{"title": "ok"}]
@@ -0,0 +1,92 @@
+"""Fingerprint upserts: insert, update only on change, skip repeats."""
+import uuid
+from collections import namedtuple
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import delete, select, update
+
+from app.database import SessionLocal
+from app.models.idea import Idea
+from app.schemas.idea import IdeaCreate
+from app.services.catalog_snapshot import IdeaRecord
+from app.services.dedup import collect_result, upsert_ideas
+
+TEST_CHANNEL = "tests.upsert"
+# A RETURNING row of upsert_statement: the snapshot columns, then `inserted`
+Returned = namedtuple("Returned", [*IdeaRecord.__slots__, "inserted"])
+
+
+@pytest.fixture
+def db(migrated_db):
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.execute(delete(Idea).where(Idea.source_channel == TEST_CHANNEL))
+        session.commit()
+        session.close()
+
+
+def idea(title: str, **fields) -> IdeaCreate:
+    return IdeaCreate(title=title, summary=f"{title} summary", source_channel=TEST_CHANNEL, **fields)
+
+
+def upsert(db, ideas):
+    result = upsert_ideas(db, ideas)
+    db.commit()
+    return result
+
+
+def test_insert_then_skip_then_update(db):
+    title = f"Upsert idea {uuid.uuid4()}"
+    inserted = upsert(db, [idea(title, niche="career")])
+    assert inserted.counts() == {"inserted": 1, "updated": 0, "skipped": 0}
+    assert [record.title for record in inserted.records] == [title]
+
+    assert upsert(db, [idea(title, niche="career")]).counts() == {"inserted": 0, "updated": 0, "skipped": 1}
+
+    db.execute(update(Idea).where(Idea.title == title).values(content_hash="stale"))
+    db.commit()
+    updated = upsert(db, [idea(title, niche="health")])
+    assert updated.counts() == {"inserted": 0, "updated": 1, "skipped": 0}
+    assert updated.records[0].niche == "health"
+    row = db.execute(select(Idea.niche, Idea.content_hash).where(Idea.title == title)).one()
+    assert row.niche == "health"
+    assert row.content_hash is None  # Cleared for re-embedding
+
+
+def test_same_fingerprint_updates_the_stored_copy(db):
+    title = f"Upsert idea {uuid.uuid4()}"
+    upsert(db, [idea(title)])
+    # Case and spacing do not change the fingerprint, so this is the same idea
+    same = IdeaCreate(title=f"  {title.upper()} ", summary=f"{title} summary", source_channel=TEST_CHANNEL)
+    assert upsert(db, [same]).counts() == {"inserted": 0, "updated": 1, "skipped": 0}
+    titles = db.execute(select(Idea.title).where(Idea.summary == f"{title} summary")).scalars().all()
+    assert titles == [same.title]
+
+
+def test_repeats_within_a_batch_are_skipped(db):
+    title = f"Upsert idea {uuid.uuid4()}"
+    result = upsert(db, [idea(title, niche="career"), idea(title, niche="health"), idea(f"{title} other")])
+    assert result.counts() == {"inserted": 2, "updated": 0, "skipped": 1}
+    # The last occurrence wins
+    assert db.execute(select(Idea.niche).where(Idea.title == title)).scalar_one() == "health"
+
+
+def test_collect_result_counts_returned_rows():
+    def returned(title, inserted):
+        return Returned(uuid.uuid4(), title, "", None, None, [], [], None, None, None, inserted)
+
+    result = collect_result([returned("new", True), returned("changed", False)], total=4)
+    assert result.counts() == {"inserted": 1, "updated": 1, "skipped": 2}
+    assert all(isinstance(record, IdeaRecord) for record in result.records)
+    assert [record.title for record in result.records] == ["new", "changed"]
+
+
+def test_result_add():
+    result = collect_result([], total=2)
+    result.add(SimpleNamespace(inserted=1, updated=2, skipped=3, records=["r"]))
+    assert result.counts() == {"inserted": 1, "updated": 2, "skipped": 5}
+    assert result.records == ["r"]